@@ -14,6 +14,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -58,9 +59,30 @@ GRAPHENE = {
     "SCHEMA": "PrimeBank.schema.schema",
     "MIDDLEWARE": [
         "graphql_jwt.middleware.JSONWebTokenMiddleware",
+        # Listed last so it wraps JWT auth too (graphene applies the last one outermost)
+        "PrimeBankApp.metrics.MetricsMiddleware",
     ],
 }
 
+# Bearer token required by /metrics; the endpoint is refused while it is unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Admin-triggered profiles (X-Profile: 1 or ?profile=1), served by /profiles/
+PROFILE_DIR = os.getenv("PROFILE_DIR")  # defaults to <tmp>/primebank-profiles
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds
+PROFILE_RETENTION = timedelta(days=7)
+PROFILE_MAX_FILES = 200
+
+# Max SQL queries per GraphQL operation ("graphql:<operationName>") or export view
+# (URL name) before ServerTimingMiddleware logs a warning
+QUERY_BUDGETS = {
+    "default": int(os.getenv("QUERY_BUDGET_DEFAULT", "50")),
+    "graphql:KpiClock": 10,
+    "export_timeclock_csv": 10,
+    "export_timeclock_pdf": 10,
+    "export_timeclock_parquet": 10,
+}
+
 GRAPHQL_JWT = {
     "JWT_COOKIE": True,
     "JWT_COOKIE_SECURE": not DEBUG,
@@ -79,22 +101,46 @@ GRAPHQL_JWT = {
     "JWT_COOKIE_HTTPONLY": True,  # Cookie accessible uniquement via HTTP(S)
     # Custom payload handler to include extra user info in tokens
     "JWT_PAYLOAD_HANDLER": "PrimeBankApp.schema_auth.jwt_payload",
+    # Refresh token and its user in a single query
+    "JWT_GET_REFRESH_TOKEN_HANDLER": "PrimeBankApp.schema_auth.get_refresh_token",
 }
 
+# Request user rebuilt from the JWT claims (PrimeBankApp.backends); fields missing
+# from the token come from an in-process LRU cache of users
+AUTH_USER_CACHE_MAX_SIZE = 1024
+AUTH_USER_CACHE_TTL = 30  # seconds
+# How often each process re-reads role changes made by the other processes
+AUTH_ROLE_CHANGE_POLL_INTERVAL = 1.0  # seconds
+# Teams/users visible to each requester (PrimeBankApp.scopes), dropped on team changes
+AUTH_SCOPE_CACHE_MAX_SIZE = 1024
+AUTH_SCOPE_CACHE_TTL = 30  # seconds
+
+# TimeClock rows older than this move to TimeClockArchive (PrimeBankApp.timeclock_archive);
+# lowering it is safe, raising it hides the archived months between the two cutoffs
+TIMECLOCK_ARCHIVE_AFTER_DAYS = 730
+# Decompressed archive months kept in the process for exports and KPIs
+TIMECLOCK_ARCHIVE_CACHE_MONTHS = 24
+
 AUTHENTICATION_BACKENDS = [
-    "graphql_jwt.backends.JSONWebTokenBackend",
+    "PrimeBankApp.backends.JSONWebTokenBackend",
     "django.contrib.auth.backends.ModelBackend",
 ]
 
 MIDDLEWARE = [
+    # First so its timings and SQL count cover the whole request
+    "PrimeBankApp.server_timing.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # After AuthenticationMiddleware: pins the user who wrote to the primary
+    "PrimeBankApp.replicas.ReplicaPinMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # After AuthenticationMiddleware: needs request.user to check is_admin
+    "PrimeBankApp.profiling.ProfilingMiddleware",
 ]
 
 CORS_ALLOW_CREDENTIALS = True
@@ -106,6 +152,9 @@ CORS_ALLOWED_ORIGINS = [
 ]
 if FRONTEND_URL:
     CORS_ALLOWED_ORIGINS.append(FRONTEND_URL)
+CORS_ALLOW_HEADERS = (*default_headers, "x-profile")
+# Readable from the front (PerformanceServerTiming / fetch)
+CORS_EXPOSE_HEADERS = ["Server-Timing", "X-DB-Query-Count", "X-DB-Time-Ms", "X-Profile-Id"]
 
 CSRF_TRUSTED_ORIGINS = [
     "https://ytlabs.space",
@@ -153,6 +202,24 @@ DATABASES = {
     },
 }
 
+# Streaming replica for analytics and exports (PrimeBankApp.replicas), same credentials
+if os.getenv("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("DB_REPLICA_HOST"),
+        "PORT": os.getenv("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        # Tests run against the primary's test database
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICA = "replica" if "replica" in DATABASES else None
+DATABASE_ROUTERS = ["PrimeBankApp.replicas.ReplicaRouter"]
+# Replica skipped when further behind than this, or unreachable
+DATABASE_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "10"))  # seconds
+DATABASE_REPLICA_LAG_CHECK_INTERVAL = 5  # seconds
+# Reads stay on the primary this long after a user's write (read-your-writes,
+# signed `replica-pin` cookie)
+DATABASE_REPLICA_PIN_SECONDS = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -9,5 +9,19 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",
-    }
+    },
+    # Base distincte: les tests de routage (test_replicas.py) y copient les lignes "répliquées"
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
 }
+# Routage désactivé par défaut, activé par test avec `settings.DATABASE_REPLICA = "replica"`
+DATABASE_REPLICA = None
+
+# Hash rapide: les tests créent et authentifient des utilisateurs
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Un seul processus: les marques locales de user_cache suffisent, et le nombre de
+# requêtes ne dépend pas de l'instant de la dernière relecture de RoleChange
+AUTH_ROLE_CHANGE_POLL_INTERVAL = None
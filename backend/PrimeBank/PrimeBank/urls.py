@@ -5,18 +5,37 @@ from django.urls import include, path
 from django.views.decorators.csrf import csrf_exempt
 from graphene_django.views import GraphQLView
 from graphql_jwt.decorators import jwt_cookie
-from PrimeBankApp.views_timeclock_export import export_timeclock_csv
+from PrimeBankApp.views_timeclock_changes import export_timeclock_changes
+from PrimeBankApp.views_timeclock_export import export_timeclock_csv, export_timeclock_zip
 from PrimeBankApp.views_timeclock_pdf_export import export_timeclock_pdf
+from PrimeBankApp.views_timeclock_parquet_export import export_timeclock_parquet
+from PrimeBankApp.views_metrics import metrics
+from PrimeBankApp.views_profiles import download_profile, list_profiles
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("ht/", include("health_check.urls")),
+    path("metrics", metrics, name="metrics"),
+    path("profiles/", list_profiles, name="list_profiles"),
+    path("profiles/<str:name>/", download_profile, name="download_profile"),
     path(
         "graphql",
         jwt_cookie(csrf_exempt(GraphQLView.as_view(graphiql=True))),
+        name="graphql",
     ),
     path("export/timeclock/csv/<str:token>/", export_timeclock_csv, name="export_timeclock_csv"),
+    path("export/timeclock/zip/<str:token>/", export_timeclock_zip, name="export_timeclock_zip"),
+    path(
+        "export/timeclock/changes/<str:token>/",
+        export_timeclock_changes,
+        name="export_timeclock_changes",
+    ),
     path("export/timeclock/pdf/<str:token>/", export_timeclock_pdf, name="export_timeclock_pdf"),
+    path(
+        "export/timeclock/parquet/<str:token>/",
+        export_timeclock_parquet,
+        name="export_timeclock_parquet",
+    ),
 ]
 
 
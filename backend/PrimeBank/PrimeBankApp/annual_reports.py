@@ -0,0 +1,210 @@
+"""
+Organisation-wide batch reports: one CSV and one PDF per employee for a date range.
+
+All TimeClock rows are read once through a server-side cursor ordered by user,
+each employee's rows become a picklable job, and jobs are rendered by a process
+pool that writes the files itself. A manifest records the formats written for
+each employee, so an interrupted run, or a re-run with more `--formats`, only
+renders the employees still missing a requested format.
+
+A re-run also renders again the employees whose clock rows in the period changed
+since the previous run. `invalidate_changed` consumes the ClockEvent log
+(`clock_events.consume`) with one watermark per output directory and period,
+and drops those employees from the manifest. It runs before the rows are read,
+so a change never gets lost between two runs.
+"""
+
+import csv
+import hashlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import groupby
+
+import weasyprint
+from django.utils import timezone
+
+from .clock_events import consume
+from .models import CustomUser, TimeClock
+from .team_reports import _pool_context
+from .timeclock_archive import read_through
+from .views_timeclock_export import Echo, _csv_rows
+from .views_timeclock_pdf_export import (
+    _build_entries,
+    _build_report_context,
+    _render_report_html,
+)
+
+MANIFEST_NAME = "manifest.json"
+CURSOR_CHUNK_SIZE = 5_000
+
+ReportRow = namedtuple("ReportRow", ["id", "user_id", "day", "clock_in", "clock_out", "duration_seconds"])
+
+
+def _atomic_write(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fileobj:
+        fileobj.write(data)
+    os.replace(tmp_path, path)
+
+
+def _file_format(filename):
+    return os.path.splitext(filename)[1].lstrip(".")
+
+
+def load_manifest(output_dir, start, end):
+    """Manifest existant pour la même période, sinon un manifest vide."""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    period = {"start": start.isoformat(), "end": end.isoformat()}
+    if os.path.exists(path):
+        with open(path) as fileobj:
+            manifest = json.load(fileobj)
+        if manifest.get("period") == period:
+            return manifest
+    return {"period": period, "users": {}}
+
+
+def save_manifest(output_dir, manifest):
+    data = json.dumps(manifest, indent=2, sort_keys=True).encode()
+    _atomic_write(os.path.join(output_dir, MANIFEST_NAME), data)
+
+
+def is_done(manifest, output_dir, user_id, formats):
+    """Vrai si chaque format de `formats` a été écrit pour l'employé et que son fichier existe encore."""
+    entry = manifest["users"].get(str(user_id))
+    if not entry or not set(formats) <= set(entry.get("formats", ())):
+        return False
+    wanted = [name for name in entry["files"] if _file_format(name) in formats]
+    return all(os.path.exists(os.path.join(output_dir, name)) for name in wanted)
+
+
+def consumer_name(output_dir, start, end):
+    """Consommateur ClockEvent propre au répertoire et à la période."""
+    directory = hashlib.sha1(os.path.abspath(output_dir).encode()).hexdigest()[:12]
+    return f"annual_reports:{directory}:{start.isoformat()}:{end.isoformat()}"
+
+
+def invalidate_changed(manifest, output_dir, start, end):
+    """
+    Retire du manifest les employés dont un pointage de la période a changé depuis
+    l'exécution précédente (événements après le watermark). Renvoie leurs ids.
+    """
+    changed = set()
+
+    def handler(events):
+        stale = {str(event.user_id) for event in events if start <= event.day <= end} & manifest["users"].keys()
+        for user_id in stale:
+            del manifest["users"][user_id]
+        if stale:
+            # Écrit avant que le watermark n'avance: une interruption ne perd aucun employé
+            save_manifest(output_dir, manifest)
+        changed.update(int(user_id) for user_id in stale)
+
+    consume(consumer_name(output_dir, start, end), handler)
+    return changed
+
+
+def iter_user_jobs(start, end, formats, logo_data_uri="", skip=()):
+    """
+    Lit tous les pointages de la période en une passe (curseur serveur) et
+    produit un job par employé, y compris ceux sans pointage.
+    """
+    users = CustomUser.objects.order_by("id").values(
+        "id", "first_name", "last_name", "email", "hour_contract"
+    )
+    rows = (
+        TimeClock.objects.filter(day__range=(start, end))
+        .order_by("user_id", "day", "clock_in")
+        .values_list("id", "user_id", "day", "clock_in", "clock_out", "duration_seconds", named=True)
+    )
+    # mois archivés de toute l'entreprise compris
+    rows = read_through(rows, None, start, end, chunk_size=CURSOR_CHUNK_SIZE)
+    grouped = groupby((ReportRow(*row) for row in rows), key=lambda row: row.user_id)
+    current = next(grouped, None)
+
+    for user in users.iterator(chunk_size=CURSOR_CHUNK_SIZE):
+        # Pointages d'utilisateurs absents de la liste (ne devrait pas arriver)
+        while current is not None and current[0] < user["id"]:
+            current = next(grouped, None)
+        user_rows = []
+        if current is not None and current[0] == user["id"]:
+            user_rows = list(current[1])
+            current = next(grouped, None)
+        if user["id"] in skip:
+            continue
+        yield {
+            "user": user,
+            "rows": user_rows,
+            "start": start,
+            "end": end,
+            "formats": formats,
+            "logo_data_uri": logo_data_uri,
+        }
+
+
+def _base_filename(job):
+    start, end = job["start"], job["end"]
+    return f'timeclocks_{job["user"]["id"]}_{start.strftime("%Y%m%d")}_{end.strftime("%Y%m%d")}'
+
+
+def render_user_files(job, output_dir):
+    """Écrit le CSV et/ou le PDF d'un employé. Exécuté dans un processus du pool."""
+    base = _base_filename(job)
+    files = []
+    if "csv" in job["formats"]:
+        writer = csv.writer(Echo(), delimiter=";")
+        data = "".join(_csv_rows(job["rows"], writer)).encode()
+        _atomic_write(os.path.join(output_dir, f"{base}.csv"), data)
+        files.append(f"{base}.csv")
+    if "pdf" in job["formats"]:
+        entries, total_seconds, num_days = _build_entries(job["rows"])
+        context = _build_report_context(
+            job["user"], job["start"], job["end"], entries, total_seconds, num_days,
+            logo_data_uri=job["logo_data_uri"],
+        )
+        pdf = weasyprint.HTML(string=_render_report_html(context)).write_pdf()
+        _atomic_write(os.path.join(output_dir, f"{base}.pdf"), pdf)
+        files.append(f"{base}.pdf")
+    return job["user"]["id"], files, len(job["rows"])
+
+
+def run_batch(jobs, output_dir, manifest, workers, on_done=None):
+    """
+    Rend les jobs dans un pool en gardant au plus 2 jobs en attente par worker.
+    Le manifest est réécrit après chaque employé terminé.
+    `on_done(user_id, files, row_count)` est appelé à chaque fin de job.
+    """
+    max_pending = workers * 2
+
+    def record(user_id, files, row_count):
+        # Fichiers d'une exécution précédente avec d'autres formats: conservés
+        previous = manifest["users"].get(str(user_id), {})
+        all_files = sorted(set(previous.get("files", ())) | set(files))
+        manifest["users"][str(user_id)] = {
+            "files": all_files,
+            "formats": sorted({_file_format(name) for name in all_files}),
+            "rows": row_count,
+            "completed_at": timezone.now().isoformat(),
+        }
+        save_manifest(output_dir, manifest)
+        if on_done:
+            on_done(user_id, files, row_count)
+
+    if workers == 1:
+        for job in jobs:
+            record(*render_user_files(job, output_dir))
+        return
+
+    # Pas de connections.close_all() ici: le curseur serveur qui alimente `jobs`
+    # est encore ouvert; les workers forkés n'utilisent jamais la base.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+        pending = set()
+        for job in jobs:
+            pending.add(pool.submit(render_user_files, job, output_dir))
+            if len(pending) >= max_pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record(*future.result())
+        for future in wait(pending).done:
+            record(*future.result())
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class PrimebankappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "PrimeBankApp"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_delete
+
+        from .clock_events import record_deletion, record_user_deletion
+        from .user_cache import invalidate_saved_user
+
+        post_delete.connect(record_deletion, sender="PrimeBankApp.TimeClock", dispatch_uid="clock_event_deletion")
+        pre_delete.connect(
+            record_user_deletion, sender="PrimeBankApp.CustomUser", dispatch_uid="clock_event_user_deletion"
+        )
+        # Admin, shell...: tout enregistrement d'un utilisateur révoque ses anciens claims
+        post_save.connect(invalidate_saved_user, sender="PrimeBankApp.CustomUser", dispatch_uid="user_cache_save")
+        post_delete.connect(invalidate_saved_user, sender="PrimeBankApp.CustomUser", dispatch_uid="user_cache_delete")
@@ -0,0 +1,52 @@
+from django.utils.translation import gettext as _
+from graphql_jwt import exceptions
+from graphql_jwt.backends import JSONWebTokenBackend as BaseJSONWebTokenBackend
+from graphql_jwt.settings import jwt_settings
+from graphql_jwt.utils import get_credentials, get_payload, get_user_by_payload
+
+from .models import TokenUser
+from .server_timing import phase
+from .user_cache import user_cache
+
+
+def _issued_at(payload):
+    # jwt_payload ne pose pas `iat`: exp - JWT_EXPIRATION_DELTA
+    return payload["exp"] - jwt_settings.JWT_EXPIRATION_DELTA.total_seconds()
+
+
+def get_user_by_claims(payload):
+    """
+    Utilisateur de la requête construit depuis les claims, sans requête SQL.
+
+    Retombe sur `get_user_by_payload` (lecture en base) pour les tokens émis avant
+    l'ajout des claims, ou avant un changement de rôle (`user_cache.invalidate_user`).
+    """
+    if any(name not in payload for name in ("user_id", "exp", *TokenUser.CLAIM_FIELDS)):
+        return get_user_by_payload(payload)
+    if user_cache.roles_changed_since(payload["user_id"], _issued_at(payload)):
+        return get_user_by_payload(payload)
+    if not payload["is_active"]:
+        raise exceptions.JSONWebTokenError(_("User is disabled"))
+    return TokenUser.from_claims(payload)
+
+
+def get_user_by_token(token, context=None):
+    return get_user_by_claims(get_payload(token, context))
+
+
+class JSONWebTokenBackend(BaseJSONWebTokenBackend):
+    """
+    Backend JWT de graphql_jwt sans lecture de `CustomUser` par requête, chronométré
+    dans la phase `jwt` de Server-Timing.
+    """
+
+    def authenticate(self, request=None, **kwargs):
+        if request is None or getattr(request, "_jwt_token_auth", False):
+            return None
+
+        with phase("jwt"):
+            token = get_credentials(request, **kwargs)
+            if token is None:
+                return None
+            return get_user_by_token(token, request)
+
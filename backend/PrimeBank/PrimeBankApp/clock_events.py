@@ -0,0 +1,158 @@
+"""
+Append-only log of TimeClock changes (`models.ClockEvent`).
+
+The clock mutations (`clockIn`, `clockOut`, `modifyClockEntry`,
+`acceptedChangeRequest`, `resolveChangeRequests`) write one event per changed
+TimeClock row, in the same transaction as the change. Each event keeps the new
+`clock_in` / `clock_out` values, who made the change and the user's team at
+that time. Deleted TimeClock rows
+are recorded by receivers connected in `apps.PrimebankappConfig.ready`:
+`post_delete` of TimeClock for direct deletions, and `pre_delete` of CustomUser
+for the cascade of a deleted user, with a single INSERT per user. Rows deleted
+inside `suppress_deletion_events()` are not recorded: the archive command
+(`timeclock_archive.py`) moves rows, it does not delete them for consumers.
+
+Derived data (rollups, caches, exports) does not rescan TimeClock. It calls
+`consume(name, handler)`, which passes the events after the consumer's
+watermark (`models.ClockEventWatermark`) to `handler` in `seq` order and then
+moves the watermark forward. The watermark is saved in the handler's
+transaction: if the handler fails, the batch is delivered again on the next call.
+The annual reports (`annual_reports.invalidate_changed`) are such a consumer:
+a re-run renders again only the employees with events since the previous one.
+
+`seq` is assigned at insert time, but with concurrent writers (several backend
+replicas, `stack.yml`) a transaction could commit its event after a higher `seq`
+was already consumed, and the watermark would skip it. On PostgreSQL, writers
+therefore take a transaction-level advisory lock (`EVENT_COMMIT_LOCK`) before
+inserting their events and keep it until they commit: events become visible in
+`seq` order, and a consumer never sees a `seq` while a lower one is in flight.
+SQLite allows a single writer at a time, which gives the same order.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections, router, transaction
+from django.db.models import QuerySet, Subquery
+
+from .models import ClockEvent, ClockEventWatermark, CustomUser, TimeClock
+
+DEFAULT_BATCH_SIZE = 1000
+# pg_advisory_xact_lock: ordonne les commits des transactions qui ajoutent des événements
+EVENT_COMMIT_LOCK = 0x436C6F636B  # "Clock"
+
+_deletions_suppressed = ContextVar("clock_event_deletions_suppressed", default=False)
+
+# Type de changement de ligne TimeClock (flux CDC) pour chaque type d'événement
+OPERATIONS = {
+    ClockEvent.CLOCK_IN: "insert",
+    ClockEvent.CLOCK_OUT: "update",
+    ClockEvent.MODIFIED: "update",
+    ClockEvent.CHANGE_ACCEPTED: "update",
+    ClockEvent.DELETED: "delete",
+}
+
+
+def _team_of(user_id):
+    # Lue dans l'INSERT lui-même: pas de requête en plus par événement
+    return Subquery(CustomUser.objects.filter(pk=user_id).values("team_id")[:1])
+
+
+def _event(kind, timeclock, actor=None, team_id=None):
+    return ClockEvent(
+        kind=kind,
+        timeclock_id=timeclock.pk,
+        user_id=timeclock.user_id,
+        team_id=team_id if team_id is not None else _team_of(timeclock.user_id),
+        day=timeclock.day,
+        clock_in=timeclock.clock_in,
+        clock_out=timeclock.clock_out,
+        actor_id=getattr(actor, "id", None),
+    )
+
+
+def _lock_commit_order(using):
+    # Relâché au commit (ou rollback) de la transaction englobante
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [EVENT_COMMIT_LOCK])
+
+
+def record_event(kind, timeclock, actor=None):
+    """Ajoute un événement `kind` pour l'état courant de `timeclock`."""
+    event = _event(kind, timeclock, actor)
+    using = router.db_for_write(ClockEvent)
+    with transaction.atomic(using=using, savepoint=False):
+        _lock_commit_order(using)
+        event.save(using=using)
+    return event
+
+
+def record_events(kind, timeclocks, actor=None, team_id=None):
+    """Ajoute un événement par pointage, en un seul INSERT."""
+    using = router.db_for_write(ClockEvent)
+    with transaction.atomic(using=using, savepoint=False):
+        _lock_commit_order(using)
+        return ClockEvent.objects.using(using).bulk_create([_event(kind, tc, actor, team_id) for tc in timeclocks])
+
+
+def _from_user_deletion(origin):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, CustomUser)
+
+
+@contextmanager
+def suppress_deletion_events():
+    """Les suppressions de TimeClock faites dans ce bloc n'ajoutent pas d'événement DELETED."""
+    token = _deletions_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _deletions_suppressed.reset(token)
+
+
+def record_deletion(sender, instance, origin=None, **kwargs):
+    """Receiver `post_delete` de TimeClock: la ligne disparaît, l'événement reste."""
+    if _deletions_suppressed.get():
+        return
+    if origin is not None and _from_user_deletion(origin):
+        return  # déjà enregistré en bloc par record_user_deletion
+    record_event(ClockEvent.DELETED, instance)
+
+
+def record_user_deletion(sender, instance, **kwargs):
+    """Receiver `pre_delete` de CustomUser: un événement par pointage supprimé en cascade."""
+    record_events(
+        ClockEvent.DELETED, TimeClock.objects.filter(user_id=instance.pk).order_by("pk"), team_id=instance.team_id
+    )
+
+
+def events_after(seq, limit=DEFAULT_BATCH_SIZE):
+    return ClockEvent.objects.filter(seq__gt=seq).order_by("seq")[:limit]
+
+
+def watermark(consumer):
+    """Dernier `seq` traité par `consumer` (0 s'il n'a jamais consommé)."""
+    return ClockEventWatermark.objects.filter(consumer=consumer).values_list("seq", flat=True).first() or 0
+
+
+def consume(consumer, handler, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Appelle `handler(events)` par lots sur les événements postérieurs au watermark
+    de `consumer`, puis avance le watermark. Renvoie le nombre d'événements traités.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            # select_for_update: deux exécutions du même consommateur ne traitent pas le même lot
+            mark, _ = ClockEventWatermark.objects.select_for_update().get_or_create(consumer=consumer)
+            events = list(events_after(mark.seq, batch_size))
+            if not events:
+                return processed
+            handler(events)
+            mark.seq = events[-1].seq
+            mark.save(update_fields=["seq", "updated_at"])
+        processed += len(events)
+        if len(events) < batch_size:
+            return processed
@@ -1,7 +1,6 @@
 """KPI Functions."""
 
 from collections import defaultdict
-from datetime import datetime, timedelta
 
 from typing import Any
 
@@ -32,17 +31,9 @@ def _aggregate_timeclock_entries(entries):
     totals = defaultdict(float)
 
     for entry in entries:
-        if not entry.clock_in or not entry.clock_out:
-            continue
-
-        start_dt = datetime.combine(entry.day, entry.clock_in)
-        end_dt = datetime.combine(entry.day, entry.clock_out)
-
-        # handle overnight shifts
-        if end_dt < start_dt:
-            end_dt += timedelta(days=1)
-
-        totals[entry.day] += (end_dt - start_dt).total_seconds()
+        # durée calculée à l'écriture (TimeClock.duration_seconds), nuits comprises
+        if entry.duration_seconds:
+            totals[entry.day] += entry.duration_seconds
 
     total_seconds = sum(totals.values())
     worked_days = sum(1 for seconds in totals.values() if seconds > 0)
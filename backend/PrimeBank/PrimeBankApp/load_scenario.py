@@ -0,0 +1,278 @@
+"""
+Scripted load scenario run against a live PrimeBank server over HTTP.
+
+Three phases, modelled on a working day and a month end:
+
+- clock-in storm: every user logs in and clocks in within a short window;
+- dashboard polling: users refresh `kpiClock` and `userTeamPresence` at a fixed
+  interval, as the dashboard does;
+- month-end exports: managers request CSV and PDF exports of their team for the
+  past month and download them.
+
+The storm and the polling run one thread per simulated user, so every user
+arrives at its own time whatever `concurrency` is; exports go through a pool of
+`concurrency` clients. Requests carry the JWT in the ``Authorization`` header
+(cookies are `Secure` outside DEBUG and would not be sent over plain HTTP).
+Latencies are collected per operation and reported as percentiles, with the
+effective request rate.
+"""
+
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+TOKEN_AUTH = """
+mutation TokenAuth($email: String!, $password: String!) {
+  tokenAuth(email: $email, password: $password) { token }
+}
+"""
+CLOCK_IN = """
+mutation ClockIn($userId: ID!) { clockIn(userId: $userId) { timeClock { id clockIn } } }
+"""
+KPI_CLOCK = """
+query KpiClock($period: Int!) {
+  kpiClock(period: $period) { totalHours presenceRate workedDays dailyTotals { day totalHours } }
+}
+"""
+TEAM_PRESENCE = """
+query UserTeamPresence { userTeamPresence { id firstname lastname status presence score } }
+"""
+EXPORT_QUERIES = {
+    "csv": """
+query ExportTimeClockCsv($userId: ID, $startDate: Date, $endDate: Date) {
+  exportTimeClockCsv(userId: $userId, startDate: $startDate, endDate: $endDate) { downloadUrl }
+}
+""",
+    "pdf": """
+query ExportTimeClockPdf($userId: ID, $startDate: Date, $endDate: Date) {
+  exportTimeClockPdf(userId: $userId, startDate: $startDate, endDate: $endDate) { downloadUrl }
+}
+""",
+}
+
+
+class ScenarioError(Exception):
+    pass
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Stats:
+    """Latences et erreurs par opération, alimentées depuis plusieurs threads."""
+
+    def __init__(self):
+        self._latencies = defaultdict(list)
+        self._errors = defaultdict(int)
+        # opération -> [premier départ, dernière fin] (time.perf_counter)
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, seconds, ok=True, started=None):
+        if started is None:
+            started = time.perf_counter() - seconds
+        with self._lock:
+            self._latencies[operation].append(seconds)
+            if not ok:
+                self._errors[operation] += 1
+            span = self._spans.setdefault(operation, [started, started + seconds])
+            span[0] = min(span[0], started)
+            span[1] = max(span[1], started + seconds)
+
+    def count(self):
+        """Nombre total de requêtes enregistrées."""
+        with self._lock:
+            return sum(len(values) for values in self._latencies.values())
+
+    def summary(self):
+        """
+        Lignes (opération, requêtes, erreurs, p50, p95, p99, max, req/s), latences en
+        millisecondes. req/s: requêtes effectivement servies entre le premier départ
+        et la dernière réponse de l'opération.
+        """
+        with self._lock:
+            items = sorted(
+                (op, sorted(values), self._errors[op], self._spans[op][1] - self._spans[op][0])
+                for op, values in self._latencies.items()
+            )
+        return [
+            (
+                op,
+                len(values),
+                errors,
+                percentile(values, 0.50) * 1000,
+                percentile(values, 0.95) * 1000,
+                percentile(values, 0.99) * 1000,
+                values[-1] * 1000,
+                len(values) / span if span > 0 else 0.0,
+            )
+            for op, values, errors, span in items
+        ]
+
+
+class HttpClient:
+    def __init__(self, base_url, timeout=60):
+        # Racine Django (là où répond /graphql), ex. http://localhost:8000 ou https://host/api
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _open(self, request):
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as exc:
+            raise ScenarioError(f"HTTP {exc.code} on {request.full_url}") from exc
+        except urllib.error.URLError as exc:
+            raise ScenarioError(f"{exc.reason} on {request.full_url}") from exc
+
+    def graphql(self, query, variables=None, token=None):
+        body = json.dumps({"query": query, "variables": variables or {}}).encode()
+        request = urllib.request.Request(
+            f"{self.base_url}/graphql",
+            data=body,
+            headers={"Content-Type": "application/json"},
+        )
+        if token:
+            request.add_header("Authorization", f"JWT {token}")
+        payload = json.loads(self._open(request))
+        if payload.get("errors"):
+            raise ScenarioError(payload["errors"][0].get("message", "GraphQL error"))
+        return payload["data"]
+
+    def download(self, path, token=None):
+        # Les URLs d'export sont préfixées par /api (proxy); base_url pointe déjà sur Django
+        request = urllib.request.Request(f"{self.base_url}{path.removeprefix('/api')}")
+        if token:
+            request.add_header("Authorization", f"JWT {token}")
+        return self._open(request)
+
+
+class LoadScenario:
+    """
+    `users`: dicts {"id", "email", "is_manager", "team_member_ids"} (cf. la
+    commande `load_test`).
+    """
+
+    def __init__(self, client, users, password, concurrency=20, stats=None, seed=0):
+        self.client = client
+        self.users = users
+        self.password = password
+        self.concurrency = concurrency
+        self.stats = stats or Stats()
+        self.rng = random.Random(seed)
+        self.tokens = {}
+
+    def _timed(self, operation, call):
+        started = time.perf_counter()
+        try:
+            result = call()
+        except ScenarioError:
+            self.stats.record(operation, time.perf_counter() - started, ok=False, started=started)
+            return None
+        self.stats.record(operation, time.perf_counter() - started, started=started)
+        return result
+
+    def _run(self, tasks):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for future in [pool.submit(task) for task in tasks]:
+                future.result()
+
+    def _run_per_user(self, tasks):
+        """
+        Un thread par tâche: un utilisateur qui attend son heure d'arrivée ou son
+        prochain rafraîchissement n'occupe pas la place d'un autre.
+        """
+        errors = []
+
+        def run(task):
+            try:
+                task()
+            except BaseException as exc:  # remontée dans le thread appelant
+                errors.append(exc)
+
+        threads = [threading.Thread(target=run, args=(task,), daemon=True) for task in tasks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def login(self, user):
+        data = self._timed(
+            "tokenAuth",
+            lambda: self.client.graphql(TOKEN_AUTH, {"email": user["email"], "password": self.password}),
+        )
+        if data:
+            self.tokens[user["id"]] = data["tokenAuth"]["token"]
+        return self.tokens.get(user["id"])
+
+    def clock_in_storm(self, window=60.0):
+        """Chaque utilisateur se connecte puis pointe, à un instant tiré dans `window` secondes."""
+        started = time.perf_counter()
+        offsets = {user["id"]: self.rng.uniform(0, window) for user in self.users}
+
+        def arrive(user):
+            delay = offsets[user["id"]] - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+            token = self.tokens.get(user["id"]) or self.login(user)
+            if token:
+                self._timed("clockIn", lambda: self.client.graphql(CLOCK_IN, {"userId": user["id"]}, token))
+
+        self._run_per_user([lambda user=user: arrive(user) for user in self.users])
+
+    def dashboard_polling(self, duration=60.0, interval=10.0, period=30):
+        """Rafraîchit le dashboard de chaque utilisateur toutes les `interval` secondes."""
+        deadline = time.perf_counter() + duration
+        # Décalage initial: les dashboards ne sont pas synchronisés
+        offsets = {user["id"]: self.rng.uniform(0, interval) for user in self.users}
+
+        def poll(user):
+            token = self.tokens.get(user["id"]) or self.login(user)
+            if not token:
+                return
+            time.sleep(offsets[user["id"]])
+            while time.perf_counter() < deadline:
+                self._timed("kpiClock", lambda: self.client.graphql(KPI_CLOCK, {"period": period}, token))
+                self._timed("userTeamPresence", lambda: self.client.graphql(TEAM_PRESENCE, None, token))
+                time.sleep(interval)
+
+        self._run_per_user([lambda user=user: poll(user) for user in self.users])
+
+    def month_end_exports(self, start, end, formats=("csv", "pdf")):
+        """Chaque manager exporte chaque membre de son équipe, dans chaque format."""
+        variables = {"startDate": start.isoformat(), "endDate": end.isoformat()}
+
+        def export(manager, member_id, export_format):
+            token = self.tokens.get(manager["id"]) or self.login(manager)
+            if not token:
+                return
+            query = EXPORT_QUERIES[export_format]
+            field = "exportTimeClock" + export_format.capitalize()
+            data = self._timed(
+                f"{field} (token)",
+                lambda: self.client.graphql(query, {**variables, "userId": member_id}, token),
+            )
+            if data:
+                url = data[field]["downloadUrl"]
+                self._timed(f"{export_format} download", lambda: self.client.download(url, token))
+
+        self._run([
+            lambda manager=manager, member_id=member_id, export_format=export_format: export(
+                manager, member_id, export_format
+            )
+            for manager in self.users
+            if manager["is_manager"]
+            for member_id in manager["team_member_ids"]
+            for export_format in formats
+        ])
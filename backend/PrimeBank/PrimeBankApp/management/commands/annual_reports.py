@@ -0,0 +1,86 @@
+"""Write one CSV and one PDF timeclock report per employee for a whole period."""
+
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PrimeBankApp.annual_reports import invalidate_changed, iter_user_jobs, is_done, load_manifest, run_batch
+from PrimeBankApp.team_reports import default_worker_count
+from PrimeBankApp.views_timeclock_pdf_export import _load_logo_data_uri
+
+FORMATS = ("csv", "pdf")
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a CSV and a PDF per employee into a directory with a manifest. "
+        "Re-running with the same period resumes where a previous run stopped "
+        "and renders again the employees whose clock rows changed since."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output_dir")
+        parser.add_argument("--year", type=int, help="Calendar year (default: last year)")
+        parser.add_argument("--start", type=date.fromisoformat, help="YYYY-MM-DD, overrides --year")
+        parser.add_argument("--end", type=date.fromisoformat, help="YYYY-MM-DD, overrides --year")
+        parser.add_argument(
+            "--formats",
+            default=",".join(FORMATS),
+            help="Comma separated subset of csv,pdf (default: csv,pdf)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=default_worker_count(),
+            help="Rendering processes (default: number of cores)",
+        )
+
+    def handle(self, *args, **options):
+        year = options["year"] or date.today().year - 1
+        start = options["start"] or date(year, 1, 1)
+        end = options["end"] or date(year, 12, 31)
+        if start > end:
+            raise CommandError("start must be <= end")
+        if options["workers"] < 1:
+            raise CommandError("--workers must be >= 1")
+
+        formats = tuple(f.strip() for f in options["formats"].split(",") if f.strip())
+        if not formats or any(f not in FORMATS for f in formats):
+            raise CommandError(f"--formats must be a subset of {','.join(FORMATS)}")
+
+        output_dir = options["output_dir"]
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = load_manifest(output_dir, start, end)
+        changed = invalidate_changed(manifest, output_dir, start, end)
+        if changed:
+            self.stdout.write(f"{len(changed)} employee(s) changed since the last run")
+        done_ids = {int(uid) for uid in manifest["users"] if is_done(manifest, output_dir, uid, formats)}
+        if done_ids:
+            self.stdout.write(f"Resuming: {len(done_ids)} employee(s) already done")
+
+        logo_data_uri = _load_logo_data_uri() if "pdf" in formats else ""
+        jobs = iter_user_jobs(start, end, formats, logo_data_uri=logo_data_uri, skip=done_ids)
+
+        stats = {"users": 0, "rows": 0}
+        started = time.perf_counter()
+
+        def on_done(user_id, files, row_count):
+            stats["users"] += 1
+            stats["rows"] += row_count
+            if stats["users"] % 50 == 0:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{stats['users']} employee(s), {stats['users'] / elapsed:.1f} employees/s"
+                )
+
+        run_batch(jobs, output_dir, manifest, options["workers"], on_done=on_done)
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{stats['users']} employee(s), {stats['rows']} row(s) in {elapsed:.2f}s "
+                f"({stats['users'] / elapsed:.1f} employees/s, {stats['rows'] / elapsed:.0f} rows/s)"
+            )
+        )
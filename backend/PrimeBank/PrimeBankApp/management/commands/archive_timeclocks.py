@@ -0,0 +1,47 @@
+"""Move TimeClock rows older than TIMECLOCK_ARCHIVE_AFTER_DAYS into the compressed archive, once or periodically."""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PrimeBankApp.timeclock_archive import archive_cutoff, archive_timeclocks, pending_request_months
+
+
+class Command(BaseCommand):
+    help = (
+        "Move TimeClock rows older than TIMECLOCK_ARCHIVE_AFTER_DAYS into TimeClockArchive, "
+        "one compressed row and one transaction per month. With --every, keep running and archive periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=float,
+            default=None,
+            help="Seconds between runs; runs until interrupted (default: archive once)",
+        )
+
+    def handle(self, *args, **options):
+        if options["every"] is not None and options["every"] <= 0:
+            raise CommandError("--every must be > 0")
+
+        while True:
+            self._archive()
+            if options["every"] is None:
+                return
+            time.sleep(options["every"])
+
+    def _archive(self):
+        started = time.perf_counter()
+        moved = archive_timeclocks()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {sum(moved.values())} time clock(s) from {len(moved)} month(s) "
+            f"before {archive_cutoff():%Y-%m-%d} in {elapsed:.2f}s"
+        ))
+        pending = pending_request_months(archive_cutoff())
+        if pending:
+            self.stdout.write(
+                f"Kept {len(pending)} month(s) with pending change requests: "
+                + ", ".join(f"{month:%Y-%m}" for month in sorted(pending))
+            )
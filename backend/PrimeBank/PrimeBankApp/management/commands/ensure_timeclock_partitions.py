@@ -0,0 +1,43 @@
+"""Create the monthly TimeClock partitions of the coming months, once or periodically."""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PrimeBankApp.partitions import DEFAULT_MONTHS_AHEAD, ensure_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the missing monthly partitions of the TimeClock table, from the current month "
+        "to --ahead months ahead (PostgreSQL, after migration 0015). With --every, keep running."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=DEFAULT_MONTHS_AHEAD, help="Months to create ahead")
+        parser.add_argument(
+            "--every",
+            type=float,
+            default=None,
+            help="Seconds between checks; runs until interrupted (default: check once)",
+        )
+
+    def handle(self, *args, **options):
+        if options["ahead"] < 0:
+            raise CommandError("--ahead must be >= 0")
+        if options["every"] is not None and options["every"] <= 0:
+            raise CommandError("--every must be > 0")
+
+        if not is_partitioned():
+            self.stdout.write("TimeClock table is not partitioned (PostgreSQL only); nothing to do.")
+            return
+
+        while True:
+            created = ensure_partitions(months_ahead=options["ahead"])
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"Created partition(s): {', '.join(created)}"))
+            else:
+                self.stdout.write("All partitions already exist.")
+            if options["every"] is None:
+                return
+            time.sleep(options["every"])
@@ -0,0 +1,120 @@
+"""Run the scripted load scenario against a running server."""
+
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PrimeBankApp.load_scenario import HttpClient, LoadScenario
+from PrimeBankApp.models import CustomUser
+from PrimeBankApp.synthetic_data import DEFAULT_PASSWORD, SYNTHETIC_EMAIL_DOMAIN
+
+PHASES = ("storm", "polling", "exports")
+
+
+def _previous_month():
+    end = date.today().replace(day=1) - timedelta(days=1)
+    return end.replace(day=1), end
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a morning clock-in storm, dashboard polling and month-end exports "
+        "with synthetic users (see seed_synthetic_data) against a running server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000",
+            help="Django root serving /graphql (behind the proxy: https://<host>/api)",
+        )
+        parser.add_argument("--users", type=int, default=200, help="Synthetic users taking part")
+        parser.add_argument("--password", default=DEFAULT_PASSWORD)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Parallel HTTP clients for the exports (storm and polling run one client per user)",
+        )
+        parser.add_argument(
+            "--phases",
+            default=",".join(PHASES),
+            help="Comma separated subset of storm,polling,exports (default: all, in that order)",
+        )
+        parser.add_argument("--storm-window", type=float, default=60.0, help="Seconds")
+        parser.add_argument("--poll-duration", type=float, default=120.0, help="Seconds")
+        parser.add_argument("--poll-interval", type=float, default=15.0, help="Seconds")
+        parser.add_argument("--export-formats", default="csv,pdf")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        phases = [p.strip() for p in options["phases"].split(",") if p.strip()]
+        if not phases or any(p not in PHASES for p in phases):
+            raise CommandError(f"--phases must be a subset of {','.join(PHASES)}")
+        if options["concurrency"] < 1 or options["users"] < 1:
+            raise CommandError("--users and --concurrency must be >= 1")
+
+        users = self._load_users(options["users"])
+        if not users:
+            raise CommandError("No synthetic users found: run seed_synthetic_data first.")
+
+        scenario = LoadScenario(
+            HttpClient(options["base_url"]),
+            users,
+            options["password"],
+            concurrency=options["concurrency"],
+            seed=options["seed"],
+        )
+        managers = sum(1 for user in users if user["is_manager"])
+        self.stdout.write(f"{len(users)} user(s), {managers} manager(s) against {options['base_url']}")
+
+        for phase in phases:
+            started = time.perf_counter()
+            requests_before = scenario.stats.count()
+            if phase == "storm":
+                scenario.clock_in_storm(window=options["storm_window"])
+            elif phase == "polling":
+                scenario.dashboard_polling(
+                    duration=options["poll_duration"], interval=options["poll_interval"]
+                )
+            else:
+                start, end = _previous_month()
+                formats = tuple(f.strip() for f in options["export_formats"].split(",") if f.strip())
+                scenario.month_end_exports(start, end, formats=formats)
+            elapsed = time.perf_counter() - started
+            requests = scenario.stats.count() - requests_before
+            self.stdout.write(f"{phase}: {elapsed:.1f}s, {requests} request(s), {requests / elapsed:.1f} req/s")
+
+        self._report(scenario.stats.summary())
+
+    def _load_users(self, limit):
+        users = list(
+            CustomUser.objects.filter(email__endswith=f"@{SYNTHETIC_EMAIL_DOMAIN}", is_admin=False)
+            .order_by("id")
+            .values("id", "email", "team_id", "team_managed_id")[:limit]
+        )
+        members_by_team = {}
+        for user in users:
+            if user["team_id"] and not user["team_managed_id"]:
+                members_by_team.setdefault(user["team_id"], []).append(user["id"])
+        return [
+            {
+                "id": user["id"],
+                "email": user["email"],
+                "is_manager": bool(user["team_managed_id"]),
+                "team_member_ids": members_by_team.get(user["team_managed_id"], []),
+            }
+            for user in users
+        ]
+
+    def _report(self, rows):
+        self.stdout.write(
+            f"{'operation':<28} {'requests':>8} {'errors':>7} {'req/s':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        for operation, count, errors, p50, p95, p99, worst, rate in rows:
+            self.stdout.write(
+                f"{operation:<28} {count:>8} {errors:>7} {rate:>7.1f} "
+                f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {worst:>8.1f}"
+            )
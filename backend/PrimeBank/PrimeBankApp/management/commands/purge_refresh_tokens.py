@@ -0,0 +1,47 @@
+"""Delete expired and revoked refresh tokens in small batches, once or periodically."""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PrimeBankApp.token_retention import DEFAULT_BATCH_SIZE, purge_refresh_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete refresh tokens that are expired (JWT_REFRESH_EXPIRATION_DELTA) or revoked, "
+        "in short per-batch transactions. With --every, keep running and purge periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+        parser.add_argument(
+            "--every",
+            type=float,
+            default=None,
+            help="Seconds between purges; runs until interrupted (default: purge once)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1")
+        if options["pause"] < 0:
+            raise CommandError("--pause must be >= 0")
+        if options["every"] is not None and options["every"] <= 0:
+            raise CommandError("--every must be > 0")
+
+        while True:
+            self._purge(options["batch_size"], options["pause"])
+            if options["every"] is None:
+                return
+            time.sleep(options["every"])
+
+    def _purge(self, batch_size, pause):
+        started = time.perf_counter()
+        totals = purge_refresh_tokens(batch_size=batch_size, pause=pause)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {totals['expired']} expired and {totals['revoked']} revoked refresh token(s) "
+            f"in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,63 @@
+"""Fill the database with a synthetic organisation for load and performance tests."""
+
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from PrimeBankApp.synthetic_data import BATCH_SIZE, DEFAULT_PASSWORD, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate teams, users, time clocks (day and night shifts) and change "
+        "requests. Every user shares the same password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teams", type=int, default=50)
+        parser.add_argument("--members-per-team", type=int, default=40)
+        parser.add_argument("--days", type=int, default=730, help="History length, ending on --end")
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            default=None,
+            help="Last day of history, YYYY-MM-DD (default: yesterday, so load_test can clock in today)",
+        )
+        parser.add_argument("--requests-per-member", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (same seed, same data)")
+        parser.add_argument("--password", default=DEFAULT_PASSWORD)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for name in ("teams", "members_per_team", "days", "batch_size"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be >= 1")
+
+        totals = {}
+
+        def progress(label, count):
+            totals[label] = totals.get(label, 0) + count
+            self.stdout.write(f"{label}: {totals[label]}")
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            data = seed_dataset(
+                members_per_team=options["members_per_team"],
+                teams=options["teams"],
+                days=options["days"],
+                requests_per_member=options["requests_per_member"],
+                seed=options["seed"],
+                today=options["end"] or date.today() - timedelta(days=1),
+                password=options["password"],
+                batch_size=options["batch_size"],
+                progress=progress,
+            )
+        elapsed = time.perf_counter() - started
+
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{rows} row(s) in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s). "
+            f"Admin: {data.admin.email}, first manager: {data.managers[0].email}"
+        ))
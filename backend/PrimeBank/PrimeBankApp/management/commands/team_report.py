@@ -0,0 +1,93 @@
+"""Render the month-end team report: one PDF per member, packaged in a ZIP."""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PrimeBankApp.models import Team
+from PrimeBankApp.team_reports import (
+    build_member_jobs,
+    default_worker_count,
+    render_jobs,
+    write_team_report_zip,
+)
+from PrimeBankApp.views_timeclock_pdf_export import _load_logo_data_uri
+
+
+class Command(BaseCommand):
+    help = "Generate a ZIP with one timeclock PDF report per member of a team."
+
+    def add_arguments(self, parser):
+        parser.add_argument("team_id", type=int)
+        parser.add_argument("--start", type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+        parser.add_argument("--end", type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+        parser.add_argument("--output", help="ZIP path (default: team_<id>_<start>_<end>.zip)")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=default_worker_count(),
+            help="Rendering processes (default: number of cores)",
+        )
+        parser.add_argument(
+            "--benchmark",
+            action="store_true",
+            help="Render with 1, 2, 4 ... --workers processes and report the speedup",
+        )
+
+    def handle(self, *args, **options):
+        start, end = options["start"], options["end"]
+        if start > end:
+            raise CommandError("--start must be <= --end")
+        if options["workers"] < 1:
+            raise CommandError("--workers must be >= 1")
+
+        try:
+            team = Team.objects.get(pk=options["team_id"])
+        except Team.DoesNotExist:
+            raise CommandError(f"Team {options['team_id']} not found.")
+
+        jobs = build_member_jobs(team, start, end, logo_data_uri=_load_logo_data_uri())
+        if not jobs:
+            raise CommandError(f"Team {team.pk} has no members.")
+
+        if options["benchmark"]:
+            self._benchmark(jobs, options["workers"])
+            return
+
+        output = options["output"] or (
+            f'team_{team.pk}_{start.strftime("%Y%m%d")}_{end.strftime("%Y%m%d")}.zip'
+        )
+        started = time.perf_counter()
+        with open(output, "wb") as fileobj:
+            count = write_team_report_zip(
+                jobs, fileobj, workers=options["workers"], progress=self._progress
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} report(s) written to {output} in {elapsed:.2f}s")
+        )
+
+    def _progress(self, done, total, filename):
+        self.stdout.write(f"[{done}/{total}] {filename}")
+
+    def _benchmark(self, jobs, max_workers):
+        counts = []
+        workers = 1
+        while workers < max_workers:
+            counts.append(workers)
+            workers *= 2
+        counts.append(max_workers)
+
+        baseline = None
+        self.stdout.write(f"Rendering {len(jobs)} report(s)")
+        self.stdout.write(f"{'workers':>8} {'seconds':>9} {'reports/s':>10} {'speedup':>8}")
+        for workers in counts:
+            started = time.perf_counter()
+            for _ in render_jobs(jobs, workers=workers):
+                pass
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"{workers:>8} {elapsed:>9.2f} {len(jobs) / elapsed:>10.2f} {baseline / elapsed:>7.2f}x"
+            )
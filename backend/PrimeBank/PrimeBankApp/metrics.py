@@ -0,0 +1,187 @@
+"""
+In-process metrics: GraphQL field latency, SQL counts and export render times.
+
+Metrics live in a per-process registry and are rendered in the Prometheus text
+exposition format by `views_metrics.metrics`. With several gunicorn workers each
+process exposes its own series; the scraper aggregates them.
+
+Only root fields (``kpiClock``, ``users``, ``clockIn`` ...) are instrumented:
+nested fields use the default attribute resolvers and timing them would cost
+more than it tells.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.db.models import QuerySet
+
+from .server_timing import QueryCounter, count_queries, record_phase
+
+# Secondes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # clé -> [compte par bucket (non cumulé) + overflow, somme, total]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", repr(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+GRAPHQL_FIELD_SECONDS = REGISTRY.register(Histogram(
+    "primebank_graphql_field_duration_seconds",
+    "Latency of GraphQL root fields, SQL included.",
+    ["field"],
+))
+GRAPHQL_FIELD_ERRORS = REGISTRY.register(Counter(
+    "primebank_graphql_field_errors_total",
+    "GraphQL root fields that raised an error.",
+    ["field"],
+))
+GRAPHQL_FIELD_DB_QUERIES = REGISTRY.register(Histogram(
+    "primebank_graphql_field_db_queries",
+    "Number of SQL queries executed per GraphQL root field.",
+    ["field"],
+    buckets=QUERY_COUNT_BUCKETS,
+))
+GRAPHQL_FIELD_DB_SECONDS = REGISTRY.register(Histogram(
+    "primebank_graphql_field_db_duration_seconds",
+    "Time spent in SQL per GraphQL root field.",
+    ["field"],
+))
+EXPORT_RENDER_SECONDS = REGISTRY.register(Histogram(
+    "primebank_export_render_duration_seconds",
+    "Time to produce an export body (streamed exports: until the last chunk).",
+    ["format"],
+))
+
+
+class MetricsMiddleware:
+    """Graphene middleware recording latency and SQL usage of root fields."""
+
+    def resolve(self, next, root, info, **args):
+        if info.path.prev is not None:
+            return next(root, info, **args)
+
+        field = f"{info.parent_type.name}.{info.field_name}"
+        counter = QueryCounter()
+        start = time.perf_counter()
+        try:
+            with count_queries(counter):
+                result = next(root, info, **args)
+                # Les resolvers de liste renvoient un QuerySet paresseux:
+                # on l'évalue ici pour que son SQL soit attribué au champ.
+                if isinstance(result, QuerySet):
+                    result = list(result)
+        except Exception:
+            GRAPHQL_FIELD_ERRORS.inc(field=field)
+            raise
+        finally:
+            GRAPHQL_FIELD_SECONDS.observe(time.perf_counter() - start, field=field)
+            GRAPHQL_FIELD_DB_QUERIES.observe(counter.count, field=field)
+            GRAPHQL_FIELD_DB_SECONDS.observe(counter.duration, field=field)
+        return result
+
+
+@contextmanager
+def observe_export(export_format):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        EXPORT_RENDER_SECONDS.observe(elapsed, format=export_format)
+        record_phase("render", elapsed)
+
+
+def observe_stream(chunks, export_format):
+    """Enveloppe un générateur de réponse streamée et mesure sa durée totale."""
+    with observe_export(export_format):
+        yield from chunks
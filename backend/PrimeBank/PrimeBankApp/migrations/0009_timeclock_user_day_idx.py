@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0008_requestmodifytimeclock_old_clock_in_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeclock',
+            index=models.Index(fields=['user', 'day'], name='timeclock_user_day_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Index de la table de graphql_jwt (app tierce, pas de modèle ici): SQL brut,
+# accepté tel quel par PostgreSQL et SQLite.
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0010_tokenuser'),
+        ('refresh_token', '0002_auto_20190130_0900'),
+    ]
+
+    operations = [
+        # Purge des tokens expirés (created < now - JWT_REFRESH_EXPIRATION_DELTA)
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS refreshtoken_created_idx ON refresh_token_refreshtoken (created)',
+            'DROP INDEX IF EXISTS refreshtoken_created_idx',
+        ),
+        # Tokens révoqués (purge): index partiel, les tokens actifs (revoked IS NULL)
+        # passent déjà par l'unique (token, revoked)
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS refreshtoken_revoked_idx ON refresh_token_refreshtoken (revoked) '
+            'WHERE revoked IS NOT NULL',
+            'DROP INDEX IF EXISTS refreshtoken_revoked_idx',
+        ),
+        # Révocation de tous les tokens actifs d'un utilisateur / refreshTokensByEmail
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS refreshtoken_user_active_idx ON refresh_token_refreshtoken (user_id, created) '
+            'WHERE revoked IS NULL',
+            'DROP INDEX IF EXISTS refreshtoken_user_active_idx',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0011_refreshtoken_retention_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='requestmodifytimeclock',
+            index=models.Index(fields=['-current_date', '-id'], name='rmtc_inbox_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0012_requestmodifytimeclock_inbox_cursor_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClockEvent',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('clock_in', 'Clock in'), ('clock_out', 'Clock out'), ('modified', 'Modified by a manager'), ('change_accepted', 'Change request accepted')], max_length=20)),
+                ('timeclock_id', models.BigIntegerField(null=True)),
+                ('user_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('clock_in', models.TimeField(null=True)),
+                ('clock_out', models.TimeField(null=True)),
+                ('actor_id', models.BigIntegerField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClockEventWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumer', models.CharField(max_length=100, unique=True)),
+                ('seq', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0013_clockevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clockevent',
+            name='kind',
+            field=models.CharField(choices=[('clock_in', 'Clock in'), ('clock_out', 'Clock out'), ('modified', 'Modified by a manager'), ('change_accepted', 'Change request accepted'), ('deleted', 'Deleted')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='clockevent',
+            index=models.Index(fields=['user_id', 'seq'], name='clockevent_user_seq_idx'),
+        ),
+    ]
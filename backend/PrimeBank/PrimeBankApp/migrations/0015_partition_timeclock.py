@@ -0,0 +1,151 @@
+"""
+Monthly range partitioning of the TimeClock table (PostgreSQL only, no-op elsewhere).
+
+The SQL is frozen here rather than imported from `PrimeBankApp.partitions`,
+which imports the current models: this migration must keep replaying the same
+statements whatever those become. `partitions.py` keeps what runs afterwards
+(`ensure_partitions`).
+"""
+from datetime import date
+
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = "PrimeBankApp_timeclock"
+UNPARTITIONED = f"{TABLE}_unpartitioned"
+DEFAULT_PARTITION = f"{TABLE}_default"
+SEQUENCE = f"{TABLE}_id_seq"
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _months_between(first, last):
+    month, last = first.replace(day=1), last.replace(day=1)
+    while month <= last:
+        yield month
+        month = _add_months(month, 1)
+
+
+def _is_partitioned(cursor):
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+        [f'"{TABLE}"'],
+    )
+    return cursor.fetchone()[0]
+
+
+def _create_partition(cursor, month):
+    name, start, end = f"{TABLE}_y{month.year:04d}m{month.month:02d}", month, _add_months(month, 1)
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE day >= %s AND day < %s RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [start, end],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+        [start, end],
+    )
+
+
+def _rebuild(cursor, partition_by, primary_key):
+    # Clés étrangères vérifiées à chaque INSERT: sinon, des vérifications différées en
+    # attente interdisent les ALTER TABLE qui suivent la copie dans la même transaction
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{UNPARTITIONED}"')
+    cursor.execute(f'ALTER INDEX "{TABLE}_pkey" RENAME TO "{UNPARTITIONED}_pkey"')
+    cursor.execute(
+        "SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = to_regclass(%s) AND NOT indisprimary",
+        [f'"{UNPARTITIONED}"'],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [f'"{UNPARTITIONED}"'],
+    )
+    foreign_keys = cursor.fetchall()
+    for index_name, _ in indexes:
+        # les noms d'index sont uniques par schéma: on les libère pour la nouvelle table
+        cursor.execute(f"DROP INDEX {index_name}")
+
+    cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{UNPARTITIONED}" INCLUDING DEFAULTS) {partition_by}')
+    cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY ({primary_key})')
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+    return indexes
+
+
+def _restore_indexes(cursor, indexes):
+    for _, definition in indexes:
+        cursor.execute(definition.replace(f'"{UNPARTITIONED}"', f'"{TABLE}"'))
+
+
+def partition_timeclock(connection, months_ahead=MONTHS_AHEAD, today=None):
+    """Table TimeClock partitionnée par mois, du plus ancien pointage à `months_ahead` mois."""
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        if _is_partitioned(cursor):
+            return
+        cursor.execute(f'SELECT MIN(day) FROM "{TABLE}"')
+        oldest = cursor.fetchone()[0]
+        indexes = _rebuild(cursor, "PARTITION BY RANGE (day)", "id, day")
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+        current = (today or timezone.localdate()).replace(day=1)
+        for month in _months_between(min(oldest or current, current), _add_months(current, months_ahead)):
+            _create_partition(cursor, month)
+        # index créés sur la table parente: PostgreSQL les crée sur chaque partition
+        _restore_indexes(cursor, indexes)
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{UNPARTITIONED}"')
+        # supprime aussi la séquence IDENTITY de l'ancienne colonne id
+        cursor.execute(f'DROP TABLE "{UNPARTITIONED}"')
+        # séquence classique: IDENTITY n'est pas accepté sur une table partitionnée avant PostgreSQL 17
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+        cursor.execute(f'SELECT setval(%s, COALESCE(MAX(id), 0) + 1, false) FROM "{TABLE}"', [f'"{SEQUENCE}"'])
+        cursor.execute(f"""ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval('"{SEQUENCE}"')""")
+
+
+def unpartition_timeclock(connection):
+    """Inverse de `partition_timeclock`: une seule table, clé primaire id IDENTITY."""
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        if not _is_partitioned(cursor):
+            return
+        # index des partitions: supprimés avec la table; on garde ceux de la table parente
+        indexes = _rebuild(cursor, "", "id")
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{UNPARTITIONED}"')
+        cursor.execute(f'DROP TABLE "{UNPARTITIONED}" CASCADE')
+        _restore_indexes(cursor, indexes)
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM \"{TABLE}\"",
+            [f'"{TABLE}"'],
+        )
+
+
+def partition(apps, schema_editor):
+    partition_timeclock(schema_editor.connection)
+
+
+def unpartition(apps, schema_editor):
+    unpartition_timeclock(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0014_clockevent_deleted_user_seq_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
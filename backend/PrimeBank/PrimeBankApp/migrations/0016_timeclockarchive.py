@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0015_partition_timeclock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeClockArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('payload', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
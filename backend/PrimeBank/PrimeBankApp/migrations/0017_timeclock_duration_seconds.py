@@ -0,0 +1,49 @@
+# Generated by Django 6.1.2 on 2026-10-19 11:09
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def timeclock_duration_seconds(day, clock_in, clock_out):
+    # Copie figée de models.timeclock_duration_seconds: la migration ne dépend pas du code courant
+    if not clock_in or not clock_out:
+        return 0.0
+    start = datetime.combine(day, clock_in)
+    end = datetime.combine(day, clock_out)
+    if end < start:
+        end += timedelta(days=1)
+    return (end - start).total_seconds()
+
+
+def backfill_durations(apps, schema_editor):
+    TimeClock = apps.get_model("PrimeBankApp", "TimeClock")
+    complete = TimeClock.objects.filter(clock_in__isnull=False, clock_out__isnull=False).order_by("pk")
+    last_pk = 0
+    # lots par clé primaire: pas de curseur ouvert sur la table mise à jour
+    while True:
+        batch = list(complete.filter(pk__gt=last_pk).only("day", "clock_in", "clock_out")[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            return
+        for tc in batch:
+            tc.duration_seconds = timeclock_duration_seconds(tc.day, tc.clock_in, tc.clock_out)
+        TimeClock.objects.bulk_update(batch, ["duration_seconds"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0016_timeclockarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeclock',
+            name='duration_seconds',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_durations, migrations.RunPython.noop),
+    ]
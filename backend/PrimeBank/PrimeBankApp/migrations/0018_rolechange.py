@@ -0,0 +1,21 @@
+# Generated by Django 6.1.2 on 2026-10-19 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0017_timeclock_duration_seconds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoleChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.1.2 on 2026-10-19 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PrimeBankApp', '0018_rolechange'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='clockevent',
+            name='clockevent_user_seq_idx',
+        ),
+        migrations.AddField(
+            model_name='clockevent',
+            name='team_id',
+            field=models.BigIntegerField(null=True),
+        ),
+        # Événements existants: équipe actuelle de l'utilisateur (NULL s'il a été supprimé)
+        migrations.RunSQL(
+            'UPDATE "PrimeBankApp_clockevent" SET team_id = (SELECT team_id FROM "PrimeBankApp_customuser"'
+            ' WHERE "PrimeBankApp_customuser".id = "PrimeBankApp_clockevent".user_id)',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='clockevent',
+            index=models.Index(fields=['team_id', 'seq'], name='clockevent_team_seq_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
@@ -40,6 +42,95 @@ class CustomUser(AbstractUser):
         return f"User {self.id} is {self.first_name} {self.last_name} with email {self.email}"
 
 
+class TokenUser(CustomUser):
+    """
+    Request user rebuilt from the claims of a verified JWT (see
+    `backends.JSONWebTokenBackend`), without any SQL. Fields missing from the
+    token are deferred and filled from `user_cache` on first access.
+    """
+
+    # Claims de schema_auth.jwt_payload -> champs du modèle
+    CLAIM_FIELDS = (
+        "email",
+        "first_name",
+        "last_name",
+        "phone_number",
+        "hour_contract",
+        "is_admin",
+        "is_superuser",
+        "is_active",
+        "team_id",
+        "team_managed_id",
+    )
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, payload):
+        claims = {"id": payload["user_id"], **{name: payload[name] for name in cls.CLAIM_FIELDS}}
+        field_names = [f.attname for f in cls._meta.concrete_fields if f.attname in claims]
+        return cls.from_db("default", field_names, [claims[name] for name in field_names])
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        from .user_cache import user_cache
+
+        cached = user_cache.get(self.pk) if fields else None
+        if cached is None or not all(name in cached.__dict__ for name in fields):
+            return super().refresh_from_db(using=using, fields=fields, **kwargs)
+        for name in fields:
+            setattr(self, name, cached.__dict__[name])
+
+
+def timeclock_duration_seconds(day, clock_in, clock_out):
+    """Durée d'un pointage en secondes, 0 s'il est incomplet. Sortie avant l'entrée: nuit."""
+    if not clock_in or not clock_out:
+        return 0.0
+    start = datetime.combine(day, clock_in)
+    end = datetime.combine(day, clock_out)
+    if end < start:
+        end += timedelta(days=1)
+    return (end - start).total_seconds()
+
+
+# Champs dont dépend TimeClock.duration_seconds
+DURATION_SOURCE_FIELDS = {"day", "clock_in", "clock_out"}
+
+
+class RoleChange(models.Model):
+    """
+    Change of a user's JWT claims (role, team, activation, deletion), see
+    `user_cache.py`. Tokens issued before `changed_at` stop being trusted for
+    their claims in every backend process.
+    """
+
+    # Pas de clé étrangère: la marque doit survivre à la suppression de l'utilisateur
+    user_id = models.BigIntegerField()
+    changed_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Claims of user {self.user_id} changed at {self.changed_at:%Y-%m-%d %H:%M:%S}"
+
+
+class TimeClockQuerySet(models.QuerySet):
+    """`bulk_create` / `bulk_update` tiennent `duration_seconds` à jour comme `save()`."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for tc in objs:
+            tc.refresh_duration()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs, fields = list(objs), list(fields)
+        if DURATION_SOURCE_FIELDS & set(fields):
+            for tc in objs:
+                tc.refresh_duration()
+            if "duration_seconds" not in fields:
+                fields.append("duration_seconds")
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
 class TimeClock(models.Model):
     user = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name="user_time_clock"
@@ -48,15 +139,49 @@ class TimeClock(models.Model):
     day = models.DateField(default=timezone.localdate)
     clock_in = models.TimeField(null=True)
     clock_out = models.TimeField(null=True)
+    # Calculée à l'écriture (save, bulk_create, bulk_update) pour que les agrégats soient des SUM;
+    # un QuerySet.update() des heures doit la recalculer lui-même
+    duration_seconds = models.FloatField(default=0)
+
+    objects = TimeClockQuerySet.as_manager()
 
     # permet de trier les entrées par date décroissante
     class Meta:
         ordering = ["-day", "-clock_in"]
+        indexes = [
+            # plages de dates par utilisateur (KPI, exports, pointage du jour)
+            models.Index(fields=["user", "day"], name="timeclock_user_day_idx"),
+        ]
+
+    def refresh_duration(self):
+        self.duration_seconds = timeclock_duration_seconds(self.day, self.clock_in, self.clock_out)
+
+    def save(self, *args, **kwargs):
+        self.refresh_duration()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and DURATION_SOURCE_FIELDS & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "duration_seconds"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"This user {self.user_id} clocked in at {self.clock_in.date()} and clock out at {self.clock_out.date()}"
 
 
+class TimeClockArchive(models.Model):
+    """
+    TimeClock rows of one month moved out of the hot table (see `timeclock_archive.py`),
+    as zlib-compressed JSON.
+    """
+
+    month = models.DateField(unique=True)  # premier jour du mois
+    row_count = models.PositiveIntegerField(default=0)
+    payload = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Archive of {self.month:%Y-%m}: {self.row_count} time clock(s)"
+
+
 class RequestModifyTimeClock(models.Model):
     user = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name="user_request_modify_time_clock"
@@ -69,5 +194,74 @@ class RequestModifyTimeClock(models.Model):
     new_clock_in = models.TimeField(null=True, blank=True)
     new_clock_out = models.TimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # curseur (current_date, id) de changeRequestInbox, du plus récent au plus ancien
+            models.Index(fields=["-current_date", "-id"], name="rmtc_inbox_cursor_idx"),
+        ]
+
     def __str__(self):
         return f"Request by user {self.user_id} to modify time clock on {self.day}"
+
+
+class ClockEvent(models.Model):
+    """
+    Append-only log of TimeClock changes (see `clock_events.py`). `seq` grows with
+    every event: consumers keep the last `seq` they processed (ClockEventWatermark)
+    and only read the events after it.
+    """
+
+    CLOCK_IN = "clock_in"
+    CLOCK_OUT = "clock_out"
+    MODIFIED = "modified"
+    CHANGE_ACCEPTED = "change_accepted"
+    DELETED = "deleted"
+    KIND_CHOICES = [
+        (CLOCK_IN, "Clock in"),
+        (CLOCK_OUT, "Clock out"),
+        (MODIFIED, "Modified by a manager"),
+        (CHANGE_ACCEPTED, "Change request accepted"),
+        (DELETED, "Deleted"),
+    ]
+
+    seq = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Pas de clé étrangère: le journal survit à la suppression des pointages et des utilisateurs
+    timeclock_id = models.BigIntegerField(null=True)
+    user_id = models.BigIntegerField()
+    # Équipe de l'utilisateur au moment du changement: le flux d'une équipe garde
+    # les événements d'un membre parti ou supprimé depuis
+    team_id = models.BigIntegerField(null=True)
+    day = models.DateField()
+    clock_in = models.TimeField(null=True)
+    clock_out = models.TimeField(null=True)
+    actor_id = models.BigIntegerField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # flux de changements d'une équipe après un curseur (views_timeclock_changes)
+            models.Index(fields=["team_id", "seq"], name="clockevent_team_seq_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("ClockEvent is append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("ClockEvent is append-only.")
+
+    def __str__(self):
+        return f"Event {self.seq}: {self.kind} for user {self.user_id} on {self.day}"
+
+
+class ClockEventWatermark(models.Model):
+    """Last ClockEvent.seq processed by a named consumer."""
+
+    consumer = models.CharField(max_length=100, unique=True)
+    seq = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.consumer} at event {self.seq}"
@@ -0,0 +1,116 @@
+"""
+Monthly range partitioning of the TimeClock table (PostgreSQL only).
+
+Migration 0015 turns `PrimeBankApp_timeclock` into a table partitioned by
+`RANGE (day)` (its SQL is frozen in the migration):
+- one partition per month, from the oldest row to `DEFAULT_MONTHS_AHEAD`
+  months ahead;
+- a DEFAULT partition that catches days outside the created months.
+
+Date-range queries (KPI, exports, presence) only read the partitions of their
+range (partition pruning), and vacuum and index maintenance work on small,
+mostly cold tables.
+
+`ensure_partitions` creates the partitions of the coming months. It runs from
+the `ensure_timeclock_partitions` command, periodically with `--every`. Rows
+that landed in the DEFAULT partition for one of those months are moved into
+the new partition.
+
+The primary key becomes (id, day), because PostgreSQL requires the partition
+key in unique constraints. `id` stays unique through its sequence. On other
+databases (SQLite for `settings_test.py`) every function here is a no-op.
+"""
+
+from datetime import date
+
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TimeClock
+
+DEFAULT_MONTHS_AHEAD = 3
+TABLE = TimeClock._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def months_between(first, last):
+    """Premiers jours des mois de `first` à `last` inclus."""
+    month, last = month_start(first), month_start(last)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def _supported(connection):
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned(connection=default_connection):
+    if not _supported(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            [f'"{TABLE}"'],
+        )
+        return cursor.fetchone()[0]
+
+
+def existing_partitions(connection=default_connection):
+    """Noms des partitions attachées à la table TimeClock."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [f'"{TABLE}"'],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _create_partition(cursor, month):
+    name, start, end = partition_name(month), month, add_months(month, 1)
+    # Table autonome d'abord: les lignes du mois déjà tombées dans DEFAULT y sont déplacées,
+    # puis ATTACH vérifie la contrainte de plage
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE day >= %s AND day < %s RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [start, end],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+        [start, end],
+    )
+    return name
+
+
+def ensure_partitions(months_ahead=DEFAULT_MONTHS_AHEAD, today=None, connection=default_connection):
+    """
+    Crée les partitions manquantes du mois courant aux `months_ahead` mois suivants.
+    Renvoie les noms créés ([] hors PostgreSQL ou si la table n'est pas partitionnée).
+    """
+    if not is_partitioned(connection):
+        return []
+    current = month_start(today or timezone.localdate())
+    existing = existing_partitions(connection)
+    created = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for month in months_between(current, add_months(current, months_ahead)):
+            if partition_name(month) not in existing:
+                created.append(_create_partition(cursor, month))
+    return created
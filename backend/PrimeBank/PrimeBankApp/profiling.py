@@ -0,0 +1,169 @@
+"""
+On-demand sampling profiler for requests sent by an admin.
+
+A request carrying ``X-Profile: 1`` (or ``?profile=1``) from an admin is run
+while a background thread samples the stack of the request thread every
+`PROFILE_SAMPLE_INTERVAL` seconds. Samples are written in the collapsed-stack
+format read by flamegraph.pl and speedscope (``frame;frame;frame count``) to
+`PROFILE_DIR`, and the file name is returned in ``X-Profile-Id``. The files are
+served by `views_profiles` to admins only. Old files are removed after each new
+profile, following `PROFILE_RETENTION` and `PROFILE_MAX_FILES`.
+
+Profiling covers the view until it returns: for streamed exports, the body
+generated afterwards is not sampled.
+"""
+
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+
+from .roles import is_admin
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "profile"
+DEFAULT_SAMPLE_INTERVAL = 0.005
+DEFAULT_RETENTION = timedelta(days=7)
+DEFAULT_MAX_FILES = 200
+
+PROFILE_SUFFIX = ".collapsed"
+# Noms générés par `save_profile`; toute autre valeur est refusée au téléchargement
+PROFILE_NAME_RE = re.compile(r"^[0-9]{8}T[0-9]{6}_[A-Za-z0-9_.-]+_[0-9a-f]{8}\.collapsed$")
+
+
+def profile_dir():
+    return getattr(settings, "PROFILE_DIR", None) or os.path.join(tempfile.gettempdir(), "primebank-profiles")
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}".replace(";", ":")
+
+
+def collapse_stack(frame):
+    """Pile d'appels de la racine vers la frame courante, au format collapsed."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Échantillonne la pile d'un thread depuis un thread démon."""
+
+    def __init__(self, thread_id, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="primebank-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is not None:
+            self.samples[collapse_stack(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def profiling_requested(request):
+    return request.META.get(PROFILE_HEADER) == "1" or request.GET.get(PROFILE_PARAM) == "1"
+
+
+def _request_admin(request):
+    """
+    Admin à l'origine de la requête, ou None. Le JWT (cookie ou header) est lu
+    ici car l'authentification GraphQL n'a lieu qu'au moment du resolve.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        user = authenticate(request=request)
+        if user is None:
+            return None
+        # Évite une seconde authentification par JSONWebTokenMiddleware
+        request.user = user
+    return user if is_admin(user) else None
+
+
+def _profile_label(request):
+    match = getattr(request, "resolver_match", None)
+    label = (match.url_name if match else None) or request.path.strip("/").replace("/", "-") or "root"
+    return re.sub(r"[^A-Za-z0-9_.-]", "-", label)[:60]
+
+
+def cleanup_profiles(directory=None, now=None):
+    """Supprime les profils plus vieux que la rétention puis les plus anciens au-delà du maximum."""
+    directory = directory or profile_dir()
+    now = now or time.time()
+    retention = getattr(settings, "PROFILE_RETENTION", DEFAULT_RETENTION).total_seconds()
+    max_files = getattr(settings, "PROFILE_MAX_FILES", DEFAULT_MAX_FILES)
+
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and PROFILE_NAME_RE.match(entry.name):
+            entries.append((entry.stat().st_mtime, entry.path))
+    entries.sort(reverse=True)
+
+    removed = 0
+    for index, (mtime, path) in enumerate(entries):
+        if index >= max_files or now - mtime > retention:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def save_profile(sampler, label, directory=None):
+    directory = directory or profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}_{label}_{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}"
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    with open(tmp_path, "w") as fileobj:
+        fileobj.write(sampler.collapsed())
+    os.replace(tmp_path, os.path.join(directory, name))
+    cleanup_profiles(directory)
+    return name
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling_requested(request) or _request_admin(request) is None:
+            return self.get_response(request)
+
+        interval = getattr(settings, "PROFILE_SAMPLE_INTERVAL", DEFAULT_SAMPLE_INTERVAL)
+        sampler = StackSampler(threading.get_ident(), interval).start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+
+        response["X-Profile-Id"] = save_profile(sampler, _profile_label(request))
+        return response
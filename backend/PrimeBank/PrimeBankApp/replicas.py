@@ -0,0 +1,276 @@
+"""
+Read-replica routing for analytics and export traffic.
+
+When `DATABASE_REPLICA` names an alias of `DATABASES` (settings.py defines
+`replica` from `DB_REPLICA_HOST`), read-only entry points read from that
+replica:
+- the GraphQL resolvers `kpiClock`, `userTeamPresence`, `teams` and `users`,
+  decorated with `@replica_reads`;
+- the export views, decorated with `@replica_view`, streamed body included.
+
+Writes, and reads anywhere else, stay on `default`. `ReplicaRouter`
+(`DATABASE_ROUTERS`) only answers "replica" inside those entry points, and
+decides again for every query. A requester authenticated in the middle of an
+export view (JWT, signed token) is taken into account as soon as it is known.
+
+The replica is skipped, so reads go to the primary, when:
+- the current request has already written;
+- the requester wrote less than `DATABASE_REPLICA_PIN_SECONDS` ago. This
+  read-your-writes pin is a signed, timestamped cookie (`PIN_COOKIE`) set by
+  `ReplicaPinMiddleware` on the response of the write: the client sends it
+  back to whichever backend replica serves its next requests;
+- its replication lag is above `DATABASE_REPLICA_MAX_LAG` seconds, or it does
+  not answer. The lag is checked at most once every
+  `DATABASE_REPLICA_LAG_CHECK_INTERVAL` seconds, and the result is kept in
+  the process.
+"""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.core.signing import BadSignature
+from django.db.models import QuerySet
+from graphql_jwt.settings import jwt_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_LAG = 10.0  # secondes
+DEFAULT_LAG_CHECK_INTERVAL = 5.0  # secondes
+DEFAULT_PIN_SECONDS = 30.0
+PIN_COOKIE = "replica-pin"
+PIN_SALT = "PrimeBankApp.replicas.pin"
+
+# 0 sur un primaire, ou sur un réplica qui a rejoué tout ce qu'il a reçu (sinon un
+# primaire sans écriture ferait croire à un retard croissant)
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+# Requête (ou info.context) dont les lectures peuvent aller au réplica
+_replica_request = ContextVar("primebank_replica_request", default=None)
+_request_state = ContextVar("primebank_replica_state", default=None)
+# Vrai pendant le choix de l'alias: request.user paresseux peut lui-même lire la base
+_choosing = ContextVar("primebank_replica_choosing", default=False)
+
+
+class _RequestState:
+    __slots__ = ("wrote",)
+
+    def __init__(self):
+        self.wrote = False
+
+
+def replica_alias():
+    """Alias du réplica configuré, ou None."""
+    alias = getattr(settings, "DATABASE_REPLICA", None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def replica_lag_seconds(alias):
+    """Retard de réplication en secondes (0 hors PostgreSQL), None si le réplica ne répond pas."""
+    conn = connections[alias]
+    if conn.vendor != "postgresql":
+        return 0.0
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            value = cursor.fetchone()[0]
+    except DatabaseError:
+        logger.warning("Replica %s unreachable, reading from the primary", alias, exc_info=True)
+        return None
+    return float(value or 0)
+
+
+class LagGuard:
+    """Dernier résultat du contrôle de retard, réutilisé pendant DATABASE_REPLICA_LAG_CHECK_INTERVAL."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last = None  # (alias, vérifié_à, utilisable)
+
+    @property
+    def max_lag(self):
+        return getattr(settings, "DATABASE_REPLICA_MAX_LAG", DEFAULT_MAX_LAG)
+
+    @property
+    def interval(self):
+        return getattr(settings, "DATABASE_REPLICA_LAG_CHECK_INTERVAL", DEFAULT_LAG_CHECK_INTERVAL)
+
+    def healthy(self, alias):
+        now = self._clock()
+        with self._lock:
+            last = self._last
+        if last is not None and last[0] == alias and now - last[1] < self.interval:
+            return last[2]
+
+        lag = replica_lag_seconds(alias)
+        usable = lag is not None and lag <= self.max_lag
+        if lag is not None and not usable:
+            logger.warning("Replica %s is %.1fs behind, reading from the primary", alias, lag)
+        with self._lock:
+            self._last = (alias, now, usable)
+        return usable
+
+    def clear(self):
+        with self._lock:
+            self._last = None
+
+
+def pin_seconds():
+    return getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", DEFAULT_PIN_SECONDS)
+
+
+def _pinned(request, user):
+    """Vrai si `request` porte le cookie de `user` posé il y a moins de DATABASE_REPLICA_PIN_SECONDS."""
+    if PIN_COOKIE not in getattr(request, "COOKIES", {}):
+        return False
+    try:
+        # signature horodatée: l'échéance ne dépend pas du max_age vu par le navigateur
+        value = request.get_signed_cookie(PIN_COOKIE, salt=PIN_SALT, max_age=pin_seconds())
+    except BadSignature:  # expiré ou falsifié
+        return False
+    return value == str(user.id)
+
+
+lag_guard = LagGuard()
+
+
+def read_alias_for(request=None):
+    """Alias où lire pour `request.user`: le réplica s'il est configuré et sûr, sinon None (primaire)."""
+    alias = replica_alias()
+    if alias is None:
+        return None
+    state = _request_state.get()
+    if state is not None and state.wrote:
+        return None
+    user = getattr(request, "user", None)
+    if getattr(user, "is_authenticated", False) and _pinned(request, user):
+        return None
+    if not lag_guard.healthy(alias):
+        return None
+    return alias
+
+
+@contextmanager
+def use_replica(request):
+    """
+    Les lectures du bloc peuvent aller au réplica. `read_alias_for(request)`
+    est réévalué à chaque requête SQL: un utilisateur authentifié en cours de vue
+    (JWT, token d'export) est pris en compte dès qu'il est connu.
+    """
+    token = _replica_request.set(request)
+    try:
+        yield
+    finally:
+        _replica_request.reset(token)
+
+
+def replica_reads(resolver):
+    """Resolver GraphQL en lecture seule: ses requêtes, et celles du QuerySet renvoyé, vont au réplica."""
+
+    @functools.wraps(resolver)
+    def wrapper(root, info, *args, **kwargs):
+        with use_replica(info.context):
+            result = resolver(root, info, *args, **kwargs)
+        if isinstance(result, QuerySet):
+            # évalué par graphene hors du bloc: alias fixé maintenant
+            alias = read_alias_for(info.context)
+            if alias:
+                result = result.using(alias)
+        return result
+
+    return wrapper
+
+
+def _stream_in(request, chunks):
+    # Corps streamé après le retour de la vue: le contexte est rétabli autour de chaque morceau
+    iterator = iter(chunks)
+    while True:
+        token = _replica_request.set(request)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _replica_request.reset(token)
+        yield chunk
+
+
+def replica_view(view):
+    """Vue d'export en lecture seule: requêtes de la vue et du corps streamé sur le réplica."""
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with use_replica(request):
+            response = view(request, *args, **kwargs)
+        if getattr(response, "streaming", False) and replica_alias():
+            response.streaming_content = _stream_in(request, response.streaming_content)
+        return response
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """Lectures sur le réplica dans `use_replica` quand c'est sûr, tout le reste (et toute écriture) sur `default`."""
+
+    def db_for_read(self, model, **hints):
+        request = _replica_request.get()
+        if request is None or _choosing.get() or replica_alias() is None:
+            return DEFAULT_DB_ALIAS
+        token = _choosing.set(True)
+        try:
+            return read_alias_for(request) or DEFAULT_DB_ALIAS
+        finally:
+            _choosing.reset(token)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Même données des deux côtés de la réplication
+        same_data = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in same_data and obj2._state.db in same_data:
+            return True
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Suit les écritures de la requête; un utilisateur qui a écrit reçoit le cookie PIN_COOKIE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState()
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        user = getattr(request, "user", None)
+        if state.wrote and getattr(user, "is_authenticated", False) and replica_alias():
+            response.set_signed_cookie(
+                PIN_COOKIE,
+                str(user.id),
+                salt=PIN_SALT,
+                max_age=pin_seconds(),
+                httponly=True,
+                # mêmes règles que le cookie JWT: renvoyé par le front même cross-site
+                secure=jwt_settings.JWT_COOKIE_SECURE,
+                samesite=jwt_settings.JWT_COOKIE_SAMESITE,
+            )
+        return response
@@ -0,0 +1,75 @@
+"""
+Request-scoped memoization attached to the GraphQL context (`info.context`).
+
+A single GraphQL operation often asks several resolvers for the same data. The
+dashboard, for example, requests `kpiClock` over two periods plus
+`userTeamPresence` and exports for the same member. `request_cache(info)`
+returns the `RequestCache` stored on the context, the Django request, so each
+user, team or roster lookup and each permission decision runs once per request.
+
+Loaders are passed in by the resolver, usually the `CustomUser.objects.get` of
+its own module. Exceptions such as `DoesNotExist` are not cached.
+"""
+
+_CONTEXT_ATTR = "_primebank_request_cache"
+
+
+class RequestCache:
+    def __init__(self, context):
+        self.context = context
+        self._values = {}
+        self.hits = 0
+
+    @property
+    def requester(self):
+        user = getattr(self.context, "user", None)
+        if user is None or not getattr(user, "is_authenticated", False):
+            return None
+        return user
+
+    def memo(self, key, compute):
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+        value = self._values[key] = compute()
+        return value
+
+    def user(self, user_id, load):
+        """Utilisateur `user_id` (`load(user_id)` au premier appel); le demandeur lui-même sans requête."""
+        requester = self.requester
+        if requester is not None and str(requester.id) == str(user_id):
+            return requester
+        return self.memo(("user", str(user_id)), lambda: load(user_id))
+
+    def users(self, user_ids, load_many):
+        """Utilisateurs connus parmi `user_ids`, les manquants chargés en une fois par `load_many(ids)`."""
+        requester = self.requester
+        if requester is not None:
+            self._values.setdefault(("user", str(requester.id)), requester)
+        keys = [str(user_id) for user_id in user_ids]
+        missing = [key for key in keys if ("user", key) not in self._values]
+        if missing:
+            for user in load_many(missing):
+                self._values[("user", str(user.id))] = user
+        return [self._values[("user", key)] for key in keys if ("user", key) in self._values]
+
+    def roster(self, team, collect):
+        """Membres de l'équipe (`collect(team)`, ex. `_collect_team_members`), une fois par équipe."""
+        return self.memo(("roster", team.id), lambda: collect(team))
+
+    def allowed(self, permission, target, decide):
+        """Décision `decide()` mémorisée par (permission, demandeur, cible), ex. ("manage", team_id)."""
+        requester = self.requester
+        return self.memo(
+            ("allowed", permission, getattr(requester, "id", None), target), lambda: bool(decide())
+        )
+
+
+def request_cache(info):
+    context = info.context
+    # vars(): un Mock ou un SimpleNamespace de test n'invente pas l'attribut
+    cache = vars(context).get(_CONTEXT_ATTR)
+    if cache is None:
+        cache = RequestCache(context)
+        setattr(context, _CONTEXT_ATTR, cache)
+    return cache
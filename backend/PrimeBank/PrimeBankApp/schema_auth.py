@@ -27,12 +27,11 @@ def jwt_payload(user, context=None):
                 "first_name": getattr(user, "first_name", ""),
                 "last_name": getattr(user, "last_name", ""),
                 "is_admin": getattr(user, "is_admin", False),
-                "team_id": getattr(user.team, "id", None)
-                if getattr(user, "team", None)
-                else None,
-                "team_managed_id": getattr(user.team_managed, "id", None)
-                if getattr(user, "team_managed", None)
-                else None,
+                "is_superuser": getattr(user, "is_superuser", False),
+                "is_active": getattr(user, "is_active", True),
+                # colonnes de la ligne utilisateur: pas de requête sur Team
+                "team_id": getattr(user, "team_id", None),
+                "team_managed_id": getattr(user, "team_managed_id", None),
                 "is_manager": bool(getattr(user, "team_managed_id", None)),
                 "hour_contract": getattr(user, "hour_contract", None),
                 "phone_number": getattr(user, "phone_number", None),
@@ -45,6 +44,11 @@ def jwt_payload(user, context=None):
     return payload
 
 
+def get_refresh_token(refresh_token_model, token, context=None):
+    # refreshToken passe `refresh_token.user` à jwt_payload: l'utilisateur vient de la même requête
+    return refresh_token_model.objects.select_related("user").get(token=token, revoked__isnull=True)
+
+
 class Mutation(graphene.ObjectType):
     token_auth = graphql_jwt.ObtainJSONWebToken.Field()
     verify_token = graphql_jwt.Verify.Field()
@@ -70,8 +74,8 @@ class AuthDevQuery(graphene.ObjectType):
     )
 
     def resolve_refresh_tokens_by_email(self, info, email):
-        tokens = RefreshToken.objects.filter(user__email=email)
-        if not tokens.exists():
+        tokens = list(RefreshToken.objects.filter(user__email=email).select_related("user"))
+        if not tokens:
             raise GraphQLError(f"Aucun refresh token trouvé pour {email}.")
         return [
             ActiveRefreshTokenType(
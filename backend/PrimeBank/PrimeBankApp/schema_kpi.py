@@ -13,11 +13,15 @@ from .kpi_functions.kpi_functions import (
     _collect_team_members,
     _determine_team_for_user,
 )
+from django.db.models import Sum
 from django.utils import timezone
 from graphql import GraphQLError
 
 from .models import CustomUser, TimeClock
+from .replicas import replica_reads
+from .request_cache import request_cache
 from .schema_team import TeamMemberSnapshotType
+from .timeclock_archive import archived_entries
 from .schema_time_clock import (
     DAYS_PER_YEAR,
     SECONDS_PER_HOUR,
@@ -48,6 +52,29 @@ class KPIClockMetricsType(graphene.ObjectType):
     daily_totals = graphene.List(KPIClockDailyTotalType)
 
 
+def _daily_totals(user_id, start, end):
+    """
+    Secondes pointées par jour entre `start` et `end`: un SUM(duration_seconds) par jour
+    dans la base, plus les mois archivés. Renvoie (total, jours travaillés, {jour: secondes}).
+    """
+    totals = defaultdict(float)
+    rows = (
+        TimeClock.objects.filter(user_id=user_id, day__range=(start, end))
+        .order_by()
+        .values("day")
+        .annotate(seconds=Sum("duration_seconds"))
+    )
+    for row in rows:
+        totals[row["day"]] += row["seconds"]
+    _, _, archived = _aggregate_timeclock_entries(archived_entries([user_id], start, end))
+    for day, seconds in archived.items():
+        totals[day] += seconds
+
+    total_seconds = sum(totals.values())
+    worked_days = sum(1 for seconds in totals.values() if seconds > 0)
+    return total_seconds, worked_days, totals
+
+
 # pyright: ignore[reportCallIssue]
 class TimeClockQuery(graphene.ObjectType):
     time_clocks = graphene.List(TimeClockType)
@@ -67,6 +94,7 @@ class TimeClockQuery(graphene.ObjectType):
         period=graphene.Int(required=False),
     )
 
+    @replica_reads
     def resolve_kpi_clock(self, info, user_id=None, period=None):
         user = info.context.user
 
@@ -81,7 +109,7 @@ class TimeClockQuery(graphene.ObjectType):
             user_id = user.id
 
         try:
-            target_user = CustomUser.objects.get(pk=user_id)
+            target_user = request_cache(info).user(user_id, lambda pk: CustomUser.objects.get(pk=pk))
         except CustomUser.DoesNotExist:
             raise GraphQLError("Requested user does not exist.")
 
@@ -96,13 +124,8 @@ class TimeClockQuery(graphene.ObjectType):
 
         today = timezone.localdate()
         start = today - timedelta(days=(period - 1))
-        current_entries = TimeClock.objects.filter(
-            user_id=user_id,
-            day__range=(start, today),
-        ).order_by("day", "clock_in")
-
-        current_total_seconds, current_worked_days, current_daily_totals = (
-            _aggregate_timeclock_entries(current_entries)
+        current_total_seconds, current_worked_days, current_daily_totals = _daily_totals(
+            user_id, start, today
         )
 
         daily_totals = []
@@ -119,13 +142,8 @@ class TimeClockQuery(graphene.ObjectType):
 
         previous_end = start - timedelta(days=1)
         previous_start = previous_end - timedelta(days=(period - 1))
-        previous_entries = TimeClock.objects.filter(
-            user_id=user_id,
-            day__range=(previous_start, previous_end),
-        ).order_by("day", "clock_in")
-
-        previous_total_seconds, previous_worked_days, _ = _aggregate_timeclock_entries(
-            previous_entries
+        previous_total_seconds, previous_worked_days, _ = _daily_totals(
+            user_id, previous_start, previous_end
         )
 
         current_total_hours = current_total_seconds / 3600 if current_total_seconds else 0.0
@@ -183,13 +201,14 @@ class TimeClockQuery(graphene.ObjectType):
         )
 
     def resolve_time_clocks(self, info):
-        return TimeClock.objects.all().order_by("id")
+        return TimeClock.objects.select_related("user").order_by("id")
 
     def resolve_time_clock(self, info, user_id=None):
         if user_id:
             day = timezone.localdate()
             return TimeClock.objects.filter(user_id=user_id, day=day).first()
 
+    @replica_reads
     def resolve_user_team_presence(self, info, period=None):
         request_user = info.context.user
         if not request_user or not request_user.is_authenticated:
@@ -202,12 +221,13 @@ class TimeClockQuery(graphene.ObjectType):
             msg = f"Period too long, max is {TEAM_SCORE_MAX_PERIOD_DAYS} days."
             raise GraphQLError(msg)
 
-        target_team = _determine_team_for_user(request_user)
+        cache = request_cache(info)
+        target_team = cache.memo(("team_for", request_user.id), lambda: _determine_team_for_user(request_user))
         if target_team is None:
             return []
 
         today = timezone.localdate()
-        members = _collect_team_members(target_team)
+        members = cache.roster(target_team, _collect_team_members)
 
         if not members:
             return []
@@ -224,17 +244,23 @@ class TimeClockQuery(graphene.ObjectType):
             ).values_list("user_id", flat=True)
         )
 
-        days_present_map = defaultdict(int)
-        for row in (
+        present_days = set(
             TimeClock.objects.filter(
                 user_id__in=member_ids,
                 day__range=(start, today),
                 clock_in__isnull=False,
             )
-            .values("user_id", "day")
+            .values_list("user_id", "day")
             .distinct()
-        ):
-            days_present_map[row["user_id"]] += 1
+        )
+        present_days.update(
+            (entry.user_id, entry.day)
+            for entry in archived_entries(member_ids, start, today)
+            if entry.clock_in is not None
+        )
+        days_present_map = defaultdict(int)
+        for member_id, _ in present_days:
+            days_present_map[member_id] += 1
 
         snapshots = []
         team_manager_id = getattr(target_team, "team_manager_id", None)
@@ -1,9 +1,11 @@
 import graphene
-from django.db.models import Count
+from django.db.models import Count, Q
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
 
+from .replicas import replica_reads
 from .roles import is_admin, is_manager_of, require_auth
+from .user_cache import invalidate_user
 
 from .models import CustomUser, Team
 
@@ -21,6 +23,7 @@ class TeamQuery(graphene.ObjectType):
     team = graphene.Field(TeamType, id=graphene.ID(required=True))
     teams = graphene.List(TeamType)
 
+    @replica_reads
     def resolve_teams(self, info):
         return (
             Team.objects.annotate(nr_members=Count("members", distinct=True))
@@ -87,7 +90,13 @@ class DeleteTeam(graphene.Mutation):
     @classmethod
     def mutate(cls, root, info, id):
         # .delete() returns a tuple (number of objects deleted, {object_type: number}) since we don't need the second part we use _
+        # team / team_managed passent à NULL (SET_NULL, sans signal post_save) pour ces utilisateurs
+        affected = list(
+            CustomUser.objects.filter(Q(team_id=id) | Q(team_managed_id=id)).values_list("id", flat=True)
+        )
         deleted, _ = Team.objects.filter(pk=id).delete()
+        if deleted:
+            invalidate_user(*affected)
         return DeleteTeam(ok=bool(deleted))
 
 
@@ -125,7 +134,7 @@ class AddUserToTeam(graphene.Mutation):
             raise GraphQLError("Team not found.")
 
         u.team = t
-        u.save()
+        u.save()  # invalide le token (signal post_save, user_cache.py)
 
         # same as create, we need to set nr_members since it is required in the graphql type
         t.nr_members = t.members.count()
@@ -8,14 +8,23 @@ This module provides GraphQL types, queries and mutations for:
 - Request approval/rejection workflows
 """
 
+import base64
+from datetime import datetime
+
 import graphene
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
 
-from PrimeBankApp.models import CustomUser, RequestModifyTimeClock, TimeClock
+from PrimeBankApp.models import ClockEvent, CustomUser, RequestModifyTimeClock, TimeClock
 
+from .clock_events import record_event, record_events
+from .request_cache import request_cache
 from .roles import is_admin, is_manager_of, require_auth
+from .scopes import visibility_scope
+from .timeclock_archive import missing_entry_error
 
 DAYS_PER_YEAR = 365
 SECONDS_PER_HOUR = 3600
@@ -23,6 +32,9 @@ DAYS_PER_WEEK = 7
 DEFAULT_DAILY_WORK_HOURS = 7
 TEAM_SCORE_DEFAULT_PERIOD_DAYS = 30
 TEAM_SCORE_MAX_PERIOD_DAYS = 365
+INBOX_DEFAULT_PAGE_SIZE = 50
+INBOX_MAX_PAGE_SIZE = 100
+MAX_BULK_DECISIONS = 500
 
 
 class RequestModifyTimeClockType(DjangoObjectType):
@@ -41,11 +53,82 @@ class RequestModifyTimeClockType(DjangoObjectType):
         )
 
 
+class ChangeRequestInboxType(graphene.ObjectType):
+    requests = graphene.List(RequestModifyTimeClockType)
+    end_cursor = graphene.String()
+    has_next_page = graphene.Boolean()
+
+
+def encode_inbox_cursor(rmtc):
+    raw = f"{rmtc.current_date.isoformat()}|{rmtc.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_inbox_cursor(cursor):
+    try:
+        current_date, request_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(current_date), int(request_id)
+    except ValueError:
+        raise GraphQLError("Invalid cursor.")
+
+
 class ModifyClockQuery(graphene.ObjectType):
     all_requests = graphene.List(RequestModifyTimeClockType)
+    change_request_inbox = graphene.Field(
+        ChangeRequestInboxType,
+        team_id=graphene.ID(),
+        first=graphene.Int(default_value=INBOX_DEFAULT_PAGE_SIZE),
+        after=graphene.String(),
+    )
 
     def resolve_all_requests(root, info):
-        return RequestModifyTimeClock.objects.all().order_by("-current_date")
+        # Admin: toutes; manager: celles de son équipe et les siennes; sinon: les siennes
+        queryset = RequestModifyTimeClock.objects.select_related("user").order_by("-current_date")
+        return visibility_scope(info).owned_by_members(queryset)
+
+    def resolve_change_request_inbox(root, info, team_id=None, first=INBOX_DEFAULT_PAGE_SIZE, after=None):
+        """
+        Demandes de l'équipe `team_id` (par défaut l'équipe gérée), des plus récentes
+        aux plus anciennes. Pagination par curseur (current_date, id): chaque page est
+        une lecture de l'index `rmtc_inbox_cursor_idx`, quelle que soit sa position.
+        """
+        user = info.context.user
+        require_auth(user)
+
+        if not 1 <= first <= INBOX_MAX_PAGE_SIZE:
+            raise GraphQLError(f"first must be between 1 and {INBOX_MAX_PAGE_SIZE}.")
+
+        if team_id is None:
+            team_id = getattr(user, "team_managed_id", None)
+        if team_id is None:
+            # admin sans équipe précisée: toutes les demandes
+            if not is_admin(user):
+                raise GraphQLError("Not authorized to view change requests.")
+        else:
+            team_id = int(team_id)
+            allowed = request_cache(info).allowed(
+                "manage", team_id, lambda: is_admin(user) or is_manager_of(user, team_id)
+            )
+            if not allowed:
+                raise GraphQLError("Not authorized to view change requests of this team.")
+
+        # select_related: l'utilisateur de chaque demande vient de la même requête que le filtre d'équipe
+        queryset = RequestModifyTimeClock.objects.select_related("user").order_by("-current_date", "-id")
+        if team_id is not None:
+            queryset = queryset.filter(user__team_id=team_id)
+        if after:
+            current_date, request_id = decode_inbox_cursor(after)
+            queryset = queryset.filter(
+                Q(current_date__lt=current_date) | Q(current_date=current_date, id__lt=request_id)
+            )
+
+        rows = list(queryset[: first + 1])
+        page = rows[:first]
+        return ChangeRequestInboxType(
+            requests=page,
+            end_cursor=encode_inbox_cursor(page[-1]) if page else None,
+            has_next_page=len(rows) > first,
+        )
 
 
 class TimeClockType(DjangoObjectType):
@@ -76,12 +159,14 @@ class ClockIn(graphene.Mutation):
         # cant create a time clock entry if one already exists for that user on that day
         if TimeClock.objects.filter(user_id=user_id, day=day).exists():
             raise GraphQLError("This user already clocked in today.")
-        tc = TimeClock.objects.create(
-            user_id=user_id,
-            day=day,
-            clock_in=timezone.localtime().time(),
-            clock_out=None,
-        )
+        with transaction.atomic():
+            tc = TimeClock.objects.create(
+                user_id=user_id,
+                day=day,
+                clock_in=timezone.localtime().time(),
+                clock_out=None,
+            )
+            record_event(ClockEvent.CLOCK_IN, tc, request_user)
         return ClockIn(time_clock=tc)  # pyright: ignore[reportCallIssue]
 
 
@@ -111,7 +196,9 @@ class ClockOut(graphene.Mutation):
         if tc.clock_out:
             raise GraphQLError("You already clocked out today.")
         tc.clock_out = timezone.localtime().time()
-        tc.save()
+        with transaction.atomic():
+            tc.save()
+            record_event(ClockEvent.CLOCK_OUT, tc, request_user)
         return ClockOut(time_clock=tc)  # pyright: ignore[reportCallIssue]
 
 
@@ -128,8 +215,9 @@ class ModifyClockEntry(graphene.Mutation):
     def mutate(cls, root, info, user_id, day=None, clock_in=None, clock_out=None):
         user = info.context.user
         require_auth(user)
+        cache = request_cache(info)
         try:
-            u = CustomUser.objects.get(pk=user_id)
+            u = cache.user(user_id, lambda pk: CustomUser.objects.get(pk=pk))
             u_team = getattr(u, "team_id", None)
         except CustomUser.DoesNotExist:
             raise GraphQLError("User not found.")
@@ -137,7 +225,7 @@ class ModifyClockEntry(graphene.Mutation):
         if day is None:
             raise GraphQLError("Day is required to modify clock entry")
 
-        if not (is_admin(user) or is_manager_of(user, u_team)):
+        if not cache.allowed("manage", u_team, lambda: is_admin(user) or is_manager_of(user, u_team)):
             raise GraphQLError(
                 "Not authorized to modify clock entry for this user. You are not admin or manager of the user's team."
             )
@@ -147,13 +235,15 @@ class ModifyClockEntry(graphene.Mutation):
 
         tc = TimeClock.objects.filter(user_id=user_id, day=day).first()
         if not tc:
-            raise GraphQLError(f"No TimeClock entry for user {user_id} on {day}.")
+            raise GraphQLError(missing_entry_error(user_id, day))
         if clock_in is not None:
             tc.clock_in = clock_in
         if clock_out is not None:
             tc.clock_out = clock_out
 
-        tc.save()
+        with transaction.atomic():
+            tc.save()
+            record_event(ClockEvent.MODIFIED, tc, user)
         return ModifyClockEntry(time_clock=tc)  # pyright: ignore[reportCallIssue]
 
 
@@ -177,7 +267,7 @@ class CreateRequestModifyTimeClock(graphene.Mutation):
 
         tc = TimeClock.objects.filter(user_id=user.id, day=day).first()
         if not tc:
-            raise GraphQLError(f"No TimeClock entry for user {user.id} on {day}.")
+            raise GraphQLError(missing_entry_error(user.id, day))
 
         if new_clock_in is None or new_clock_out is None:
             raise GraphQLError("Both new_clock_in and new_clock_out are required.")
@@ -210,23 +300,127 @@ class AcceptedChangeRequest(graphene.Mutation):
             raise GraphQLError("RequestModifyTimeClock not found.")
 
         user_team = getattr(rmtc.user, "team_id", None)
-        if not (is_admin(user) or is_manager_of(user, int(user_team))):
+        allowed = request_cache(info).allowed(
+            "manage", user_team, lambda: is_admin(user) or is_manager_of(user, int(user_team))
+        )
+        if not allowed:
             raise GraphQLError("Not authorized to accept this request.")
 
         if accepted == True:
             tc = TimeClock.objects.filter(user_id=rmtc.user.id, day=rmtc.day).first()  # pyright: ignore[reportCallIssue]
             if not tc:
-                raise GraphQLError(f"No TimeClock entry for user {rmtc.user.id} on {rmtc.day}.")
+                raise GraphQLError(missing_entry_error(rmtc.user.id, rmtc.day))
             tc.clock_in = rmtc.new_clock_in
             tc.clock_out = rmtc.new_clock_out
-            tc.save()
-            rmtc.delete()
+            with transaction.atomic():
+                tc.save()
+                record_event(ClockEvent.CHANGE_ACCEPTED, tc, user)
+                rmtc.delete()
             return AcceptedChangeRequest(message="Change request accepted and applied.")
         else:
             rmtc.delete()
             return AcceptedChangeRequest(message="Change request rejected and deleted.")
 
 
+class ChangeRequestDecisionInput(graphene.InputObjectType):
+    request_id = graphene.ID(required=True)
+    accepted = graphene.Boolean(required=True)
+
+
+class ChangeRequestResultType(graphene.ObjectType):
+    request_id = graphene.ID()
+    ok = graphene.Boolean()
+    message = graphene.String()
+
+
+class ResolveChangeRequests(graphene.Mutation):
+    """
+    Accepte ou refuse plusieurs demandes en une transaction, en un nombre fixe de requêtes:
+    lecture des demandes (avec leurs utilisateurs) puis des pointages concernés,
+    `bulk_update` des pointages acceptés et un seul DELETE des demandes traitées.
+    Une demande refusée pour une raison (introuvable, non autorisée, pointage absent)
+    est signalée dans son résultat sans annuler les autres.
+    """
+
+    class Arguments:
+        decisions = graphene.List(graphene.NonNull(ChangeRequestDecisionInput), required=True)
+
+    results = graphene.List(ChangeRequestResultType)
+
+    @classmethod
+    def mutate(cls, root, info, decisions):
+        user = info.context.user
+        require_auth(user)
+        if len(decisions) > MAX_BULK_DECISIONS:
+            raise GraphQLError(f"At most {MAX_BULK_DECISIONS} decisions per call.")
+
+        cache = request_cache(info)
+        results = {}
+        with transaction.atomic():
+            ids = {int(d.request_id) for d in decisions}
+            pending = {
+                rmtc.id: rmtc
+                for rmtc in RequestModifyTimeClock.objects.select_related("user")
+                .select_for_update(of=("self",))
+                .filter(pk__in=ids)
+            }
+
+            allowed = {}
+            for rmtc in pending.values():
+                team_id = rmtc.user.team_id
+                allowed[rmtc.id] = cache.allowed(
+                    "manage", team_id, lambda: is_admin(user) or (team_id is not None and is_manager_of(user, team_id))
+                )
+
+            accepted = [
+                pending[int(d.request_id)]
+                for d in decisions
+                if d.accepted and allowed.get(int(d.request_id))
+            ]
+            clocks = {}
+            if accepted:
+                for tc in TimeClock.objects.filter(
+                    user_id__in={r.user_id for r in accepted}, day__in={r.day for r in accepted}
+                ):
+                    clocks[(tc.user_id, tc.day)] = tc
+
+            resolved, changed = [], {}
+            for decision in decisions:
+                request_id = int(decision.request_id)
+                if request_id in results:
+                    continue
+                rmtc = pending.get(request_id)
+                if rmtc is None:
+                    results[request_id] = (False, "RequestModifyTimeClock not found.")
+                elif not allowed[request_id]:
+                    results[request_id] = (False, "Not authorized to accept this request.")
+                elif not decision.accepted:
+                    resolved.append(request_id)
+                    results[request_id] = (True, "Change request rejected and deleted.")
+                elif (rmtc.user_id, rmtc.day) not in clocks:
+                    results[request_id] = (False, missing_entry_error(rmtc.user_id, rmtc.day))
+                else:
+                    tc = clocks[(rmtc.user_id, rmtc.day)]
+                    tc.clock_in = rmtc.new_clock_in
+                    tc.clock_out = rmtc.new_clock_out
+                    changed[tc.pk] = tc
+                    resolved.append(request_id)
+                    results[request_id] = (True, "Change request accepted and applied.")
+
+            if changed:
+                TimeClock.objects.bulk_update(list(changed.values()), ["clock_in", "clock_out"])
+                record_events(ClockEvent.CHANGE_ACCEPTED, changed.values(), user)
+            if resolved:
+                RequestModifyTimeClock.objects.filter(pk__in=resolved).delete()
+
+        return ResolveChangeRequests(  # pyright: ignore[reportCallIssue]
+            results=[
+                ChangeRequestResultType(request_id=request_id, ok=ok, message=message)
+                for request_id, (ok, message) in results.items()
+            ]
+        )
+
+
 # Mutation to import in schema.py
 class TimeClockMutation(graphene.ObjectType):
     clock_in = ClockIn.Field()
@@ -234,3 +428,4 @@ class TimeClockMutation(graphene.ObjectType):
     modify_clock_entry = ModifyClockEntry.Field()
     create_request_modify_time_clock = CreateRequestModifyTimeClock.Field()
     accepted_change_request = AcceptedChangeRequest.Field()
+    resolve_change_requests = ResolveChangeRequests.Field()
@@ -10,6 +10,8 @@ from graphql import GraphQLError
 
 from PrimeBankApp.roles import is_manager_of
 from .models import CustomUser
+from .request_cache import request_cache
+from .views_timeclock_export import MAX_ZIP_EXPORT_USERS
 
 DATE_FMT = "%Y-%m-%d"
 
@@ -23,12 +25,45 @@ class TimeClockPDFExport(graphene.ObjectType):
     filename = graphene.String(required=True)
     expires_at = graphene.DateTime(required=True)
 
+class TimeClockParquetExport(graphene.ObjectType):
+    download_url = graphene.String(required=True)
+    filename = graphene.String(required=True)
+    expires_at = graphene.DateTime(required=True)
+
+class TimeClockZIPExport(graphene.ObjectType):
+    download_url = graphene.String(required=True)
+    filename = graphene.String(required=True)
+    expires_at = graphene.DateTime(required=True)
+
+class TimeClockChangesExport(graphene.ObjectType):
+    download_url = graphene.String(required=True)
+    expires_at = graphene.DateTime(required=True)
+
+EXPORT_TYPES = {
+    "csv": TimeClockCSVExport,
+    "pdf": TimeClockPDFExport,
+    "parquet": TimeClockParquetExport,
+}
+
+
+def _can_export_team(cache, request_user, team_id):
+    # admin OU manager de l'équipe, décidé une fois par équipe et par requête
+    return cache.allowed(
+        "export",
+        team_id,
+        lambda: request_user.is_admin or request_user.is_superuser or is_manager_of(request_user, team_id),
+    )
+
 class TimeClockExportQuery(graphene.ObjectType):
     """
     Génère une URL signée pour télécharger :
       - CSV via /api/export/timeclock/csv/<token>/
       - PDF via /api/export/timeclock/pdf/<token>/
-    Règle d'accès: self OU manager du team de l'utilisateur cible.
+      - Parquet via /api/export/timeclock/parquet/<token>/
+      - ZIP (un CSV par utilisateur) via /api/export/timeclock/zip/<token>/
+      - flux de changements (NDJSON) via /api/export/timeclock/changes/<token>/?after=<seq>
+    Règle d'accès: self OU manager du team de l'utilisateur cible
+    (changements: admin, ou manager de l'équipe demandée).
     """
     export_time_clock_csv = graphene.Field(
         TimeClockCSVExport,
@@ -46,6 +81,26 @@ class TimeClockExportQuery(graphene.ObjectType):
         primary_color=graphene.String(required=False), # New arg for dynamic theming
     )
 
+    export_time_clock_parquet = graphene.Field(
+        TimeClockParquetExport,
+        user_id=graphene.ID(required=False),
+        start_date=graphene.Date(required=False),
+        end_date=graphene.Date(required=False),
+    )
+
+    export_time_clock_zip = graphene.Field(
+        TimeClockZIPExport,
+        user_ids=graphene.List(graphene.NonNull(graphene.ID), required=True),
+        start_date=graphene.Date(required=False),
+        end_date=graphene.Date(required=False),
+        separator=graphene.String(required=False, default_value=";"),
+    )
+
+    export_time_clock_changes = graphene.Field(
+        TimeClockChangesExport,
+        team_id=graphene.ID(required=False),  # si absent => toute l'entreprise (admin)
+    )
+
     def resolve_export_time_clock_csv(self, info, user_id=None, start_date=None, end_date=None, separator=";"):
         return TimeClockExportQuery._generate_export_token(
             info, "csv", user_id, start_date, end_date, separator=separator
@@ -56,6 +111,77 @@ class TimeClockExportQuery(graphene.ObjectType):
             info, "pdf", user_id, start_date, end_date, primary_color=primary_color
         )
 
+    def resolve_export_time_clock_parquet(self, info, user_id=None, start_date=None, end_date=None):
+        return TimeClockExportQuery._generate_export_token(
+            info, "parquet", user_id, start_date, end_date
+        )
+
+    def resolve_export_time_clock_zip(self, info, user_ids, start_date=None, end_date=None, separator=";"):
+        request_user = info.context.user
+        if not request_user or not request_user.is_authenticated:
+            raise GraphQLError("Authentication required")
+
+        unique_ids = sorted({str(uid) for uid in user_ids})
+        if not unique_ids:
+            raise GraphQLError("At least one user is required.")
+        if len(unique_ids) > MAX_ZIP_EXPORT_USERS:
+            raise GraphQLError(f"Too many users, max is {MAX_ZIP_EXPORT_USERS}.")
+
+        cache = request_cache(info)
+        targets = cache.users(unique_ids, lambda ids: CustomUser.objects.filter(pk__in=ids))
+        if len(targets) != len(unique_ids):
+            raise GraphQLError("Requested user does not exist.")
+
+        for target_user in targets:
+            is_self_request = str(request_user.id) == str(target_user.id)
+            if not (is_self_request or _can_export_team(cache, request_user, target_user.team_id)):
+                raise GraphQLError("Not authorized to export time clocks for this user.")
+
+        today = timezone.localdate()
+        s = start_date or today
+        e = end_date or today
+        if s > e:
+            raise GraphQLError("start_date must be <= end_date.")
+
+        payload = {
+            "requester_id": str(request_user.id),
+            "target_user_ids": unique_ids,
+            "start_date": s.strftime(DATE_FMT),
+            "end_date": e.strftime(DATE_FMT),
+            "sep": separator,
+        }
+        b64_payload = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        token = TimestampSigner().sign(b64_payload)
+
+        return TimeClockZIPExport(
+            download_url=f"/api/export/timeclock/zip/{token}/",
+            filename=f'timeclocks_{s.strftime("%Y%m%d")}_{e.strftime("%Y%m%d")}.zip',
+            expires_at=timezone.now() + timedelta(minutes=15),
+        )
+
+    def resolve_export_time_clock_changes(self, info, team_id=None):
+        request_user = info.context.user
+        if not request_user or not request_user.is_authenticated:
+            raise GraphQLError("Authentication required")
+
+        if team_id is None:
+            if not (request_user.is_admin or request_user.is_superuser):
+                raise GraphQLError("Not authorized to export changes for the whole company.")
+        elif not _can_export_team(request_cache(info), request_user, int(team_id)):
+            raise GraphQLError("Not authorized to export changes for this team.")
+
+        payload = {
+            "requester_id": str(request_user.id),
+            "team_id": int(team_id) if team_id is not None else None,
+        }
+        b64_payload = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        token = TimestampSigner().sign(b64_payload)
+
+        return TimeClockChangesExport(
+            download_url=f"/api/export/timeclock/changes/{token}/",
+            expires_at=timezone.now() + timedelta(minutes=15),
+        )
+
     @staticmethod
     def _generate_export_token(info, export_type, user_id, start_date, end_date, separator=";", primary_color=None):
         request_user = info.context.user
@@ -63,19 +189,19 @@ class TimeClockExportQuery(graphene.ObjectType):
             raise GraphQLError("Authentication required")
 
         # cible
+        cache = request_cache(info)
         if user_id is None:
             target_user = request_user
         else:
             try:
-                target_user = CustomUser.objects.get(pk=user_id)
+                target_user = cache.user(user_id, lambda pk: CustomUser.objects.get(pk=pk))
             except CustomUser.DoesNotExist:
                 raise GraphQLError("Requested user does not exist.")
 
         # autorisations: self OU manager OU admin
         target_team_id = getattr(target_user, "team_id", None)
         is_self_request = str(request_user.id) == str(target_user.id)
-        is_admin = request_user.is_admin or request_user.is_superuser
-        if not (is_self_request or is_admin or is_manager_of(request_user, target_team_id)):
+        if not (is_self_request or _can_export_team(cache, request_user, target_team_id)):
             raise GraphQLError("Not authorized to export time clocks for this user.")
 
         # plage de dates (défaut: aujourd'hui..aujourd'hui)
@@ -104,21 +230,14 @@ class TimeClockExportQuery(graphene.ObjectType):
         
         token = signer.sign(b64_payload)
         
-        ext = "csv" if export_type == "csv" else "pdf"
-        filename = f'timeclocks_{target_user.id}_{s.strftime("%Y%m%d")}_{e.strftime("%Y%m%d")}.{ext}'
+        filename = f'timeclocks_{target_user.id}_{s.strftime("%Y%m%d")}_{e.strftime("%Y%m%d")}.{export_type}'
         
         # Build URL based on type
         url_path = f"/api/export/timeclock/{export_type}/{token}/"
 
-        if export_type == "csv":
-            return TimeClockCSVExport(
-                download_url=url_path,
-                filename=filename,
-                expires_at=timezone.now() + timedelta(minutes=15),
-            )
-        else:
-            return TimeClockPDFExport(
-                download_url=url_path,
-                filename=filename,
-                expires_at=timezone.now() + timedelta(minutes=15),
-            )
+        export_cls = EXPORT_TYPES[export_type]
+        return export_cls(
+            download_url=url_path,
+            filename=filename,
+            expires_at=timezone.now() + timedelta(minutes=15),
+        )
@@ -12,7 +12,10 @@ from django.contrib.auth import get_user_model
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
 
+from .replicas import replica_reads
+from .request_cache import request_cache
 from .roles import is_admin, is_manager, is_manager_of, require_auth
+from .scopes import invalidate_scopes, visibility_scope
 
 # Get the user model, here the CustomUser
 User = get_user_model()
@@ -53,11 +56,13 @@ class UserQuery(graphene.ObjectType):
             raise GraphQLError("Not logged in")
         return user
 
+    @replica_reads
     def resolve_users(self, info):
-        return User.objects.all().order_by("id")
+        # Admin: tous; manager: son équipe, lui-même et les utilisateurs sans équipe; sinon: soi
+        return visibility_scope(info).users(User.objects.select_related("team", "team_managed").order_by("id"))
 
     def resolve_user(self, info, id):
-        return User.objects.get(pk=id)
+        return request_cache(info).user(id, lambda pk: User.objects.get(pk=pk))
 
     def resolve_user_by_email(self, info, email):
         requester = info.context.user
@@ -136,6 +141,8 @@ class CreateUser(graphene.Mutation):
         # hash the password
         u.set_password(password)
         u.save()
+        # nouveau membre ou nouvel utilisateur sans équipe: visible par d'autres managers
+        invalidate_scopes()
         return CreateUser(user=u)
 
 
@@ -185,6 +192,7 @@ class UpdateUser(graphene.Mutation):
             if field in data:
                 setattr(u, field, data[field])
 
+        # rôles/équipe éventuellement modifiés: le signal post_save invalide les tokens en cours
         u.save()
         return UpdateUser(user=u)
 
@@ -198,6 +206,7 @@ class DeleteUser(graphene.Mutation):
     @classmethod
     def mutate(cls, root, info, id):
         # .delete() returns a tuple (number of objects deleted, {object_type: number}) since we don't need the second part we use _
+        # signal post_delete: les tokens de l'utilisateur ne sont plus acceptés
         deleted, _ = User.objects.filter(pk=id).delete()
         return DeleteUser(ok=bool(deleted))
 
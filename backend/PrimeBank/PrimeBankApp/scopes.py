@@ -0,0 +1,149 @@
+"""
+Visibility scopes: which teams and users a requester may see, as QuerySet filters.
+
+`is_manager_of(user, team_id)` answers one question at a time; list resolvers
+(`users`, `allRequests`) need "everything this requester may see" instead.
+`VisibilityScope` holds those sets, computed in at most one query:
+
+- admin / superuser: unrestricted, no query;
+- manager: the managed team, its members, the manager and the users without a
+  team (the ones `userByEmail` and `addUserToTeam` let a manager target);
+- other users: themselves only, no query.
+
+Scopes are cached in the process per (requester, role claims) for
+`AUTH_SCOPE_CACHE_TTL` seconds and dropped by `invalidate_scopes`, called by
+`user_cache.invalidate_user` on every team or role change and by `CreateUser`.
+The cache is per process and `invalidate_scopes` only drops the local one: the
+other backend replicas (`stack.yml`) see a team change after at most
+`AUTH_SCOPE_CACHE_TTL` seconds.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from .request_cache import request_cache
+from .roles import is_admin
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 30  # secondes
+
+
+class VisibilityScope:
+    def __init__(self, requester_id=None, unrestricted=False, team_ids=(), member_ids=(), user_ids=()):
+        self.requester_id = requester_id
+        self.unrestricted = unrestricted
+        self.team_ids = frozenset(team_ids)
+        # membres des équipes de `team_ids`
+        self.member_ids = frozenset(member_ids)
+        # utilisateurs visibles: membres, demandeur, utilisateurs sans équipe
+        self.user_ids = frozenset(user_ids)
+
+    @classmethod
+    def for_user(cls, user):
+        if user is None or not getattr(user, "is_authenticated", False):
+            return cls()
+        if is_admin(user):
+            return cls(user.id, unrestricted=True)
+        team_id = getattr(user, "team_managed_id", None)
+        if not team_id:
+            return cls(user.id, user_ids={user.id})
+
+        # Une seule requête: demandeur, membres de l'équipe gérée et utilisateurs sans équipe
+        rows = get_user_model()._default_manager.filter(
+            Q(pk=user.id)
+            | Q(team_id=team_id)
+            | Q(team__isnull=True, is_admin=False, is_superuser=False)
+        ).values_list("id", "team_id")
+        user_ids, member_ids = set(), set()
+        for user_id, member_team_id in rows:
+            user_ids.add(user_id)
+            if member_team_id == team_id:
+                member_ids.add(user_id)
+        user_ids.add(user.id)
+        return cls(user.id, team_ids={team_id}, member_ids=member_ids, user_ids=user_ids)
+
+    def users(self, queryset):
+        """Restreint un QuerySet d'utilisateurs aux utilisateurs visibles."""
+        if self.unrestricted:
+            return queryset
+        return queryset.filter(pk__in=self.user_ids)
+
+    def owned_by_members(self, queryset, user_field="user"):
+        """Restreint des lignes appartenant à un utilisateur (`user_field`) aux membres et au demandeur."""
+        if self.unrestricted:
+            return queryset
+        owners = set(self.member_ids)
+        if self.requester_id is not None:
+            owners.add(self.requester_id)
+        return queryset.filter(**{f"{user_field}_id__in": owners})
+
+
+class ScopeCache:
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._entries = OrderedDict()  # clé -> (expire_à, scope)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return getattr(settings, "AUTH_SCOPE_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE)
+
+    @property
+    def ttl(self):
+        return getattr(settings, "AUTH_SCOPE_CACHE_TTL", DEFAULT_TTL)
+
+    @staticmethod
+    def key(user):
+        # Les claims de rôle font partie de la clé: un token plus récent ne réutilise pas l'ancien scope
+        return (user.id, getattr(user, "team_managed_id", None), is_admin(user))
+
+    def get(self, user):
+        if user is None or not getattr(user, "is_authenticated", False):
+            return VisibilityScope()
+        key = self.key(user)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self.misses += 1
+
+        scope = VisibilityScope.for_user(user)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, scope)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return scope
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+scope_cache = ScopeCache()
+
+
+def invalidate_scopes():
+    # Un changement d'équipe modifie le scope du manager de l'équipe, pas seulement celui de l'utilisateur
+    scope_cache.clear()
+
+
+def visibility_scope(info):
+    """Scope du demandeur, résolu une fois par requête GraphQL."""
+    cache = request_cache(info)
+    return cache.memo(("scope",), lambda: scope_cache.get(cache.requester))
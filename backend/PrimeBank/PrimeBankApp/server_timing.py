@@ -0,0 +1,194 @@
+"""
+Per-request phase timing exposed through the `Server-Timing` response header.
+
+`ServerTimingMiddleware` opens a `RequestTimings` collector for each request
+(stored in a context variable), counts SQL on every database alias, the read
+replica included (`count_queries`), and, for the GraphQL and export views, writes:
+
+    Server-Timing: jwt;dur=0.8, db;dur=12.3;desc="14 queries", render;dur=..., app;dur=..., total;dur=...
+    X-DB-Query-Count: 14
+    X-DB-Time-Ms: 12.3
+
+`app` is what remains once JWT, SQL and rendering are subtracted: for GraphQL,
+mostly graphene execution and serialization. Phases are recorded from anywhere in
+the request with `phase("name")` / `record_phase("name", seconds)`.
+
+A per-operation SQL budget (`settings.QUERY_BUDGETS`) logs a warning when a
+GraphQL operation (keyed by ``operationName``) or an export view (keyed by URL
+name) runs more queries than allowed.
+
+Streamed exports (CSV, ZIP, Parquet, change feed) run their main SELECT and
+their rendering while the body is iterated, after the headers are sent. The
+counter stays attached to the stream: the headers only cover the view itself,
+and the full timings are logged and checked against the budget when the stream
+closes.
+"""
+
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Noms d'URL (urls.py) dont les réponses reçoivent les en-têtes
+TIMED_VIEWS = {
+    "graphql",
+    "export_timeclock_csv",
+    "export_timeclock_zip",
+    "export_timeclock_parquet",
+    "export_timeclock_pdf",
+    "export_timeclock_changes",
+}
+DEFAULT_QUERY_BUDGET = 50
+
+_current = ContextVar("primebank_request_timings", default=None)
+
+
+class QueryCounter:
+    """`connection.execute_wrapper` qui compte les requêtes SQL et leur durée."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class RequestTimings:
+    def __init__(self):
+        self.phases = {}
+        self.queries = QueryCounter()
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+def current_timings():
+    return _current.get()
+
+
+def record_phase(name, seconds):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start)
+
+
+def _operation_key(request, url_name):
+    if url_name != "graphql":
+        return url_name
+    operation = request.GET.get("operationName")
+    if not operation:
+        try:
+            operation = json.loads(request.body or b"{}").get("operationName")
+        except (ValueError, AttributeError):
+            operation = None
+    return f"graphql:{operation or 'anonymous'}"
+
+
+def _query_budget(key):
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    return budgets.get(key, budgets.get("default", DEFAULT_QUERY_BUDGET))
+
+
+def format_server_timing(timings, total):
+    db_seconds = timings.queries.duration
+    parts = []
+    for name, seconds in timings.phases.items():
+        parts.append(f"{name};dur={seconds * 1000:.1f}")
+    parts.append(f'db;dur={db_seconds * 1000:.1f};desc="{timings.queries.count} queries"')
+    app = max(0.0, total - db_seconds - sum(timings.phases.values()))
+    parts.append(f"app;dur={app * 1000:.1f}")
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+@contextmanager
+def count_queries(counter):
+    """`counter` reçoit le SQL de toutes les connexions (primaire et réplica)."""
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(counter))
+        yield counter
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with count_queries(timings.queries):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        url_name = match.url_name if match else None
+        if url_name not in TIMED_VIEWS:
+            return response
+
+        # En-têtes envoyés avant le corps: pour un flux, ils ne couvrent que la vue
+        response["Server-Timing"] = format_server_timing(timings, total)
+        response["X-DB-Query-Count"] = str(timings.queries.count)
+        response["X-DB-Time-Ms"] = f"{timings.queries.duration * 1000:.1f}"
+
+        key = _operation_key(request, url_name)
+        if response.streaming:
+            response.streaming_content = _timed_stream(
+                response.streaming_content, timings, start, lambda total: _report_stream(key, timings, total)
+            )
+        else:
+            _check_budget(key, timings)
+        return response
+
+
+def _timed_stream(chunks, timings, start, on_close):
+    """Garde le collecteur et le compteur SQL actifs pendant l'itération du corps."""
+    token = _current.set(timings)
+    try:
+        with count_queries(timings.queries):
+            yield from chunks
+    finally:
+        _current.reset(token)
+        on_close(time.perf_counter() - start)
+
+
+def _report_stream(key, timings, total):
+    logger.info("Server-Timing for streamed %s: %s", key, format_server_timing(timings, total))
+    _check_budget(key, timings)
+
+
+def _check_budget(key, timings):
+    budget = _query_budget(key)
+    if timings.queries.count > budget:
+        logger.warning(
+            "SQL budget exceeded for %s: %d queries (budget %d), %.1f ms in DB",
+            key,
+            timings.queries.count,
+            budget,
+            timings.queries.duration * 1000,
+        )
@@ -0,0 +1,163 @@
+"""
+Deterministic synthetic dataset: teams, managers, members, time clocks and
+change requests.
+
+Used by the query-count regression tests to run every resolver at two data
+sizes, and by the `seed_synthetic_data` command to fill a database at
+production scale. Everything is written with `bulk_create` in batches (time
+clocks are generated and flushed user by user, never held all in memory) and
+all users share a single password hash.
+
+Each user gets a profile: a weekly contract, day or night shifts, a usual
+arrival time. Presence follows the contract on weekdays, with the odd weekend
+day; night shifts end the next morning (clock_out < clock_in).
+"""
+
+import random
+from collections import namedtuple
+from datetime import time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import CustomUser, RequestModifyTimeClock, Team, TimeClock
+
+DEFAULT_PASSWORD = "PrimeBank-synthetic-1"
+SYNTHETIC_EMAIL_DOMAIN = "primebank.test"
+BATCH_SIZE = 5_000
+
+HOUR_CONTRACTS = (20, 24, 28, 35, 35, 35, 39)
+FULL_TIME_HOURS = 35
+NIGHT_WORKER_RATE = 0.05
+WEEKEND_WORK_RATE = 0.03
+# Part des jours ouvrés travaillés par un temps plein (congés, maladie)
+FULL_TIME_PRESENCE = 0.92
+
+Dataset = namedtuple("Dataset", ["admin", "teams", "managers", "members", "password"])
+Profile = namedtuple("Profile", ["presence", "arrival_minutes", "shift_minutes", "night"])
+
+
+def _profile(rng, hour_contract):
+    night = rng.random() < NIGHT_WORKER_RATE
+    days_per_week = 5 if hour_contract >= 24 else 3
+    return Profile(
+        presence=FULL_TIME_PRESENCE * min(1.0, days_per_week / 5),
+        arrival_minutes=rng.gauss(21.5 * 60, 30) if night else rng.gauss(8.75 * 60, 35),
+        shift_minutes=hour_contract * 60 / days_per_week,
+        night=night,
+    )
+
+
+def _minutes_to_time(minutes):
+    minutes = int(minutes) % (24 * 60)
+    return time(minutes // 60, minutes % 60)
+
+
+def _shift(rng, profile, day):
+    """(clock_in, clock_out) d'une journée travaillée, ou None si absent."""
+    weekend = day.weekday() >= 5
+    if rng.random() > (WEEKEND_WORK_RATE if weekend else profile.presence):
+        return None
+    start = profile.arrival_minutes + rng.gauss(0, 15)
+    # pause déjeuner incluse pour les horaires de jour
+    length = profile.shift_minutes + rng.gauss(0, 25) + (0 if profile.night else 45)
+    return _minutes_to_time(start), _minutes_to_time(start + max(60, length))
+
+
+def _flush(model, objs, batch_size):
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    count = len(objs)
+    objs.clear()
+    return count
+
+
+def seed_dataset(
+    members_per_team=5,
+    teams=2,
+    days=14,
+    requests_per_member=1,
+    seed=0,
+    today=None,
+    password=DEFAULT_PASSWORD,
+    batch_size=BATCH_SIZE,
+    progress=None,
+):
+    """
+    Crée `teams` équipes avec chacune un manager et `members_per_team` membres,
+    un admin sans équipe, `days` jours de pointages jusqu'à `today` (pointage du
+    jour encore ouvert) et `requests_per_member` demandes de modification par membre.
+
+    Peut être appelé plusieurs fois sur la même base: emails et téléphones
+    sont dérivés du plus grand id existant. `progress(label, count)` est appelé
+    après chaque lot écrit.
+    """
+    rng = random.Random(seed)
+    today = today or timezone.localdate()
+    password_hash = make_password(password)
+    offset = (CustomUser.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+    progress = progress or (lambda label, count: None)
+
+    def make_user(index, first_name, **fields):
+        number = offset + index
+        fields.setdefault("hour_contract", rng.choice(HOUR_CONTRACTS))
+        return CustomUser(
+            email=f"user{number}@{SYNTHETIC_EMAIL_DOMAIN}",
+            phone_number=f"+33{number:09d}",
+            first_name=first_name,
+            last_name=f"Synthetic{number}",
+            password=password_hash,
+            **fields,
+        )
+
+    team_objs = Team.objects.bulk_create(
+        [Team(description=f"Synthetic team {offset + i}") for i in range(teams)],
+        batch_size=batch_size,
+    )
+    progress("teams", len(team_objs))
+
+    users = [make_user(0, "Admin", is_admin=True, hour_contract=FULL_TIME_HOURS)]
+    for t, team in enumerate(team_objs):
+        base = 1 + t * (members_per_team + 1)
+        users.append(make_user(base, "Manager", team=team, team_managed=team, hour_contract=39))
+        users.extend(
+            make_user(base + 1 + m, "Member", team=team) for m in range(members_per_team)
+        )
+    users = CustomUser.objects.bulk_create(users, batch_size=batch_size)
+    progress("users", len(users))
+    admin, staff = users[0], users[1:]
+    managers = [user for user in staff if user.team_managed_id]
+    members = [user for user in staff if not user.team_managed_id]
+
+    clocks, requests = [], []
+    for user in staff:
+        profile = _profile(rng, user.hour_contract)
+        wanted_requests = 0 if user.team_managed_id else requests_per_member
+        for offset_days in range(days):
+            day = today - timedelta(days=offset_days)
+            shift = _shift(rng, profile, day)
+            if shift is None:
+                continue
+            clock_in, clock_out = shift
+            if day == today:
+                clock_out = None
+            clocks.append(TimeClock(user=user, day=day, clock_in=clock_in, clock_out=clock_out))
+            if clock_out is not None and wanted_requests:
+                wanted_requests -= 1
+                requests.append(RequestModifyTimeClock(
+                    user=user,
+                    day=day,
+                    description="Oubli de badge",
+                    old_clock_in=clock_in,
+                    old_clock_out=clock_out,
+                    new_clock_in=time(8, 0),
+                    new_clock_out=time(17, 0),
+                ))
+        if len(clocks) >= batch_size:
+            progress("time clocks", _flush(TimeClock, clocks, batch_size))
+        if len(requests) >= batch_size:
+            progress("change requests", _flush(RequestModifyTimeClock, requests, batch_size))
+    progress("time clocks", _flush(TimeClock, clocks, batch_size))
+    progress("change requests", _flush(RequestModifyTimeClock, requests, batch_size))
+
+    return Dataset(admin, team_objs, managers, members, password)
@@ -0,0 +1,119 @@
+"""
+Team report generation: one PDF (`pdf_report.html`) per team member, packaged in a ZIP.
+
+Rows for every member are fetched in a single query, then each member's report
+is rendered (Jinja2 + WeasyPrint) in a `ProcessPoolExecutor` so the CPU-bound
+WeasyPrint layout scales with the number of cores.
+"""
+
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import groupby
+
+import weasyprint
+from django.db import connections
+
+from .kpi_functions.kpi_functions import _collect_team_members
+from .models import TimeClock
+from .timeclock_archive import read_through
+from .views_timeclock_pdf_export import (
+    _build_entries,
+    _build_report_context,
+    _render_report_html,
+    _report_filename,
+)
+
+
+def default_worker_count():
+    return os.cpu_count() or 1
+
+
+def build_member_jobs(team, start, end, logo_data_uri="", primary_color=None):
+    """
+    Prépare un job picklable par membre de l'équipe (manager inclus).
+    Tous les pointages de l'équipe sont lus en une seule requête.
+    """
+    members = _collect_team_members(team)
+    member_ids = [member.id for member in members]
+    rows = (
+        TimeClock.objects.filter(user_id__in=member_ids, day__range=(start, end))
+        .order_by("user_id", "day", "clock_in")
+        .only("user_id", "day", "clock_in", "clock_out", "duration_seconds")
+    )
+    rows_by_user = {
+        user_id: list(user_rows)
+        # mois archivés compris
+        for user_id, user_rows in groupby(read_through(rows, member_ids, start, end), key=lambda tc: tc.user_id)
+    }
+
+    jobs = []
+    for member in members:
+        entries, total_seconds, num_days = _build_entries(rows_by_user.get(member.id, ()))
+        user = {
+            "id": member.id,
+            "first_name": member.first_name,
+            "last_name": member.last_name,
+            "email": member.email,
+            "hour_contract": member.hour_contract,
+        }
+        context = _build_report_context(
+            user, start, end, entries, total_seconds, num_days, logo_data_uri=logo_data_uri
+        )
+        if primary_color:
+            context["primary_color"] = primary_color
+        jobs.append({"filename": _report_filename(member.id, start), "context": context})
+    return jobs
+
+
+def _pool_context():
+    # fork: les workers héritent de Django déjà initialisé (apps, settings)
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def render_member_report(job):
+    """Rend le PDF d'un membre. Exécuté dans un processus du pool."""
+    html_string = _render_report_html(job["context"])
+    return job["filename"], weasyprint.HTML(string=html_string).write_pdf()
+
+
+def render_jobs(jobs, workers=None, progress=None):
+    """
+    Rend les jobs et renvoie les PDF au fur et à mesure: (filename, pdf_bytes).
+    `workers=1` rend dans le processus courant (pas de pool).
+    `progress(done, total, filename)` est appelé après chaque rapport.
+    """
+    total = len(jobs)
+    workers = workers or default_worker_count()
+
+    if workers == 1:
+        for done, job in enumerate(jobs, start=1):
+            filename, pdf = render_member_report(job)
+            if progress:
+                progress(done, total, filename)
+            yield filename, pdf
+        return
+
+    # Les workers ne touchent pas la base: on ne partage pas les sockets ouvertes
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=min(workers, total or 1), mp_context=_pool_context()) as pool:
+        futures = [pool.submit(render_member_report, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            filename, pdf = future.result()
+            if progress:
+                progress(done, total, filename)
+            yield filename, pdf
+
+
+def write_team_report_zip(jobs, fileobj, workers=None, progress=None):
+    """Écrit l'archive ZIP des rapports dans `fileobj`. Retourne le nombre de PDF."""
+    count = 0
+    # Les PDF sont déjà compressés: on les stocke tels quels
+    with zipfile.ZipFile(fileobj, mode="w", compression=zipfile.ZIP_STORED) as zf:
+        for filename, pdf in render_jobs(jobs, workers=workers, progress=progress):
+            zf.writestr(filename, pdf)
+            count += 1
+    return count
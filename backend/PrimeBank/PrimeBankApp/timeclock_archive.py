@@ -0,0 +1,253 @@
+"""
+Cold archive of old TimeClock rows, with transparent read-through.
+
+Rows older than `TIMECLOCK_ARCHIVE_AFTER_DAYS` (two years) are only read by
+occasional exports, but they bloat the hot table and its indexes. The
+`archive_timeclocks` command moves each month before the cutoff into one
+`TimeClockArchive` row, as zlib-compressed JSON. The move happens in one
+transaction per month. It records no `ClockEvent`, because the rows still exist
+for consumers of the change feed.
+
+Archived days are read-only. A month that still has pending change requests
+(`RequestModifyTimeClock`) is left in the hot table until they are resolved,
+and the clock mutations answer `missing_entry_error` ("... is archived") when
+they target a day before the cutoff whose row is gone.
+
+Every reader of a date range that may start before the cutoff goes through
+`read_through` or `archived_entries`: the CSV, ZIP, Parquet and PDF exports,
+the team and annual reports, and the KPIs (`schema_kpi`). Those merge the
+archived rows of the range with the hot ones. Ranges after the cutoff cost no
+extra query. Decompressed months stay in a process-local LRU (`archive_cache`),
+bounded by `TIMECLOCK_ARCHIVE_CACHE_MONTHS`. A month is keyed by its
+`updated_at`, so re-archiving it is picked up by every process without
+invalidation.
+"""
+
+import heapq
+import json
+import threading
+import zlib
+from collections import OrderedDict, defaultdict, namedtuple
+from datetime import date, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .clock_events import suppress_deletion_events
+from .models import RequestModifyTimeClock, TimeClock, TimeClockArchive, timeclock_duration_seconds
+from .partitions import add_months, month_start
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 730
+DEFAULT_CACHE_MONTHS = 24
+COMPRESSION_LEVEL = 9
+DELETE_CHUNK_SIZE = 1000
+
+# Même attributs que TimeClock pour les lecteurs (_csv_rows, _aggregate_timeclock_entries)
+ArchivedTimeClock = namedtuple(
+    "ArchivedTimeClock", ["id", "user_id", "day", "clock_in", "clock_out", "duration_seconds"]
+)
+
+
+def archive_cutoff(today=None):
+    """Premier jour non archivé: début du mois qui contient aujourd'hui - TIMECLOCK_ARCHIVE_AFTER_DAYS."""
+    days = getattr(settings, "TIMECLOCK_ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS)
+    return month_start((today or timezone.localdate()) - timedelta(days=days))
+
+
+def missing_entry_error(user_id, day, today=None):
+    """Message d'erreur des mutations quand TimeClock n'a pas de pointage pour (`user_id`, `day`)."""
+    cutoff = archive_cutoff(today)
+    if day < cutoff:
+        return f"{day} is archived: clock entries before {cutoff} can no longer be changed."
+    return f"No TimeClock entry for user {user_id} on {day}."
+
+
+def pending_request_months(cutoff):
+    """Mois avant `cutoff` qui ont encore des demandes de modification en attente."""
+    return set(RequestModifyTimeClock.objects.filter(day__lt=cutoff).dates("day", "month"))
+
+
+def _encode(entries):
+    rows = [
+        [
+            e.id,
+            e.user_id,
+            e.day.isoformat(),
+            e.clock_in.isoformat() if e.clock_in else None,
+            e.clock_out.isoformat() if e.clock_out else None,
+        ]
+        for e in entries
+    ]
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), COMPRESSION_LEVEL)
+
+
+def _decode(payload):
+    if not payload:
+        return []
+    entries = []
+    for pk, user_id, day, clock_in, clock_out in json.loads(zlib.decompress(payload)):
+        day = date.fromisoformat(day)
+        clock_in = time.fromisoformat(clock_in) if clock_in else None
+        clock_out = time.fromisoformat(clock_out) if clock_out else None
+        # durée non stockée dans l'archive: recalculée une fois par mois décompressé
+        duration = timeclock_duration_seconds(day, clock_in, clock_out)
+        entries.append(ArchivedTimeClock(pk, user_id, day, clock_in, clock_out, duration))
+    return entries
+
+
+def _sort_key(entry):
+    # clock_in NULL en dernier, comme ORDER BY clock_in sur PostgreSQL
+    return (entry.user_id, entry.day, entry.clock_in is None, entry.clock_in or time.min)
+
+
+class ArchiveCache:
+    """LRU des mois archivés décompressés: (mois, updated_at) -> {user_id: [ArchivedTimeClock]}."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return getattr(settings, "TIMECLOCK_ARCHIVE_CACHE_MONTHS", DEFAULT_CACHE_MONTHS)
+
+    def months(self, keys):
+        """Lignes par utilisateur de chaque mois de `keys`; les mois absents du cache sont lus en une requête."""
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key[0]] = self._entries[key]
+                    self.hits += 1
+                else:
+                    missing.append(key[0])
+                    self.misses += 1
+        if not missing:
+            return found
+
+        loaded = TimeClockArchive.objects.filter(month__in=missing).values_list("month", "updated_at", "payload")
+        for month, updated_at, payload in loaded:
+            by_user = defaultdict(list)
+            for entry in sorted(_decode(payload), key=_sort_key):
+                by_user[entry.user_id].append(entry)
+            found[month] = dict(by_user)
+            with self._lock:
+                self._entries[(month, updated_at)] = found[month]
+                self._entries.move_to_end((month, updated_at))
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+archive_cache = ArchiveCache()
+
+
+def archived_entries(user_ids, start, end, today=None):
+    """
+    Pointages archivés de `user_ids` (tous les utilisateurs si None) entre `start`
+    et `end` inclus, triés par (user_id, day, clock_in). Aucune requête si `start`
+    est après la date limite.
+    """
+    if start >= archive_cutoff(today):
+        return []
+    keys = list(
+        TimeClockArchive.objects.filter(month__gte=month_start(start), month__lte=end)
+        .order_by("month")
+        .values_list("month", "updated_at")
+    )
+    if not keys:
+        return []
+    months = archive_cache.months(keys)
+    if user_ids is None:
+        entries = [
+            entry
+            for by_user in months.values()
+            for user_entries in by_user.values()
+            for entry in user_entries
+            if start <= entry.day <= end
+        ]
+    else:
+        wanted = {int(user_id) for user_id in user_ids}
+        entries = [
+            entry
+            for by_user in months.values()
+            for user_id in wanted
+            for entry in by_user.get(user_id, ())
+            if start <= entry.day <= end
+        ]
+    entries.sort(key=_sort_key)
+    return entries
+
+
+def read_through(queryset, user_ids, start, end, today=None, chunk_size=None, archived=None):
+    """
+    Itère sur `queryset` (pointages de `user_ids` entre `start` et `end`, triés par
+    user_id, day, clock_in) complété des pointages archivés de la même plage.
+
+    `queryset` renvoie des objets à attributs: modèles, ou `values_list(..., named=True)`.
+    `archived`: résultat de `archived_entries` déjà lu par l'appelant.
+    """
+    if archived is None:
+        archived = archived_entries(user_ids, start, end, today)
+    rows = queryset.iterator() if chunk_size is None else queryset.iterator(chunk_size=chunk_size)
+    if not archived:
+        return rows
+    return heapq.merge(archived, rows, key=_sort_key)
+
+
+def _archive_month(month):
+    next_month = add_months(month, 1)
+    with transaction.atomic(), suppress_deletion_events():
+        hot = list(
+            TimeClock.objects.select_for_update()
+            .filter(day__gte=month, day__lt=next_month)
+            .order_by()
+            .values_list("id", "user_id", "day", "clock_in", "clock_out", "duration_seconds")
+        )
+        if not hot:
+            return 0
+        # Relu sous verrou: une demande créée depuis la sélection des mois garde le mois en place
+        if RequestModifyTimeClock.objects.filter(day__gte=month, day__lt=next_month).exists():
+            return None
+        archive, _ = TimeClockArchive.objects.select_for_update().get_or_create(month=month)
+        # Lignes déjà archivées + nouvelles (pointages modifiés après un premier archivage)
+        moved_ids = {row[0] for row in hot}
+        entries = [e for e in _decode(archive.payload) if e.id not in moved_ids]
+        entries.extend(ArchivedTimeClock(*row) for row in hot)
+        entries.sort(key=_sort_key)
+
+        archive.payload = _encode(entries)
+        archive.row_count = len(entries)
+        archive.save()
+        ids = sorted(moved_ids)
+        for i in range(0, len(ids), DELETE_CHUNK_SIZE):
+            TimeClock.objects.filter(pk__in=ids[i:i + DELETE_CHUNK_SIZE]).delete()
+        return len(hot)
+
+
+def archive_timeclocks(today=None):
+    """
+    Déplace les pointages antérieurs à `archive_cutoff(today)` dans TimeClockArchive,
+    une transaction par mois. Les mois qui ont des demandes en attente sont ignorés
+    (archivés à un passage suivant). Renvoie {mois: nombre de lignes déplacées}.
+    """
+    cutoff = archive_cutoff(today)
+    pending = pending_request_months(cutoff)
+    moved = {}
+    for month in TimeClock.objects.filter(day__lt=cutoff).dates("day", "month"):
+        count = None if month in pending else _archive_month(month)
+        if count is not None:
+            moved[month] = count
+    return moved
@@ -0,0 +1,58 @@
+"""
+Retention of persisted refresh tokens (`JWT_LONG_RUNNING_REFRESH_TOKEN`).
+
+Every `tokenAuth` and `refreshToken` inserts a `RefreshToken` row and graphql_jwt
+never deletes them. `purge_refresh_tokens` removes expired rows (created more than
+`JWT_REFRESH_EXPIRATION_DELTA` ago) and revoked rows, one batch of primary keys
+at a time: each batch is its own short transaction, so logins and refreshes are
+never blocked for long. The `created` and partial `revoked` indexes
+(migration 0011) keep the batch selection off a sequential scan.
+"""
+
+import time
+
+from django.db import transaction
+from django.utils import timezone
+from graphql_jwt.refresh_token.utils import get_refresh_token_model
+from graphql_jwt.settings import jwt_settings
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def purgeable_querysets(now=None):
+    """(libellé, queryset) des tokens à supprimer, un critère indexé par queryset."""
+    RefreshToken = get_refresh_token_model()
+    cutoff = (now or timezone.now()) - jwt_settings.JWT_REFRESH_EXPIRATION_DELTA
+    return [
+        ("expired", RefreshToken.objects.filter(created__lt=cutoff)),
+        ("revoked", RefreshToken.objects.filter(revoked__isnull=False)),
+    ]
+
+
+def delete_batch(queryset, batch_size):
+    with transaction.atomic():
+        # skip_locked: un token en cours d'utilisation est laissé au passage suivant
+        ids = list(
+            queryset.select_for_update(skip_locked=True).order_by().values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0, 0
+        deleted, _ = queryset.model.objects.filter(pk__in=ids).delete()
+    return len(ids), deleted
+
+
+def purge_refresh_tokens(batch_size=DEFAULT_BATCH_SIZE, pause=0.0, now=None, progress=None):
+    """Supprime les refresh tokens expirés ou révoqués; renvoie {libellé: nombre supprimé}."""
+    totals = {}
+    for label, queryset in purgeable_querysets(now):
+        totals[label] = 0
+        while True:
+            selected, deleted = delete_batch(queryset, batch_size)
+            totals[label] += deleted
+            if deleted and progress:
+                progress(label, deleted)
+            if selected < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    return totals
@@ -0,0 +1,185 @@
+"""
+In-process cache of authenticated users (LRU, bounded size, short TTL).
+
+`backends.JSONWebTokenBackend` builds the request user from the verified JWT
+claims (`models.TokenUser`) without touching the database; fields that are not in
+the token (password, last_login, date_joined...) are read from this cache the
+first time they are accessed.
+
+Mutations that change a user's role (`UpdateUser`, `AddUserToTeam`,
+`SetTeamManager`, `DeleteUser`) call `invalidate_user`, and so does every other
+save or deletion of a user that may change its claims (admin site, shell),
+through the `CustomUser` signals wired in `apps.py`. The cached row is dropped
+and a `RoleChange` row is written: tokens issued before the change stop being
+trusted for their claims (the backend falls back to a database lookup) until
+they expire. The visibility scopes (`scopes.py`) are dropped at the same time.
+
+Cached rows live in the process, but role changes are shared: each process
+re-reads the `RoleChange` rows of the last `JWT_EXPIRATION_DELTA` at most every
+`AUTH_ROLE_CHANGE_POLL_INTERVAL` seconds, so a demotion, deactivation or
+deletion on one backend replica reaches the others within that interval.
+`QuerySet.update()` on users sends no signal: call `invalidate_user` after it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from graphql_jwt.settings import jwt_settings
+
+from .scopes import invalidate_scopes
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 30  # secondes
+DEFAULT_ROLE_CHANGE_POLL_INTERVAL = 1.0  # secondes
+
+
+class UserCache:
+    """
+    `shared=False` garde les marques de changement de rôle dans le processus
+    (tests unitaires sans base).
+    """
+
+    def __init__(self, clock=time.monotonic, wall_clock=time.time, shared=True):
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._shared = shared
+        self._entries = OrderedDict()  # user_id -> (expire_à, user)
+        self._role_changes = {}  # user_id -> horodatage (epoch) du dernier changement
+        self._synced_at = None  # self._clock() de la dernière lecture de RoleChange
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return getattr(settings, "AUTH_USER_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE)
+
+    @property
+    def ttl(self):
+        return getattr(settings, "AUTH_USER_CACHE_TTL", DEFAULT_TTL)
+
+    @property
+    def poll_interval(self):
+        return getattr(settings, "AUTH_ROLE_CHANGE_POLL_INTERVAL", DEFAULT_ROLE_CHANGE_POLL_INTERVAL)
+
+    def _horizon(self, now):
+        # Les tokens émis avant `horizon` ont expiré: leurs marques sont inutiles
+        return now - jwt_settings.JWT_EXPIRATION_DELTA.total_seconds()
+
+    def get(self, user_id):
+        """Utilisateur complet (ou None s'il n'existe plus), lu en base au plus une fois par TTL."""
+        user_id = int(user_id)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(user_id, None)
+            self.misses += 1
+
+        user = get_user_model()._default_manager.filter(pk=user_id).first()
+        if user is not None:
+            with self._lock:
+                self._entries[user_id] = (now + self.ttl, user)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, *user_ids):
+        """Oublie ces utilisateurs et marque leurs rôles comme modifiés maintenant, pour tous les processus."""
+        changed_at = self._wall_clock()
+        horizon = self._horizon(changed_at)
+        user_ids = {int(user_id) for user_id in user_ids if user_id is not None}
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+                self._role_changes[user_id] = changed_at
+            for user_id, at in list(self._role_changes.items()):
+                if at < horizon:
+                    del self._role_changes[user_id]
+        if self._shared and user_ids:
+            from .models import RoleChange
+
+            at = datetime.fromtimestamp(changed_at, tz=timezone.utc)
+            RoleChange.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+                RoleChange(user_id=user_id, changed_at=at) for user_id in sorted(user_ids)
+            )
+            RoleChange.objects.using(DEFAULT_DB_ALIAS).filter(
+                changed_at__lt=datetime.fromtimestamp(horizon, tz=timezone.utc)
+            ).delete()
+
+    def _sync_role_changes(self):
+        """Relit les marques des autres processus, au plus une fois par `poll_interval`."""
+        interval = self.poll_interval
+        if interval is None:
+            return  # processus unique (settings_test)
+        now = self._clock()
+        with self._lock:
+            if self._synced_at is not None and now - self._synced_at < interval:
+                return
+            # un seul thread relit; les autres gardent les marques actuelles en attendant
+            self._synced_at = now
+
+        from .models import RoleChange
+
+        horizon = self._horizon(self._wall_clock())
+        # Toujours sur le primaire: un réplica en retard ferait manquer une révocation
+        rows = RoleChange.objects.using(DEFAULT_DB_ALIAS).filter(
+            changed_at__gte=datetime.fromtimestamp(horizon, tz=timezone.utc)
+        ).values_list("user_id", "changed_at")
+        with self._lock:
+            for user_id, at in rows:
+                at = at.timestamp()
+                if at > self._role_changes.get(user_id, horizon):
+                    self._role_changes[user_id] = at
+            for user_id, at in list(self._role_changes.items()):
+                if at < horizon:
+                    del self._role_changes[user_id]
+
+    def roles_changed_since(self, user_id, issued_at):
+        """Vrai si les rôles de l'utilisateur ont changé après l'émission du token (à la seconde près)."""
+        if self._shared:
+            self._sync_role_changes()
+        with self._lock:
+            changed_at = self._role_changes.get(int(user_id))
+        return changed_at is not None and changed_at >= issued_at
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._role_changes.clear()
+            self._synced_at = None
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+user_cache = UserCache()
+
+
+def invalidate_user(*user_ids):
+    user_cache.invalidate(*user_ids)
+    invalidate_scopes()
+
+
+def invalidate_saved_user(sender, instance, created=False, update_fields=None, **kwargs):
+    """Signaux post_save/post_delete de CustomUser (apps.py): tout changement de claims invalide le token."""
+    from .models import TokenUser
+
+    if created:
+        return
+    # update_fields peut nommer "team" ou sa colonne "team_id"
+    claim_fields = set(TokenUser.CLAIM_FIELDS) | {name.removesuffix("_id") for name in TokenUser.CLAIM_FIELDS}
+    if update_fields is not None and not claim_fields & set(update_fields):
+        return  # ex. last_login à la connexion
+    invalidate_user(instance.pk)
@@ -0,0 +1,27 @@
+# PrimeBankApp/views_metrics.py
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .metrics import REGISTRY
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics(request):
+    """
+    GET /metrics
+    Métriques au format d'exposition Prometheus.
+    Exige `Authorization: Bearer <METRICS_TOKEN>`; refusé tant que METRICS_TOKEN n'est pas défini.
+    """
+    expected = getattr(settings, "METRICS_TOKEN", None)
+    if not expected:
+        return HttpResponseForbidden("Metrics disabled: METRICS_TOKEN is not set")
+    auth = request.META.get("HTTP_AUTHORIZATION", "")
+    provided = auth[len("Bearer "):] if auth.startswith("Bearer ") else ""
+    if not hmac.compare_digest(provided.encode(), expected.encode()):
+        return HttpResponseForbidden("Forbidden")
+
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,44 @@
+# PrimeBankApp/views_profiles.py
+
+import os
+
+from django.http import FileResponse, Http404, HttpResponseForbidden, JsonResponse
+
+from .profiling import PROFILE_NAME_RE, _request_admin, profile_dir
+
+
+def list_profiles(request):
+    """
+    GET /api/profiles/
+    - admin uniquement (JWT cookie ou header)
+    - réponse: profils disponibles, du plus récent au plus ancien
+    """
+    if _request_admin(request) is None:
+        return HttpResponseForbidden("Unauthorized")
+
+    directory = profile_dir()
+    profiles = []
+    if os.path.isdir(directory):
+        for entry in os.scandir(directory):
+            if entry.is_file() and PROFILE_NAME_RE.match(entry.name):
+                stat = entry.stat()
+                profiles.append({"name": entry.name, "size": stat.st_size, "mtime": stat.st_mtime})
+    profiles.sort(key=lambda profile: profile["mtime"], reverse=True)
+    return JsonResponse({"profiles": profiles})
+
+
+def download_profile(request, name: str):
+    """
+    GET /api/profiles/<name>/
+    - admin uniquement
+    - réponse: fichier collapsed stacks (flamegraph.pl, speedscope)
+    """
+    if _request_admin(request) is None:
+        return HttpResponseForbidden("Unauthorized")
+    if not PROFILE_NAME_RE.match(name):
+        raise Http404("Profile not found")
+
+    path = os.path.join(profile_dir(), name)
+    if not os.path.isfile(path):
+        raise Http404("Profile not found")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=name, content_type="text/plain")
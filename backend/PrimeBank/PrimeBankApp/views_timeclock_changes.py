@@ -0,0 +1,105 @@
+# PrimeBankApp/views_timeclock_changes.py
+"""
+Change-data-capture feed of TimeClock rows, for payroll synchronisation.
+
+GET /api/export/timeclock/changes/<token>/?after=<seq>&limit=<n> streams, as
+NDJSON, the `ClockEvent` rows after the cursor `after`: one line per insert,
+update or delete of a TimeClock row, in `seq` order. The `X-Next-Cursor` header
+gives the `after` to send next time, and `X-Has-More` tells whether another page
+is already waiting. A nightly sync therefore only reads the day's changes, via
+the primary key (whole company) or `clockevent_team_seq_idx` (one team).
+
+A team feed holds the events recorded while the user was in the team
+(`ClockEvent.team_id`), including those of members who left or were deleted
+since. Events commit in `seq` order (`clock_events.py`), so a cursor never
+skips an event that was still in flight when the page was read.
+"""
+
+import json
+
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+
+from PrimeBankApp.roles import is_admin, is_manager_of
+from .clock_events import OPERATIONS
+from .metrics import observe_stream
+from .models import ClockEvent
+from .replicas import replica_view
+from .views_timeclock_export import _accepts_gzip, _authenticate_export, _gzip_stream
+
+DEFAULT_CHANGES_LIMIT = 10_000
+MAX_CHANGES_LIMIT = 100_000
+
+
+def _change_line(event):
+    return json.dumps({
+        "seq": event.seq,
+        "op": OPERATIONS[event.kind],
+        "kind": event.kind,
+        "id": event.timeclock_id,
+        "user_id": event.user_id,
+        "day": event.day.isoformat(),
+        "clock_in": event.clock_in.strftime("%H:%M:%S") if event.clock_in else None,
+        "clock_out": event.clock_out.strftime("%H:%M:%S") if event.clock_out else None,
+        "changed_at": event.created_at.isoformat(),
+    }) + "\n"
+
+
+def _int_param(request, name, default, minimum, maximum=None):
+    raw = request.GET.get(name)
+    if raw is None:
+        return default
+    value = int(raw)  # ValueError -> 400 dans la vue
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ValueError(name)
+    return value
+
+
+@replica_view
+def export_timeclock_changes(request, token: str):
+    """
+    GET /api/export/timeclock/changes/<token>/?after=<seq>&limit=<n>
+    - auth: session OU JWT + token signé (comme les autres exports)
+    - contrôle: admin (toute l'entreprise ou une équipe) OU manager de l'équipe du token
+    - réponse: NDJSON en streaming (gzip si Accept-Encoding le permet)
+    """
+    data, error = _authenticate_export(request, token)
+    if error:
+        return error
+
+    team_id = data.get("team_id")
+    user = request.user
+    if team_id is None:
+        if not is_admin(user):
+            return HttpResponseForbidden("Not allowed")
+    elif not (is_admin(user) or is_manager_of(user, int(team_id))):
+        return HttpResponseForbidden("Not allowed")
+
+    try:
+        after = _int_param(request, "after", 0, 0)
+        limit = _int_param(request, "limit", DEFAULT_CHANGES_LIMIT, 1, MAX_CHANGES_LIMIT)
+    except ValueError:
+        return HttpResponseBadRequest(f"after must be >= 0 and limit between 1 and {MAX_CHANGES_LIMIT}")
+
+    events = ClockEvent.objects.filter(seq__gt=after).order_by("seq")
+    if team_id is not None:
+        events = events.filter(team_id=int(team_id))
+
+    # Bornes de la page connues avant de streamer: elles vont dans les en-têtes
+    last = events.values_list("seq", flat=True)[limit - 1:limit].first()
+    if last is None:
+        last = events.order_by("-seq").values_list("seq", flat=True).first()
+        has_more = False
+    else:
+        has_more = events.filter(seq__gt=last).exists()
+    page = events.filter(seq__lte=last) if last is not None else events.none()
+
+    lines = (_change_line(event) for event in page.iterator())
+    if _accepts_gzip(request):
+        resp = StreamingHttpResponse(observe_stream(_gzip_stream(lines), "ndjson.gz"), content_type="application/x-ndjson")
+        resp["Content-Encoding"] = "gzip"
+    else:
+        resp = StreamingHttpResponse(observe_stream(lines, "ndjson"), content_type="application/x-ndjson")
+    resp["Vary"] = "Accept-Encoding"
+    resp["X-Next-Cursor"] = str(last if last is not None else after)
+    resp["X-Has-More"] = "true" if has_more else "false"
+    return resp
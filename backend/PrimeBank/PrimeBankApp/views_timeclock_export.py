@@ -3,17 +3,32 @@
 import csv
 import json
 import base64
-from datetime import datetime, timedelta, date
+import zipfile
+import zlib
+from collections import namedtuple
+from datetime import date
+from itertools import groupby
 
 from django.http import StreamingHttpResponse, HttpResponseForbidden, HttpResponseBadRequest
 from django.core.signing import TimestampSigner, BadSignature
 from django.conf import settings
 
 from graphql_jwt.utils import get_payload
-from graphql_jwt.shortcuts import get_user_by_payload
 
 from PrimeBankApp.roles import is_manager_of
+from .backends import get_user_by_claims
+from .metrics import observe_stream
 from .models import CustomUser, TimeClock
+from .replicas import replica_view
+from .server_timing import phase
+from .timeclock_archive import read_through
+
+
+# Nombre maximal d'utilisateurs dans une archive ZIP multi-export
+MAX_ZIP_EXPORT_USERS = 200
+GZIP_LEVEL = 6
+ExportRequest = namedtuple("ExportRequest", ["data", "target", "start", "end"])
+CSV_HEADER = ["id", "user_id", "day", "clock_in", "clock_out", "total_seconds", "total_hours"]
 
 
 class Echo:
@@ -21,6 +36,38 @@ class Echo:
         return v
 
 
+class _StreamSink:
+    """
+    Fichier en écriture seule: accumule les octets écrits (par zipfile ou
+    pyarrow) pour que le générateur de la réponse puisse les vider au fil de l'eau.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
 def _authenticate_request_with_jwt(request):
     """
     Essaie d'authentifier la requête via:
@@ -42,85 +89,201 @@ def _authenticate_request_with_jwt(request):
         return None
 
     try:
-        payload = get_payload(token, context=None)
-        user = get_user_by_payload(payload)
+        with phase("jwt"):
+            payload = get_payload(token, context=None)
+            user = get_user_by_claims(payload)
         return user
     except Exception:
         return None
 
 
-def _duration_seconds(day, cin, cout):
-    if not cin or not cout:
-        return 0.0
-    sd = datetime.combine(day, cin)
-    ed = datetime.combine(day, cout)
-    if ed < sd:  # overnight
-        ed += timedelta(days=1)
-    return (ed - sd).total_seconds()
+def _accepts_gzip(request):
+    """
+    True si l'en-tête Accept-Encoding autorise gzip (q > 0). Une entrée `gzip`
+    l'emporte sur `*`, quel que soit leur ordre (`*;q=0, gzip` accepte gzip).
+    """
+    header = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    qualities = {}
+    for part in header.split(","):
+        coding, *params = part.strip().split(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "*"):
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    quality = qualities.get("gzip", qualities.get("*", 0.0))
+    return quality > 0
 
 
-def export_timeclock_csv(request, token: str):
+def _csv_rows(entries, writer):
     """
-    GET /api/export/timeclock/csv/<token>/
-    - auth: session OU JWT (Authorization header ou cookie)
-    - token signé (15 min)
-    - contrôle: self OU manager
-    - réponse: CSV en streaming
+    Génère les lignes CSV (str) d'un export: en-tête, une ligne par pointage, total.
+    `entries` est itéré une seule fois (compatible avec qs.iterator()).
     """
-    # 1) Auth
-    if not request.user.is_authenticated:
-        user = _authenticate_request_with_jwt(request)
-        if user:
-            request.user = user
+    yield writer.writerow(CSV_HEADER)
+    total = 0.0
+    for tc in entries:
+        secs = tc.duration_seconds
+        total += secs
+        yield writer.writerow([
+            tc.id,
+            tc.user_id,
+            tc.day.isoformat(),
+            tc.clock_in.strftime("%H:%M:%S") if tc.clock_in else "",
+            tc.clock_out.strftime("%H:%M:%S") if tc.clock_out else "",
+            int(round(secs)),
+            f"{secs/3600:.2f}",
+        ])
+    yield writer.writerow([])
+    yield writer.writerow(["TOTAL", "", "", "", "", int(round(total)), f"{total/3600:.2f}"])
 
-    # 2) Décodage token signé
+
+def _gzip_stream(chunks, level=GZIP_LEVEL):
+    """Compresse un flux de str en gzip au fil de l'eau, sans tout garder en mémoire."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _zip_stream(members):
+    """
+    Produit une archive ZIP en streaming.
+    `members` est un itérable de (nom_de_fichier, itérable de str).
+    Chaque membre est compressé (deflate) au fil de l'eau.
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, chunks in members:
+            with zf.open(name, mode="w", force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk.encode())
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def _decode_export_token(token):
+    """
+    Vérifie la signature (15 min) et décode le payload JSON base64.
+    Retourne (data, None) ou (None, HttpResponseBadRequest).
+    """
     signer = TimestampSigner()
     try:
         unsigned_b64 = signer.unsign(token, max_age=900)  # 15 minutes
         raw_json = base64.urlsafe_b64decode(unsigned_b64).decode()
-        data = json.loads(raw_json)
+        return json.loads(raw_json), None
     except BadSignature:
-        return HttpResponseBadRequest("Invalid or expired token")
+        return None, HttpResponseBadRequest("Invalid or expired token")
     except (json.JSONDecodeError, UnicodeDecodeError, ValueError):
-        return HttpResponseBadRequest("Invalid token payload")
+        return None, HttpResponseBadRequest("Invalid token payload")
+
+
+def _can_export_for(user, target):
+    is_self = str(user.id) == str(target.id)
+    is_admin = getattr(user, "is_admin", False) or user.is_superuser
+    return is_self or is_admin or is_manager_of(user, getattr(target, "team_id", None))
+
+
+def _authenticate_export(request, token):
+    """
+    Étapes communes à toutes les vues d'export:
+      1) auth session OU JWT, 2) token signé, 3) requester == caller.
+    Retourne (payload du token, None) ou (None, HttpResponse d'erreur).
+    """
+    # 1) Auth
+    if not request.user.is_authenticated:
+        user = _authenticate_request_with_jwt(request)
+        if user:
+            request.user = user
+
+    # 2) Décodage token signé
+    data, error = _decode_export_token(token)
+    if error:
+        return None, error
 
     requester_id = data.get("requester_id")
-    target_user_id = data.get("target_user_id")
-    start_s = data.get("start_date")
-    end_s = data.get("end_date")
-    sep = data.get("sep", ";")
 
     # If user is still anonymous, rely on the signed requester_id to hydrate user
     if not request.user.is_authenticated:
         try:
             request.user = CustomUser.objects.get(pk=requester_id)
         except CustomUser.DoesNotExist:
-             return HttpResponseBadRequest("Invalid requester in token")
+            return None, HttpResponseBadRequest("Invalid requester in token")
 
     # 3) Le caller doit être celui inscrit dans le token
     if str(request.user.id) != str(requester_id):
-        return HttpResponseForbidden("Unauthorized")
+        return None, HttpResponseForbidden("Unauthorized")
+
+    return data, None
+
+
+def _resolve_export_request(request, token):
+    """
+    Étapes communes aux exports d'un utilisateur (CSV, Parquet):
+      1-3) `_authenticate_export`, 4) cible + droits (self OU manager OU admin), 5) dates.
+    Retourne (ExportRequest, None) ou (None, HttpResponse d'erreur).
+    """
+    data, error = _authenticate_export(request, token)
+    if error:
+        return None, error
+
+    target_user_id = data.get("target_user_id")
+    start_s = data.get("start_date")
+    end_s = data.get("end_date")
 
     # 4) Cible + droits (self OU manager OU admin)
     try:
         target = CustomUser.objects.get(pk=target_user_id)
     except CustomUser.DoesNotExist:
-        return HttpResponseBadRequest("Target user not found")
-
-    is_self = str(request.user.id) == str(target_user_id)
-    is_admin = getattr(request.user, "is_admin", False) or request.user.is_superuser
+        return None, HttpResponseBadRequest("Target user not found")
 
-    if not (is_self or is_admin or is_manager_of(request.user, getattr(target, "team_id", None))):
-        return HttpResponseForbidden("Not allowed")
+    if not _can_export_for(request.user, target):
+        return None, HttpResponseForbidden("Not allowed")
 
     # 5) Dates
     try:
         s = date.fromisoformat(start_s)
         e = date.fromisoformat(end_s)
     except Exception:
-        return HttpResponseBadRequest("Bad date format (YYYY-MM-DD)")
+        return None, HttpResponseBadRequest("Bad date format (YYYY-MM-DD)")
     if s > e:
-        return HttpResponseBadRequest("start_date must be <= end_date")
+        return None, HttpResponseBadRequest("start_date must be <= end_date")
+
+    return ExportRequest(data=data, target=target, start=s, end=e), None
+
+
+@replica_view
+def export_timeclock_csv(request, token: str):
+    """
+    GET /api/export/timeclock/csv/<token>/
+    - auth: session OU JWT (Authorization header ou cookie)
+    - token signé (15 min)
+    - contrôle: self OU manager
+    - réponse: CSV en streaming (gzip si Accept-Encoding le permet)
+    """
+    export, error = _resolve_export_request(request, token)
+    if error:
+        return error
+
+    target_user_id = export.target.id
+    s, e = export.start, export.end
+    sep = export.data.get("sep", ";")
 
     # 6) Données
     qs = (
@@ -129,29 +292,73 @@ def export_timeclock_csv(request, token: str):
         .order_by("day", "clock_in")
     )
 
-    # 7) Streaming CSV
-    buf = Echo()
-    w = csv.writer(buf, delimiter=sep)
-
-    def rows():
-        yield w.writerow(["id", "user_id", "day", "clock_in", "clock_out", "total_seconds", "total_hours"])
-        total = 0.0
-        for tc in qs.iterator():
-            secs = _duration_seconds(tc.day, tc.clock_in, tc.clock_out)
-            total += secs
-            yield w.writerow([
-                tc.id,
-                tc.user_id,
-                tc.day.isoformat(),
-                tc.clock_in.strftime("%H:%M:%S") if tc.clock_in else "",
-                tc.clock_out.strftime("%H:%M:%S") if tc.clock_out else "",
-                int(round(secs)),
-                f"{secs/3600:.2f}",
-            ])
-        yield w.writerow([])
-        yield w.writerow(["TOTAL", "", "", "", "", int(round(total)), f"{total/3600:.2f}"])
-
-    resp = StreamingHttpResponse(rows(), content_type="text/csv")
+    # 7) Streaming CSV (compressé à la volée si le client accepte gzip), mois archivés compris
+    w = csv.writer(Echo(), delimiter=sep)
+    rows = _csv_rows(read_through(qs, [target_user_id], s, e), w)
+
+    if _accepts_gzip(request):
+        resp = StreamingHttpResponse(observe_stream(_gzip_stream(rows), "csv.gz"), content_type="text/csv")
+        resp["Content-Encoding"] = "gzip"
+    else:
+        resp = StreamingHttpResponse(observe_stream(rows, "csv"), content_type="text/csv")
+    resp["Vary"] = "Accept-Encoding"
     fname = f'timeclocks_{target_user_id}_{s.strftime("%Y%m%d")}_{e.strftime("%Y%m%d")}.csv'
     resp["Content-Disposition"] = f'attachment; filename="{fname}"'
     return resp
+
+
+@replica_view
+def export_timeclock_zip(request, token: str):
+    """
+    GET /api/export/timeclock/zip/<token>/
+    - même auth et même token signé que le CSV, avec `target_user_ids`
+    - contrôle: self OU manager OU admin, pour chaque utilisateur cible
+    - réponse: archive ZIP en streaming, un CSV par utilisateur
+    """
+    data, error = _authenticate_export(request, token)
+    if error:
+        return error
+
+    target_user_ids = data.get("target_user_ids") or []
+    sep = data.get("sep", ";")
+
+    if not target_user_ids or len(target_user_ids) > MAX_ZIP_EXPORT_USERS:
+        return HttpResponseBadRequest("Invalid target users")
+
+    targets = list(CustomUser.objects.filter(pk__in=target_user_ids).order_by("id"))
+    if len(targets) != len(set(target_user_ids)):
+        return HttpResponseBadRequest("Target user not found")
+    if not all(_can_export_for(request.user, target) for target in targets):
+        return HttpResponseForbidden("Not allowed")
+
+    try:
+        s = date.fromisoformat(data.get("start_date"))
+        e = date.fromisoformat(data.get("end_date"))
+    except Exception:
+        return HttpResponseBadRequest("Bad date format (YYYY-MM-DD)")
+    if s > e:
+        return HttpResponseBadRequest("start_date must be <= end_date")
+
+    # Une seule requête pour tous les utilisateurs, regroupée par user_id
+    qs = (
+        TimeClock.objects
+        .filter(user_id__in=[t.id for t in targets], day__range=(s, e))
+        .order_by("user_id", "day", "clock_in")
+    )
+    w = csv.writer(Echo(), delimiter=sep)
+    period = f'{s.strftime("%Y%m%d")}_{e.strftime("%Y%m%d")}'
+
+    def members():
+        grouped = groupby(read_through(qs, [t.id for t in targets], s, e), key=lambda tc: tc.user_id)
+        current = next(grouped, None)
+        for target in targets:
+            entries = ()
+            if current is not None and current[0] == target.id:
+                entries = current[1]
+            yield f"timeclocks_{target.id}_{period}.csv", _csv_rows(entries, w)
+            if entries:
+                current = next(grouped, None)
+
+    resp = StreamingHttpResponse(observe_stream(_zip_stream(members()), "zip"), content_type="application/zip")
+    resp["Content-Disposition"] = f'attachment; filename="timeclocks_{period}.zip"'
+    return resp
@@ -0,0 +1,91 @@
+# PrimeBankApp/views_timeclock_parquet_export.py
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.http import StreamingHttpResponse
+
+from .metrics import observe_stream
+from .models import TimeClock
+from .replicas import replica_view
+from .timeclock_archive import read_through
+from .views_timeclock_export import _StreamSink, _resolve_export_request
+
+# Nombre de lignes par row group (= taille des lots lus via le curseur serveur)
+ROW_GROUP_SIZE = 10_000
+
+PARQUET_SCHEMA = pa.schema([
+    ("day", pa.date32()),
+    ("user_id", pa.int64()),
+    ("clock_in", pa.time64("us")),
+    ("clock_out", pa.time64("us")),
+    ("duration_seconds", pa.int64()),
+])
+
+
+def _row_group(rows):
+    """Convertit un lot de tuples (day, user_id, clock_in, clock_out, duration_seconds) en table Arrow typée."""
+    days, user_ids, clock_ins, clock_outs, durations = [], [], [], [], []
+    for day, user_id, cin, cout, duration in rows:
+        days.append(day)
+        user_ids.append(user_id)
+        clock_ins.append(cin)
+        clock_outs.append(cout)
+        durations.append(int(round(duration)) if cin and cout else None)
+    return pa.table(
+        [days, user_ids, clock_ins, clock_outs, durations],
+        schema=PARQUET_SCHEMA,
+    )
+
+
+def _parquet_stream(rows, row_group_size=ROW_GROUP_SIZE):
+    """
+    Écrit un fichier Parquet row group par row group et renvoie les octets au fil
+    de l'eau; seul le lot courant est gardé en mémoire.
+    """
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, PARQUET_SCHEMA, compression="zstd")
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= row_group_size:
+            writer.write_table(_row_group(batch))
+            batch = []
+            yield sink.drain()
+    if batch:
+        writer.write_table(_row_group(batch))
+    writer.close()
+    yield sink.drain()
+
+
+@replica_view
+def export_timeclock_parquet(request, token: str):
+    """
+    GET /api/export/timeclock/parquet/<token>/
+    - mêmes auth, token signé et droits que l'export CSV
+    - réponse: fichier Parquet typé (day, user_id, clock_in, clock_out, duration_seconds)
+      écrit par row groups depuis un curseur serveur
+    """
+    export, error = _resolve_export_request(request, token)
+    if error:
+        return error
+
+    s, e = export.start, export.end
+    qs = (
+        TimeClock.objects
+        .filter(user_id=export.target.id, day__range=(s, e))
+        .order_by("day", "clock_in")
+        .values_list("user_id", "day", "clock_in", "clock_out", "duration_seconds", named=True)
+    )
+    # mois archivés compris
+    rows = (
+        (tc.day, tc.user_id, tc.clock_in, tc.clock_out, tc.duration_seconds)
+        for tc in read_through(qs, [export.target.id], s, e, chunk_size=ROW_GROUP_SIZE)
+    )
+
+    resp = StreamingHttpResponse(
+        observe_stream(_parquet_stream(rows), "parquet"),
+        content_type="application/vnd.apache.parquet",
+    )
+    fname = f'timeclocks_{export.target.id}_{s.strftime("%Y%m%d")}_{e.strftime("%Y%m%d")}.parquet'
+    resp["Content-Disposition"] = f'attachment; filename="{fname}"'
+    return resp
@@ -1,21 +1,35 @@
 # PrimeBankApp/views_timeclock_pdf_export.py
 import base64
+import io
 import json
+import logging
 import os
-from datetime import datetime, timedelta, date
-from django.http import HttpResponse, HttpResponseForbidden, HttpResponseBadRequest
+import tempfile
+from datetime import datetime, date
+from functools import lru_cache
+from itertools import groupby
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden, HttpResponseBadRequest
 from django.core.signing import TimestampSigner, BadSignature
 from django.conf import settings
 from django.template.loader import get_template
 from django.contrib.staticfiles import finders
 import weasyprint
 from jinja2 import Environment, FileSystemLoader
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject, StreamObject
 
 from graphql_jwt.utils import get_payload
-from graphql_jwt.shortcuts import get_user_by_payload
 
 from PrimeBankApp.roles import is_manager_of
+from .backends import get_user_by_claims
+from .metrics import observe_export
 from .models import CustomUser, TimeClock
+from .replicas import replica_view
+from .server_timing import phase
+from .timeclock_archive import archived_entries, read_through
+
+logger = logging.getLogger(__name__)
+
 
 def _authenticate_request_with_jwt(request):
     """
@@ -35,22 +49,266 @@ def _authenticate_request_with_jwt(request):
         return None
 
     try:
-        payload = get_payload(token, context=None)
-        user = get_user_by_payload(payload)
+        with phase("jwt"):
+            payload = get_payload(token, context=None)
+            user = get_user_by_claims(payload)
         return user
     except Exception:
         return None
 
-def _duration_seconds(day, cin, cout):
-    if not cin or not cout:
-        return 0.0
-    sd = datetime.combine(day, cin)
-    ed = datetime.combine(day, cout)
-    if ed < sd:  # overnight
-        ed += timedelta(days=1)
-    return (ed - sd).total_seconds()
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+FALLBACK_PRIMARY_COLOR = "#e11d48"
+# Au-delà, le rapport est rendu mois par mois puis les pages sont fusionnées
+MAX_SINGLE_DOCUMENT_ROWS = 500
+
+
+def _build_entries(rows):
+    """
+    Transforme des pointages (objets avec day/clock_in/clock_out/duration_seconds) en lignes du
+    tableau du rapport. Retourne (entries, total_seconds, nombre_de_jours).
+    """
+    entries = []
+    total_seconds = 0.0
+    days_worked = set()
+
+    for tc in rows:
+        dur = tc.duration_seconds
+        total_seconds += dur
+        days_worked.add(tc.day)
+        entries.append({
+            "day": tc.day,
+            "clock_in": tc.clock_in,
+            "clock_out": tc.clock_out,
+            "duration_fmt": f"{dur/3600:.2f}"
+        })
+    return entries, total_seconds, len(days_worked)
+
+
+def _build_report_context(user, start, end, entries, total_seconds, num_days,
+                          logo_data_uri="", primary_color=FALLBACK_PRIMARY_COLOR):
+    """
+    Contexte Jinja2 de `pdf_report.html`. `user` peut être un CustomUser ou un
+    dict (first_name, last_name, email, hour_contract) pour les rendus hors requête.
+    """
+    total_hours = total_seconds / 3600
+    avg_daily_hours = total_hours / num_days if num_days > 0 else 0.0
+    # Contrat affiché à titre informatif (pas de ratio sur une période libre)
+    contract_hours = (
+        user.get("hour_contract") if isinstance(user, dict) else user.hour_contract
+    )
+    return {
+        "user": user,
+        "start_date": start,
+        "end_date": end,
+        "entries": entries,
+        "total_hours": f"{total_hours:.2f}",
+        "avg_daily_hours": f"{avg_daily_hours:.2f}",
+        "days_worked": num_days,
+        "contract_hours": contract_hours,
+        "generated_at": datetime.now(),
+        "logo_data_uri": logo_data_uri,
+        "primary_color": primary_color,
+        "show_summary": True,
+        "show_entries": True,
+        "entries_title": "Activity Logs",
+    }
+
+
+def _resolve_primary_color(raw_color):
+    if raw_color and (raw_color.startswith("#") or raw_color.startswith("rgb")):
+        return raw_color
+    return FALLBACK_PRIMARY_COLOR
+
+
+def _load_logo_data_uri():
+    """Logo en data URI: d'abord depuis le frontend, sinon depuis static/img/logo.png."""
+    logo_data_uri = ""
+    try:
+        frontend_url = getattr(settings, "FRONTEND_URL", "http://localhost:5173")
+        if not frontend_url: frontend_url = "http://localhost:5173"
+        frontend_url = frontend_url.rstrip('/')
+        logo_url = f"{frontend_url}/primebank-logo.png"
+        
+        import urllib.request
+        with urllib.request.urlopen(logo_url, timeout=5) as response_http:
+            logo_data = response_http.read()
+            b64_logo = base64.b64encode(logo_data).decode('utf-8')
+            logo_data_uri = f"data:image/png;base64,{b64_logo}"
+    except Exception as err:
+        print(f"Failed to fetch remote logo: {err}")
+        try:
+            current_dir = os.path.dirname(__file__)
+            local_path = os.path.join(current_dir, 'static/img/logo.png')
+            if not os.path.exists(local_path):
+                local_path = os.path.join(settings.BASE_DIR, 'PrimeBankApp/static/img/logo.png')
+
+            if os.path.exists(local_path):
+                with open(local_path, "rb") as image_file:
+                    b64_local = base64.b64encode(image_file.read()).decode('utf-8')
+                    logo_data_uri = f"data:image/png;base64,{b64_local}"
+            else:
+                 print(f"Local logo not found at: {local_path}")
+        except Exception as local_err:
+             print(f"Failed to load local logo: {local_err}")
+    return logo_data_uri
+
+
+@lru_cache(maxsize=1)
+def _jinja_env():
+    return Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+
+
+def _render_report_html(context, template_name="pdf_report.html"):
+    return _jinja_env().get_template(template_name).render(context)
+
+
+class _StreamingPdfWriter:
+    """
+    Concatène des PDF dans `target` au fil de l'eau. Les objets de chaque document
+    sont renumérotés et écrits aussitôt, puis son lecteur est libéré: seuls les offsets
+    (un entier par objet) et les références de pages restent en mémoire jusqu'à la
+    table xref finale.
+    """
+
+    CATALOG, PAGES = 1, 2
+
+    def __init__(self, target):
+        self.target = target
+        self.start = target.tell()
+        self.offsets = {}
+        self.kids = ArrayObject()
+        self.next_id = self.PAGES + 1
+        target.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
 
+    def _write_object(self, idnum, obj):
+        self.offsets[idnum] = self.target.tell() - self.start
+        self.target.write(f"{idnum} 0 obj\n".encode())
+        obj.write_to_stream(self.target)
+        self.target.write(b"\nendobj\n")
 
+    def _ref(self, indirect, ids, pending):
+        key = (indirect.idnum, indirect.generation)
+        if key not in ids:
+            ids[key] = self.next_id
+            self.next_id += 1
+            pending.append(indirect)
+        return IndirectObject(ids[key], 0, None)
+
+    def _renumber(self, obj, ids, pending):
+        if isinstance(obj, IndirectObject):
+            return self._ref(obj, ids, pending)
+        if isinstance(obj, StreamObject):
+            copy = StreamObject()
+            copy.update((key, self._renumber(value, ids, pending)) for key, value in obj.items())
+            # données encore encodées (/Filter conservé): recopiées telles quelles
+            copy._data = obj._data
+            return copy
+        if isinstance(obj, DictionaryObject):
+            return DictionaryObject((key, self._renumber(value, ids, pending)) for key, value in obj.items())
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._renumber(value, ids, pending) for value in obj)
+        return obj
+
+    def append(self, source):
+        """Ajoute les pages de `source` (fichier PDF) à la suite des précédentes."""
+        ids = {}  # (numéro, génération) dans `source` -> numéro dans `target`
+        pending = []
+        # close() en sortie vide le cache d'objets du lecteur: rien ne survit au document ajouté
+        with PdfReader(source) as reader:
+            # reader.pages porte déjà les attributs hérités (/Resources, /MediaBox...)
+            pages = {}
+            for page in reader.pages:
+                pages[(page.indirect_reference.idnum, page.indirect_reference.generation)] = page
+                self.kids.append(self._ref(page.indirect_reference, ids, pending))
+            while pending:
+                indirect = pending.pop()
+                key = (indirect.idnum, indirect.generation)
+                if key in pages:
+                    page = DictionaryObject((k, v) for k, v in pages[key].items() if k != "/Parent")
+                    obj = self._renumber(page, ids, pending)
+                    obj[NameObject("/Parent")] = IndirectObject(self.PAGES, 0, None)
+                else:
+                    obj = self._renumber(indirect.get_object(), ids, pending)
+                self._write_object(ids[key], obj)
+
+    def close(self):
+        self._write_object(self.PAGES, DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): self.kids,
+            NameObject("/Count"): NumberObject(len(self.kids)),
+        }))
+        self._write_object(self.CATALOG, DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(self.PAGES, 0, None),
+        }))
+        xref = self.target.tell() - self.start
+        size = self.next_id
+        self.target.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for idnum in range(1, size):
+            self.target.write(f"{self.offsets[idnum]:010d} 00000 n \n".encode())
+        self.target.write(f"trailer\n<< /Size {size} /Root {self.CATALOG} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def _write_chunked_pdf(user, start, end, rows, target, logo_data_uri="",
+                       primary_color=FALLBACK_PRIMARY_COLOR):
+    """
+    Rend un rapport volumineux par tranches d'un mois dans `target` (fichier binaire).
+
+    `rows`: pointages triés par jour, lus une seule fois (curseur serveur) et regroupés par mois.
+    Chaque mois est rendu dans son propre fichier temporaire: la mise en page WeasyPrint
+    et les pages du mois sont libérées avant le suivant. Les totaux sont agrégés au fil de
+    l'eau pour la page de synthèse, puis les fichiers sont concaténés dans `target` un à un
+    (`_StreamingPdfWriter`). Au pic, la mémoire tient un mois rendu plus un entier par
+    objet PDF, quelle que soit la plage.
+    """
+    total_seconds = 0.0
+    num_days = 0
+
+    with tempfile.TemporaryDirectory(prefix="pdf-chunks-") as directory:
+        # Un fichier fermé par tranche: aucun tampon d'écriture ne reste ouvert par mois
+        chunks = []
+
+        def render(context):
+            path = os.path.join(directory, f"{len(chunks):05d}.pdf")
+            weasyprint.HTML(string=_render_report_html(context)).write_pdf(path)
+            chunks.append(path)
+            return path
+
+        months = groupby(rows, key=lambda tc: (tc.day.year, tc.day.month))
+        for (year, month), month_rows in months:
+            entries, seconds, days = _build_entries(month_rows)
+            # Les mois ne se chevauchent pas: les jours travaillés s'additionnent
+            total_seconds += seconds
+            num_days += days
+
+            context = _build_report_context(
+                user, start, end, entries, seconds, days,
+                logo_data_uri=logo_data_uri, primary_color=primary_color,
+            )
+            context["show_summary"] = False
+            context["entries_title"] = f"Activity Logs - {date(year, month, 1).strftime('%B %Y')}"
+            render(context)
+
+        context = _build_report_context(
+            user, start, end, [], total_seconds, num_days,
+            logo_data_uri=logo_data_uri, primary_color=primary_color,
+        )
+        context["show_entries"] = False
+        summary = render(context)
+
+        writer = _StreamingPdfWriter(target)
+        for path in [summary, *chunks[:-1]]:
+            with open(path, "rb") as chunk:
+                writer.append(chunk)
+            os.remove(path)
+        writer.close()
+
+
+def _report_filename(user_id, start):
+    return f'report_{user_id}_{start.strftime("%Y%m%d")}.pdf'
+
+
+@replica_view
 def export_timeclock_pdf(request, token: str):
     """
     GET /api/export/timeclock/pdf/<token>/
@@ -171,104 +429,51 @@ def export_timeclock_pdf(request, token: str):
         .order_by("day", "clock_in")
     )
     
-    print(f"DEBUG: Processing {qs.count()} TimeClock entries...")
-    entries = []
-    total_seconds = 0.0
-    days_worked = set()
-
-    for tc in qs:
-        dur = _duration_seconds(tc.day, tc.clock_in, tc.clock_out)
-        total_seconds += dur
-        days_worked.add(tc.day)
-        entries.append({
-            "day": tc.day,
-            "clock_in": tc.clock_in,
-            "clock_out": tc.clock_out,
-            "duration_fmt": f"{dur/3600:.2f}"
-        })
-    
-    print(f"DEBUG: Processed {len(entries)} entries, total_seconds: {total_seconds}")
+    # mois archivés compris
+    archived = archived_entries([target_user_id], s, e)
+    row_count = qs.count() + len(archived)
+    print(f"DEBUG: Processing {row_count} TimeClock entries...")
+    logo_data_uri = _load_logo_data_uri()
+    primary_color = _resolve_primary_color(data.get("primary_color"))
 
-    # 7) KPIs Calculation
-    total_hours = total_seconds / 3600
-    num_days = len(days_worked)
-    avg_daily_hours = total_hours / num_days if num_days > 0 else 0.0
-    
-    contract_hours = target_user.hour_contract
-    contract_status = None
-    if contract_hours:
-        # Assuming monthly contract, but this is a specific range export. 
-        # We can just show the contract vs total for this period OR leave it as informational.
-        # For now, let's just show the contract value.
-        pass
-
-    # 8) Generate PDF
-    # Prepare Context for Jinja2
-    context = {
-        "user": target_user,
-        "requester": request.user,
-        "start_date": s,
-        "end_date": e,
-        "entries": entries,
-        "total_hours": f"{total_hours:.2f}",
-        "avg_daily_hours": f"{avg_daily_hours:.2f}",
-        "days_worked": num_days,
-        "contract_hours": contract_hours,
-        "generated_at": datetime.now(),
-    }
-    
-    # Resolving logo (Same logic as before)
-    logo_data_uri = ""
-    try:
-        frontend_url = getattr(settings, "FRONTEND_URL", "http://localhost:5173")
-        if not frontend_url: frontend_url = "http://localhost:5173"
-        frontend_url = frontend_url.rstrip('/')
-        logo_url = f"{frontend_url}/primebank-logo.png"
-        
-        import urllib.request
-        with urllib.request.urlopen(logo_url, timeout=5) as response_http:
-            logo_data = response_http.read()
-            b64_logo = base64.b64encode(logo_data).decode('utf-8')
-            logo_data_uri = f"data:image/png;base64,{b64_logo}"
-    except Exception as err:
-        print(f"Failed to fetch remote logo: {err}")
+    # Large ranges: render month by month to bound WeasyPrint memory
+    if row_count > MAX_SINGLE_DOCUMENT_ROWS:
+        logger.info("PDF export of %d time clocks for user %s rendered per month", row_count, target_user.id)
+        # Fichier temporaire sur disque, envoyé par morceaux: le PDF final n'est pas gardé en mémoire
+        pdf_file = tempfile.TemporaryFile()
         try:
-            current_dir = os.path.dirname(__file__)
-            local_path = os.path.join(current_dir, 'static/img/logo.png')
-            if not os.path.exists(local_path):
-                local_path = os.path.join(settings.BASE_DIR, 'PrimeBankApp/static/img/logo.png')
-
-            if os.path.exists(local_path):
-                with open(local_path, "rb") as image_file:
-                    b64_local = base64.b64encode(image_file.read()).decode('utf-8')
-                    logo_data_uri = f"data:image/png;base64,{b64_local}"
-            else:
-                 print(f"Local logo not found at: {local_path}")
-        except Exception as local_err:
-             print(f"Failed to load local logo: {local_err}")
+            with observe_export("pdf"):
+                rows = read_through(qs, [target_user_id], s, e, chunk_size=MAX_SINGLE_DOCUMENT_ROWS, archived=archived)
+                _write_chunked_pdf(target_user, s, e, rows, pdf_file, logo_data_uri, primary_color)
+        except Exception as e:
+            pdf_file.close()
+            logger.exception("Chunked PDF export failed for user %s", target_user.id)
+            return HttpResponse(f'Error generating PDF: {str(e)}', status=500)
+        pdf_file.seek(0)
+        return FileResponse(
+            pdf_file, as_attachment=True, filename=_report_filename(target_user.id, s), content_type="application/pdf"
+        )
 
-    context['logo_data_uri'] = logo_data_uri
+    entries, total_seconds, num_days = _build_entries(read_through(qs, [target_user_id], s, e, archived=archived))
+    print(f"DEBUG: Processed {len(entries)} entries, total_seconds: {total_seconds}")
 
-    # Read Primary Color
-    fallback_color = "#e11d48"
-    raw_color = data.get("primary_color")
-    if raw_color and (raw_color.startswith("#") or raw_color.startswith("rgb")):
-        primary_color = raw_color
-    else:
-        primary_color = fallback_color
-    context['primary_color'] = primary_color
+    # 7) KPIs Calculation + 8) Context for Jinja2
+    context = _build_report_context(
+        target_user,
+        s,
+        e,
+        entries,
+        total_seconds,
+        num_days,
+        logo_data_uri=logo_data_uri,
+        primary_color=primary_color,
+    )
+    context["requester"] = request.user
 
     # Render Template with Jinja2
     print(f"\nDEBUG: Rendering PDF template...")
     try:
-        # Assuming templates are in backend/PrimeBank/PrimeBankApp/templates
-        # We need an absolute path or relative to BASE_DIR
-        template_dir = os.path.join(settings.BASE_DIR, 'PrimeBankApp/templates')
-        print(f"DEBUG: Template directory: {template_dir}")
-        env = Environment(loader=FileSystemLoader(template_dir))
-        template = env.get_template('pdf_report.html')
-        print(f"DEBUG: Template loaded successfully")
-        html_string = template.render(context)
+        html_string = _render_report_html(context)
         print(f"DEBUG: Template rendered successfully, HTML length: {len(html_string)}")
     except Exception as e:
         print(f"DEBUG: Template rendering failed! Error: {e}")
@@ -277,12 +482,13 @@ def export_timeclock_pdf(request, token: str):
     # Generate PDF with WeasyPrint
     print(f"\nDEBUG: Generating PDF with WeasyPrint...")
     response = HttpResponse(content_type='application/pdf')
-    filename = f'report_{target_user.id}_{s.strftime("%Y%m%d")}.pdf'
+    filename = _report_filename(target_user.id, s)
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
     try:
         print(f"DEBUG: Calling WeasyPrint.HTML()...")
-        weasyprint.HTML(string=html_string).write_pdf(response)
+        with observe_export("pdf"):
+            weasyprint.HTML(string=html_string).write_pdf(response)
         print(f"DEBUG: PDF generated successfully!")
     except Exception as e:
         print(f"DEBUG: PDF generation failed! Error: {e}")
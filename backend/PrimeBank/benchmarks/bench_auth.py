@@ -0,0 +1,56 @@
+"""
+Benchmarks des chemins d'authentification: `tokenAuth` (login), `refreshToken`
+(rafraîchissement périodique du frontend) et authentification d'une requête par JWT.
+
+Le débit (logins / refreshs par seconde) est la colonne OPS de pytest-benchmark.
+Les settings de test hachent les mots de passe en MD5: les chiffres mesurent le
+coût applicatif (SQL, payload, signature), pas celui de PBKDF2.
+"""
+import pytest
+from django.test import RequestFactory
+from graphql_jwt.shortcuts import get_token
+
+from PrimeBank.schema import schema
+from PrimeBankApp.backends import JSONWebTokenBackend
+from PrimeBankApp.synthetic_data import seed_dataset
+
+TOKEN_AUTH = "mutation($e: String!, $p: String!) { tokenAuth(email: $e, password: $p) { token refreshToken } }"
+REFRESH_TOKEN = "mutation($t: String!) { refreshToken(refreshToken: $t) { token refreshToken } }"
+
+
+def execute(document, variables):
+    result = schema.execute(document, variables=variables, context_value=RequestFactory().post("/graphql"))
+    assert result.errors is None, result.errors
+    return result.data
+
+
+@pytest.fixture
+def manager(db):
+    data = seed_dataset(members_per_team=5, teams=2, days=1)
+    return data.managers[0], data.password
+
+
+@pytest.mark.django_db
+def test_token_auth(bench, manager):
+    user, password = manager
+    data = bench(execute, TOKEN_AUTH, {"e": user.email, "p": password})
+    assert data["tokenAuth"]["token"]
+
+
+@pytest.mark.django_db
+def test_refresh_token(bench, manager):
+    user, password = manager
+    refresh_token = execute(TOKEN_AUTH, {"e": user.email, "p": password})["tokenAuth"]["refreshToken"]
+
+    # Le refresh token n'est pas révoqué à la rotation: le même sert à chaque tour
+    data = bench(execute, REFRESH_TOKEN, {"t": refresh_token})
+    assert data["refreshToken"]["token"]
+
+
+@pytest.mark.django_db
+def test_authenticate_request(bench, manager):
+    user, _ = manager
+    request = RequestFactory().post("/graphql", HTTP_AUTHORIZATION=f"JWT {get_token(user)}")
+
+    authenticated = bench(JSONWebTokenBackend().authenticate, request=request)
+    assert authenticated.pk == user.pk
@@ -0,0 +1,72 @@
+"""Benchmarks des fonctions KPI pures (sans base de données)."""
+import random
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from PrimeBankApp.kpi_functions.kpi_functions import (
+    _aggregate_timeclock_entries,
+    _calculate_presence_score,
+    _collect_team_members,
+)
+from PrimeBankApp.models import timeclock_duration_seconds
+
+START = date(2024, 1, 1)
+
+
+def make_entries(count, seed=0):
+    # Une entrée par jour, ~5% de nuits (clock_out < clock_in) et ~3% non clôturées
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            clock_in, clock_out = time(22, 0), time(6, 0)
+        elif roll < 0.08:
+            clock_in, clock_out = time(8, 0), None
+        else:
+            clock_in, clock_out = time(rng.randint(7, 9), 30), time(rng.randint(16, 18), 15)
+        day = START + timedelta(days=i)
+        # durée stockée en base (TimeClock.duration_seconds), lue par _aggregate_timeclock_entries
+        duration = timeclock_duration_seconds(day, clock_in, clock_out)
+        entries.append(SimpleNamespace(day=day, clock_in=clock_in, clock_out=clock_out, duration_seconds=duration))
+    return entries
+
+
+def make_team(size, seed=0):
+    rng = random.Random(seed)
+    members = [
+        SimpleNamespace(id=i, first_name=f"First{rng.randint(0, 999)}", last_name=f"Last{i}", hour_contract=35)
+        for i in range(size)
+    ]
+    manager = SimpleNamespace(id=size, first_name="Manager", last_name="Boss", hour_contract=39)
+    return SimpleNamespace(members=SimpleNamespace(all=lambda: members), team_manager=manager)
+
+
+@pytest.mark.parametrize("size", [30, 365, 3650])
+def test_aggregate_timeclock_entries(bench, size):
+    entries = make_entries(size)
+    total_seconds, worked_days, _ = bench(_aggregate_timeclock_entries, entries)
+    assert worked_days <= size
+    assert total_seconds > 0
+
+
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_collect_team_members(bench, size):
+    team = make_team(size)
+    members = bench(_collect_team_members, team)
+    assert len(members) == size + 1
+
+
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_calculate_presence_score(bench, size):
+    # Comme resolve_user_team_presence: un score par membre
+    members = make_team(size).members.all()
+    days_present = {member.id: member.id % 30 for member in members}
+
+    def score_team():
+        return [_calculate_presence_score(member, 30, days_present[member.id]) for member in members]
+
+    scores = bench(score_team)
+    assert all(0 <= score <= 100 for score in scores)
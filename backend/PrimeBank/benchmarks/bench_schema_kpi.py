@@ -0,0 +1,37 @@
+"""
+Benchmarks des résolveurs KPI sur une base SQLite en mémoire remplie par
+`synthetic_data.seed_dataset` (SQL compris).
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from PrimeBankApp.schema_kpi import TimeClockQuery
+from PrimeBankApp.synthetic_data import seed_dataset
+
+
+def make_info(user):
+    return SimpleNamespace(context=SimpleNamespace(user=user))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("period", [30, 90, 365])
+def test_resolve_kpi_clock(bench, period):
+    # Historique deux fois plus long que la période: période courante + précédente
+    data = seed_dataset(members_per_team=1, teams=1, days=2 * period)
+    member = data.members[0]
+
+    result = bench(
+        TimeClockQuery.resolve_kpi_clock, None, make_info(member), user_id=member.id, period=period
+    )
+    assert len(result.daily_totals) == period
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("team_size", [10, 50, 200])
+def test_resolve_user_team_presence(bench, team_size):
+    data = seed_dataset(members_per_team=team_size, teams=1, days=30)
+    manager = data.managers[0]
+
+    snapshots = bench(TimeClockQuery.resolve_user_team_presence, None, make_info(manager), period=30)
+    assert len(snapshots) == team_size + 1
@@ -0,0 +1,131 @@
+"""
+Benchmark harness: pytest-benchmark timings plus peak allocations (tracemalloc),
+saved to / compared against `baseline.json`.
+
+The suite is not part of the default test run (`testpaths`); run it explicitly:
+
+    # mesurer et afficher
+    pytest PrimeBank/benchmarks -o python_files="bench_*.py" --no-cov
+    # réécrire la baseline (sur la machine de référence)
+    pytest PrimeBank/benchmarks -o python_files="bench_*.py" --no-cov --bench-baseline=save
+    # échouer si un benchmark régresse au-delà des seuils
+    pytest PrimeBank/benchmarks -o python_files="bench_*.py" --no-cov --bench-baseline=compare
+"""
+
+import json
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# nom du benchmark -> {"median_seconds", "peak_alloc_bytes"}
+_RESULTS = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("primebank benchmarks")
+    group.addoption(
+        "--bench-baseline",
+        choices=("save", "compare"),
+        default=None,
+        help="save: write results to the baseline file; compare: fail on regressions",
+    )
+    group.addoption("--bench-baseline-file", default=str(BASELINE_PATH))
+    group.addoption(
+        "--bench-max-slowdown",
+        type=float,
+        default=0.25,
+        help="Allowed median latency increase over the baseline (0.25 = +25%%)",
+    )
+    group.addoption(
+        "--bench-max-alloc-growth",
+        type=float,
+        default=0.10,
+        help="Allowed peak allocation increase over the baseline (0.10 = +10%%)",
+    )
+
+
+def _load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())["benchmarks"]
+
+
+def _peak_allocations(func, args, kwargs):
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _regressions(name, result, baseline, config):
+    reference = baseline.get(name)
+    if reference is None:
+        return []
+    failures = []
+    max_slowdown = config.getoption("--bench-max-slowdown")
+    max_alloc_growth = config.getoption("--bench-max-alloc-growth")
+    if result["median_seconds"] is not None and reference.get("median_seconds"):
+        ratio = result["median_seconds"] / reference["median_seconds"]
+        if ratio > 1 + max_slowdown:
+            failures.append(
+                f"median {result['median_seconds'] * 1000:.3f} ms vs baseline "
+                f"{reference['median_seconds'] * 1000:.3f} ms (+{(ratio - 1) * 100:.0f}%)"
+            )
+    if reference.get("peak_alloc_bytes"):
+        ratio = result["peak_alloc_bytes"] / reference["peak_alloc_bytes"]
+        if ratio > 1 + max_alloc_growth:
+            failures.append(
+                f"peak allocations {result['peak_alloc_bytes']} B vs baseline "
+                f"{reference['peak_alloc_bytes']} B (+{(ratio - 1) * 100:.0f}%)"
+            )
+    return failures
+
+
+@pytest.fixture
+def bench(benchmark, request):
+    """
+    `bench(func, *args, **kwargs)`: chronomètre `func` avec pytest-benchmark,
+    mesure le pic d'allocations d'un appel et compare à la baseline si demandé.
+    """
+    config = request.config
+    name = f"{request.node.module.__name__.rsplit('.', 1)[-1]}::{request.node.name}"
+
+    def run(func, *args, **kwargs):
+        # Premier appel hors mesure: imports paresseux, caches
+        func(*args, **kwargs)
+        peak = _peak_allocations(func, args, kwargs)
+        benchmark.extra_info["peak_alloc_bytes"] = peak
+        result = benchmark(func, *args, **kwargs)
+
+        stats = benchmark.stats.stats if benchmark.stats else None
+        _RESULTS[name] = {
+            "median_seconds": stats.median if stats else None,
+            "peak_alloc_bytes": peak,
+        }
+        if config.getoption("--bench-baseline") == "compare":
+            baseline = _load_baseline(config.getoption("--bench-baseline-file"))
+            failures = _regressions(name, _RESULTS[name], baseline, config)
+            if failures:
+                pytest.fail(f"{name} regressed: " + "; ".join(failures), pytrace=False)
+        return result
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if config.getoption("--bench-baseline") != "save" or not _RESULTS:
+        return
+    path = Path(config.getoption("--bench-baseline-file"))
+    # Fusion: une exécution partielle (-k) ne supprime pas les autres entrées
+    benchmarks = _load_baseline(path)
+    benchmarks.update(_RESULTS)
+    path.write_text(json.dumps({"benchmarks": dict(sorted(benchmarks.items()))}, indent=2) + "\n")
@@ -1,6 +1,8 @@
 import os
 import sys
+
 import django
+import pytest
 
 
 def pytest_configure():
@@ -24,3 +26,54 @@ def pytest_configure():
 
     # Now setup Django.
     django.setup()
+
+
+def _format_queries(label, captured):
+    lines = [f"--- {label}: {len(captured)} queries"]
+    lines.extend(f"{i:3d}. {query['sql']}" for i, query in enumerate(captured.captured_queries, 1))
+    return "\n".join(lines)
+
+
+@pytest.fixture
+def assert_constant_queries():
+    """
+    Exécute `run(size)` pour chaque taille de jeu de données, chacune dans une
+    transaction annulée ensuite, et vérifie que le nombre de requêtes SQL ne
+    dépend pas de la taille. `run` renvoie le CaptureQueriesContext de
+    l'opération mesurée. En cas d'échec, le SQL des deux exécutions est affiché.
+    """
+    from django.db import transaction
+
+    def check(run, sizes=(2, 6)):
+        results = []
+        for size in sizes:
+            with transaction.atomic():
+                results.append((size, run(size)))
+                transaction.set_rollback(True)
+
+        counts = {len(captured) for _, captured in results}
+        if len(counts) > 1:
+            details = "\n".join(_format_queries(f"size={size}", captured) for size, captured in results)
+            pytest.fail(f"Query count grows with dataset size:\n{details}", pytrace=False)
+        return counts.pop()
+
+    return check
+
+
+@pytest.fixture(autouse=True)
+def _clear_user_cache():
+    # Cache d'authentification propre au processus: les ids sont réutilisés d'un test à l'autre
+    from PrimeBankApp.replicas import lag_guard
+    from PrimeBankApp.scopes import scope_cache
+    from PrimeBankApp.timeclock_archive import archive_cache
+    from PrimeBankApp.user_cache import user_cache
+
+    user_cache.clear()
+    scope_cache.clear()
+    archive_cache.clear()
+    lag_guard.clear()
+    yield
+    user_cache.clear()
+    scope_cache.clear()
+    archive_cache.clear()
+    lag_guard.clear()
@@ -0,0 +1,157 @@
+"""Tests unitaires pour `annual_reports.py` (rapports annuels par employé)."""
+import json
+import os
+from datetime import date, time, timedelta
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from PrimeBankApp.clock_events import record_event
+from PrimeBankApp.models import ClockEvent, TimeClock
+from PrimeBankApp.synthetic_data import seed_dataset
+
+try:
+    import PrimeBankApp.annual_reports as annual_reports
+except OSError:  # WeasyPrint présent mais bibliothèques système (Pango) absentes
+    pytest.skip("WeasyPrint system libraries unavailable", allow_module_level=True)
+
+
+START = date(2025, 1, 1)
+END = date(2025, 12, 31)
+
+
+class FakeQS:
+    def __init__(self, items):
+        self._items = items
+
+    def filter(self, **kwargs):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def values(self, *fields):
+        return self
+
+    def values_list(self, *fields, named=False):
+        return self
+
+    def iterator(self, chunk_size=None):
+        return iter(self._items)
+
+
+def _user(uid):
+    return {"id": uid, "first_name": f"F{uid}", "last_name": "L", "email": f"{uid}@x.com", "hour_contract": 35}
+
+
+def test_iter_user_jobs_single_pass_and_skip(monkeypatch):
+    users = [_user(1), _user(2), _user(3)]
+    rows = [
+        annual_reports.ReportRow(10, 1, date(2025, 1, 2), time(9, 0), time(17, 0), 8 * 3600.0),
+        annual_reports.ReportRow(11, 1, date(2025, 1, 3), time(9, 0), time(17, 0), 8 * 3600.0),
+        annual_reports.ReportRow(12, 3, date(2025, 1, 2), time(9, 0), time(12, 0), 3 * 3600.0),
+    ]
+    monkeypatch.setattr(annual_reports, "CustomUser", SimpleNamespace(objects=FakeQS(users)))
+    monkeypatch.setattr(annual_reports, "TimeClock", SimpleNamespace(objects=FakeQS(rows)))
+
+    jobs = list(annual_reports.iter_user_jobs(START, END, ("csv",), skip={1}))
+
+    # L'utilisateur 1 est déjà fait, le 2 n'a aucun pointage
+    assert [job["user"]["id"] for job in jobs] == [2, 3]
+    assert jobs[0]["rows"] == []
+    assert [row.id for row in jobs[1]["rows"]] == [12]
+
+
+def test_run_batch_writes_files_and_manifest(tmp_path):
+    jobs = [
+        {
+            "user": _user(1),
+            "rows": [annual_reports.ReportRow(10, 1, date(2025, 1, 2), time(9, 0), time(17, 0), 8 * 3600.0)],
+            "start": START,
+            "end": END,
+            "formats": ("csv",),
+            "logo_data_uri": "",
+        }
+    ]
+    manifest = annual_reports.load_manifest(tmp_path, START, END)
+    done = []
+
+    annual_reports.run_batch(iter(jobs), tmp_path, manifest, workers=1, on_done=lambda *args: done.append(args))
+
+    filename = "timeclocks_1_20250101_20251231.csv"
+    assert done == [(1, [filename], 1)]
+    assert (tmp_path / filename).read_text().startswith("id;user_id;day")
+    saved = json.loads((tmp_path / annual_reports.MANIFEST_NAME).read_text())
+    assert saved["users"]["1"]["files"] == [filename]
+    assert saved["users"]["1"]["formats"] == ["csv"]
+    assert annual_reports.is_done(saved, tmp_path, 1, ("csv",))
+    # Relance avec un format de plus: le PDF manque, l'employé est à refaire
+    assert not annual_reports.is_done(saved, tmp_path, 1, ("csv", "pdf"))
+
+    # Fichier supprimé -> l'employé est à refaire
+    os.remove(tmp_path / filename)
+    assert not annual_reports.is_done(saved, tmp_path, 1, ("csv",))
+
+
+def test_rerun_with_another_format_keeps_the_previous_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        annual_reports, "weasyprint", SimpleNamespace(HTML=lambda string: SimpleNamespace(write_pdf=lambda: b"%PDF"))
+    )
+    job = {
+        "user": _user(1),
+        "rows": [],
+        "start": START,
+        "end": END,
+        "logo_data_uri": "",
+    }
+    manifest = annual_reports.load_manifest(tmp_path, START, END)
+    annual_reports.run_batch(iter([{**job, "formats": ("csv",)}]), tmp_path, manifest, workers=1)
+    annual_reports.run_batch(iter([{**job, "formats": ("pdf",)}]), tmp_path, manifest, workers=1)
+
+    saved = annual_reports.load_manifest(tmp_path, START, END)
+    assert saved["users"]["1"]["formats"] == ["csv", "pdf"]
+    assert annual_reports.is_done(saved, tmp_path, 1, ("csv", "pdf"))
+
+
+def test_load_manifest_ignores_other_period(tmp_path):
+    annual_reports.save_manifest(tmp_path, {"period": {"start": "2024-01-01", "end": "2024-12-31"}, "users": {"1": {}}})
+    manifest = annual_reports.load_manifest(tmp_path, START, END)
+    assert manifest["users"] == {}
+
+
+@pytest.mark.django_db
+def test_rerun_renders_again_the_employees_whose_clocks_changed(tmp_path):
+    data = seed_dataset(members_per_team=2, teams=1, days=3)
+    end = timezone.localdate()
+    start = end - timedelta(days=10)
+
+    def run():
+        out = StringIO()
+        call_command(
+            "annual_reports", str(tmp_path), "--start", start.isoformat(), "--end", end.isoformat(),
+            "--formats", "csv", "--workers", "1", stdout=out,
+        )
+        return out.getvalue()
+
+    run()
+    member = data.members[0]
+    tc = TimeClock.objects.filter(user=member, day__range=(start, end)).first()
+    tc.clock_in, tc.clock_out = time(6, 0), time(19, 0)
+    tc.save()
+    record_event(ClockEvent.MODIFIED, tc)
+    # Hors période: ne compte pas
+    record_event(ClockEvent.MODIFIED, TimeClock(user_id=data.members[1].id, day=start - timedelta(days=1)))
+
+    output = run()
+
+    assert "1 employee(s) changed since the last run" in output
+    assert "1 employee(s)," in output.splitlines()[-1]
+    csv_text = (tmp_path / f'timeclocks_{member.id}_{start:%Y%m%d}_{end:%Y%m%d}.csv').read_text()
+    assert "06:00:00" in csv_text
+
+    unchanged = run()
+    assert "changed since" not in unchanged
+    assert "0 employee(s)," in unchanged.splitlines()[-1]
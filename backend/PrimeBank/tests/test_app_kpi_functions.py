@@ -11,6 +11,7 @@ from PrimeBankApp.kpi_functions.kpi_functions import (
     _collect_team_members,
     _determine_team_for_user,
 )
+from PrimeBankApp.models import timeclock_duration_seconds
 
 
 def test_calculate_expected_hours_and_work_days_edge_cases():
@@ -29,6 +30,7 @@ def test_aggregate_timeclock_entries_normal_and_overnight():
             self.day = day
             self.clock_in = clock_in
             self.clock_out = clock_out
+            self.duration_seconds = timeclock_duration_seconds(day, clock_in, clock_out)
 
     e1 = Entry(date(2025, 1, 1), time(9, 0, 0), time(17, 0, 0))
     e2 = Entry(date(2025, 1, 2), time(22, 0, 0), time(2, 0, 0))
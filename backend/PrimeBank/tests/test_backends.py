@@ -0,0 +1,193 @@
+"""Tests pour `backends.py` (utilisateur construit depuis le JWT) et `user_cache.py`."""
+from types import SimpleNamespace
+
+import pytest
+from django.test import RequestFactory, override_settings
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.settings import jwt_settings
+from graphql_jwt.shortcuts import get_token
+from graphql_jwt.utils import get_payload
+
+from PrimeBankApp.backends import JSONWebTokenBackend, _issued_at, get_user_by_claims
+from PrimeBankApp.models import CustomUser, Team, TokenUser
+from PrimeBankApp.roles import is_admin, is_manager_of
+from PrimeBankApp.user_cache import UserCache, user_cache
+
+
+def make_user(email, phone_number, **fields):
+    user = CustomUser(email=email, phone_number=phone_number, **fields)
+    user.set_password("pw")
+    user.save()
+    return user
+
+
+@pytest.fixture
+def manager(db):
+    team = Team.objects.create(description="Ops")
+    return make_user(
+        "manager@example.com",
+        "0600000001",
+        first_name="Ada",
+        last_name="Manager",
+        hour_contract=35,
+        team=team,
+        team_managed=team,
+    )
+
+
+def _authenticate(user):
+    request = RequestFactory().get("/graphql", HTTP_AUTHORIZATION=f"JWT {get_token(user)}")
+    return JSONWebTokenBackend().authenticate(request=request)
+
+
+@pytest.mark.django_db
+def test_authenticate_builds_user_from_claims_without_sql(manager, django_assert_num_queries):
+    request = RequestFactory().get("/graphql", HTTP_AUTHORIZATION=f"JWT {get_token(manager)}")
+    user_cache.roles_changed_since(manager.pk, 0)  # marques partagées relues au plus une fois par intervalle
+
+    with django_assert_num_queries(0):
+        user = JSONWebTokenBackend().authenticate(request=request)
+        assert isinstance(user, TokenUser)
+        assert user == manager
+        assert user.is_authenticated and not user.is_anonymous
+        assert (user.email, user.first_name, user.hour_contract) == ("manager@example.com", "Ada", 35)
+        assert is_manager_of(user, manager.team_managed_id)
+        assert not is_admin(user)
+
+
+@pytest.mark.django_db
+def test_fields_missing_from_token_are_read_once_through_the_cache(manager, django_assert_num_queries):
+    first = _authenticate(manager)
+    with django_assert_num_queries(1):
+        assert first.date_joined == manager.date_joined
+        assert first.password == manager.password
+
+    second = _authenticate(manager)
+    with django_assert_num_queries(0):
+        assert second.date_joined == manager.date_joined
+
+
+@pytest.mark.django_db
+def test_tokens_without_the_new_claims_fall_back_to_the_database(manager, django_assert_num_queries):
+    payload = get_payload(get_token(manager))
+    del payload["is_superuser"]
+
+    with django_assert_num_queries(1):
+        user = get_user_by_claims(payload)
+    assert type(user) is CustomUser
+    assert user.pk == manager.pk
+
+
+@pytest.mark.django_db
+def test_disabled_user_is_rejected(manager):
+    payload = get_payload(get_token(manager))
+    payload["is_active"] = False
+    with pytest.raises(JSONWebTokenError):
+        get_user_by_claims(payload)
+
+
+@pytest.mark.django_db
+def test_role_change_stops_trusting_older_tokens(manager):
+    payload = get_payload(get_token(manager))
+    CustomUser.objects.filter(pk=manager.pk).update(team_managed=None)
+
+    # Sans invalidation le token fait foi jusqu'à son expiration
+    assert get_user_by_claims(payload).team_managed_id == manager.team_managed_id
+
+    user_cache.invalidate(manager.pk)
+    user = get_user_by_claims(payload)
+    assert type(user) is CustomUser
+    assert user.team_managed_id is None
+
+
+@pytest.mark.django_db
+def test_role_changes_reach_the_other_processes(manager, settings):
+    settings.AUTH_ROLE_CHANGE_POLL_INTERVAL = 0
+    payload = get_payload(get_token(manager))
+    other_process = UserCache()
+    assert not other_process.roles_changed_since(manager.pk, _issued_at(payload))
+
+    user_cache.invalidate(manager.pk)
+    assert other_process.roles_changed_since(manager.pk, _issued_at(payload))
+
+
+@pytest.mark.django_db
+def test_saving_or_deleting_a_user_outside_the_mutations_invalidates(manager):
+    payload = get_payload(get_token(manager))
+    manager.last_login = manager.date_joined
+    manager.save(update_fields=["last_login"])
+    assert isinstance(get_user_by_claims(payload), TokenUser)
+
+    # ex. désactivation depuis l'admin Django
+    manager.is_active = False
+    manager.save()
+    with pytest.raises(JSONWebTokenError):
+        get_user_by_claims(payload)
+
+    other = make_user("gone@example.com", "0600000004")
+    other_payload = get_payload(get_token(other))
+    other.delete()
+    assert get_user_by_claims(other_payload) is None
+
+
+@pytest.mark.django_db
+def test_set_team_manager_and_add_user_to_team_invalidate(manager, monkeypatch):
+    from PrimeBank.schema import schema
+
+    other = make_user("member@example.com", "0600000002", first_name="Bo", last_name="Member")
+    admin = make_user("admin@example.com", "0600000003", first_name="Cy", last_name="Admin", is_admin=True)
+    invalidated = []
+    monkeypatch.setattr(user_cache, "invalidate", lambda *ids: invalidated.extend(str(i) for i in ids))
+    context = SimpleNamespace(user=admin)
+
+    result = schema.execute(
+        "mutation($t: ID!, $u: ID!) { addUserToTeam(teamId: $t, userId: $u) { team { id } } "
+        "setTeamManager(teamId: $t, managerUserId: $u) { ok } }",
+        variables={"t": manager.team_managed_id, "u": other.pk},
+        context_value=context,
+    )
+
+    assert result.errors is None
+    assert invalidated == [str(other.pk), str(manager.pk), str(other.pk)]
+
+
+def test_user_cache_is_lru_and_expires(monkeypatch):
+    now = [0.0]
+    cache = UserCache(clock=lambda: now[0])
+    loads = []
+
+    class Manager:
+        def filter(self, pk):
+            loads.append(pk)
+            return SimpleNamespace(first=lambda: SimpleNamespace(pk=pk))
+
+    monkeypatch.setattr(
+        "PrimeBankApp.user_cache.get_user_model", lambda: SimpleNamespace(_default_manager=Manager())
+    )
+
+    with override_settings(AUTH_USER_CACHE_MAX_SIZE=2, AUTH_USER_CACHE_TTL=10):
+        cache.get(1)
+        cache.get(2)
+        cache.get(1)  # 1 devient le plus récent
+        cache.get(3)  # évince 2
+        assert loads == [1, 2, 3]
+        cache.get(1)
+        cache.get(2)
+        assert loads == [1, 2, 3, 2]
+
+        now[0] = 11
+        cache.get(2)
+        assert loads == [1, 2, 3, 2, 2]
+        assert len(cache) == 2
+
+
+def test_role_change_marks_expire_with_the_tokens():
+    now = [1000.0]
+    cache = UserCache(wall_clock=lambda: now[0], shared=False)
+    cache.invalidate(7)
+    assert cache.roles_changed_since(7, issued_at=1000)
+    assert not cache.roles_changed_since(7, issued_at=1001)
+
+    now[0] += jwt_settings.JWT_EXPIRATION_DELTA.total_seconds() + 1
+    cache.invalidate(8)
+    assert not cache.roles_changed_since(7, issued_at=0)
@@ -0,0 +1,103 @@
+"""Tests pour la requête `changeRequestInbox` de `schema_time_clock.py`."""
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from PrimeBankApp.models import RequestModifyTimeClock
+from PrimeBankApp.schema_time_clock import decode_inbox_cursor, encode_inbox_cursor
+from PrimeBankApp.synthetic_data import seed_dataset
+
+INBOX = """
+query($teamId: ID, $first: Int, $after: String) {
+  changeRequestInbox(teamId: $teamId, first: $first, after: $after) {
+    requests { id user { id email } }
+    endCursor
+    hasNextPage
+  }
+}
+"""
+
+
+@pytest.fixture
+def data(db):
+    # 2 équipes de 4 membres, 3 demandes chacun; beaucoup de current_date identiques (bulk_create)
+    return seed_dataset(members_per_team=4, teams=2, days=10, requests_per_member=3)
+
+
+def _inbox(user, **variables):
+    from PrimeBank.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    result = schema.execute(INBOX, variables=variables, context_value=request)
+    return result
+
+
+def _page(user, **variables):
+    result = _inbox(user, **variables)
+    assert result.errors is None, result.errors
+    return result.data["changeRequestInbox"]
+
+
+def _expected_ids(team):
+    return list(
+        RequestModifyTimeClock.objects.filter(user__team=team)
+        .order_by("-current_date", "-id")
+        .values_list("id", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_manager_walks_their_team_inbox_with_cursors(data):
+    manager = data.managers[0]
+    seen, after = [], None
+    while True:
+        page = _page(manager, first=5, after=after)
+        seen.extend(int(r["id"]) for r in page["requests"])
+        if not page["hasNextPage"]:
+            break
+        after = page["endCursor"]
+
+    assert seen == _expected_ids(data.teams[0])
+    assert len(seen) > 5  # plusieurs pages
+
+
+@pytest.mark.django_db
+def test_each_page_is_one_query_with_users_joined(data):
+    manager = data.managers[0]
+    first_page = _page(manager, first=5)
+
+    with CaptureQueriesContext(connection) as captured:
+        page = _page(manager, first=5, after=first_page["endCursor"])
+
+    assert len(captured) == 1
+    assert all(r["user"]["email"] for r in page["requests"])
+
+
+@pytest.mark.django_db
+def test_admin_can_read_any_team_or_everything(data):
+    assert [int(r["id"]) for r in _page(data.admin, teamId=data.teams[1].id, first=100)["requests"]] == (
+        _expected_ids(data.teams[1])
+    )
+    assert len(_page(data.admin, first=100)["requests"]) == RequestModifyTimeClock.objects.count()
+
+
+@pytest.mark.django_db
+def test_access_and_argument_errors(data):
+    manager, member = data.managers[0], data.members[0]
+
+    assert "Not authorized to view change requests of this team" in str(
+        _inbox(manager, teamId=data.teams[1].id).errors[0]
+    )
+    assert "Not authorized to view change requests." in str(_inbox(member).errors[0])
+    assert "first must be between" in str(_inbox(manager, first=0).errors[0])
+    assert "Invalid cursor" in str(_inbox(manager, after="not-a-cursor").errors[0])
+
+
+def test_cursor_round_trip():
+    now = timezone.now()
+    assert decode_inbox_cursor(encode_inbox_cursor(SimpleNamespace(current_date=now, id=42))) == (now, 42)
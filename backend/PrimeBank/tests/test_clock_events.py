@@ -0,0 +1,145 @@
+"""Tests pour `clock_events.py` (journal ClockEvent et consommation par watermark)."""
+import threading
+from datetime import time, timedelta
+
+import pytest
+from django.db import connection, connections, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from PrimeBankApp.clock_events import consume, record_event, watermark
+from PrimeBankApp.models import ClockEvent, CustomUser, RequestModifyTimeClock, TimeClock
+from PrimeBankApp.synthetic_data import seed_dataset
+
+
+@pytest.fixture
+def data(db):
+    return seed_dataset(members_per_team=2, teams=1, days=3)
+
+
+def _execute(document, user, **variables):
+    from PrimeBank.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    result = schema.execute(document, variables=variables, context_value=request)
+    assert result.errors is None, result.errors
+    return result.data
+
+
+def _member(data):
+    return data.members[0]
+
+
+@pytest.mark.django_db
+def test_clock_mutations_append_events_in_order(data):
+    member, manager = _member(data), data.managers[0]
+    today = timezone.localdate()
+    TimeClock.objects.filter(user=member, day=today).delete()
+    yesterday = today - timedelta(days=1)
+    TimeClock.objects.get_or_create(user=member, day=yesterday, defaults={"clock_in": time(9), "clock_out": time(17)})
+    start = ClockEvent.objects.order_by("-seq").values_list("seq", flat=True).first() or 0
+
+    _execute("mutation($u: ID!) { clockIn(userId: $u) { timeClock { id } } }", member, u=member.id)
+    _execute("mutation($u: ID!) { clockOut(userId: $u) { timeClock { id } } }", member, u=member.id)
+    _execute(
+        "mutation($u: ID!, $d: Date!) { modifyClockEntry(userId: $u, day: $d, clockIn: \"08:00:00\") { timeClock { id } } }",
+        manager, u=member.id, d=yesterday.isoformat(),
+    )
+    request = RequestModifyTimeClock.objects.create(
+        user=member, day=yesterday, new_clock_in=time(7, 30), new_clock_out=time(16, 0)
+    )
+    _execute("mutation($r: ID!) { acceptedChangeRequest(requestId: $r, accepted: true) { message } }", manager, r=request.id)
+
+    events = list(ClockEvent.objects.filter(seq__gt=start).order_by("seq"))
+    assert [e.kind for e in events] == ["clock_in", "clock_out", "modified", "change_accepted"]
+    assert [e.seq for e in events] == sorted({e.seq for e in events})
+    assert [e.actor_id for e in events] == [member.id, member.id, manager.id, manager.id]
+    assert (events[-1].clock_in, events[-1].clock_out) == (time(7, 30), time(16, 0))
+    assert events[-1].day == yesterday
+
+
+@pytest.mark.django_db
+def test_consumer_only_sees_events_after_its_watermark(data):
+    tcs = list(TimeClock.objects.filter(user=_member(data)))
+    for tc in tcs:
+        record_event(ClockEvent.MODIFIED, tc)
+
+    # rollup incrémental: minutes pointées par (utilisateur, jour), recalculées pour les jours touchés
+    rollup, batches = {}, []
+
+    def handler(events):
+        batches.append([e.seq for e in events])
+        for e in events:
+            if e.clock_in and e.clock_out:
+                minutes = (e.clock_out.hour * 60 + e.clock_out.minute) - (e.clock_in.hour * 60 + e.clock_in.minute)
+                rollup[(e.user_id, e.day)] = minutes
+
+    assert consume("rollup", handler, batch_size=2) == len(tcs)
+    assert watermark("rollup") == ClockEvent.objects.order_by("-seq").values_list("seq", flat=True).first()
+    assert all(len(batch) <= 2 for batch in batches)
+
+    batches.clear()
+    assert consume("rollup", handler) == 0
+    assert batches == []
+
+    latest = record_event(ClockEvent.MODIFIED, tcs[0])
+    assert consume("rollup", handler) == 1
+    assert batches == [[latest.seq]]
+    # chaque consommateur a son propre watermark
+    assert consume("export", lambda events: None) == len(tcs) + 1
+
+
+@pytest.mark.django_db
+def test_failed_handler_keeps_the_watermark(data):
+    record_event(ClockEvent.MODIFIED, TimeClock.objects.filter(user=_member(data)).first())
+
+    def failing(events):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        consume("payroll", failing)
+    assert watermark("payroll") == 0
+    assert consume("payroll", lambda events: None) == 1
+
+
+@pytest.mark.django_db
+def test_events_are_append_only(data):
+    event = record_event(ClockEvent.CLOCK_IN, TimeClock.objects.filter(user=_member(data)).first())
+    event.kind = ClockEvent.MODIFIED
+    with pytest.raises(ValueError):
+        event.save()
+    with pytest.raises(ValueError):
+        event.delete()
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="concurrent writers need PostgreSQL")
+@pytest.mark.django_db(transaction=True)
+def test_later_commit_never_hides_an_earlier_seq():
+    user = CustomUser.objects.create(email="seq@x.com", phone_number="0600000090")
+    tc = TimeClock.objects.create(user=user, day=timezone.localdate(), clock_in=time(9))
+    later, seen = [], []
+
+    def in_thread(target):
+        def run():
+            try:
+                target()
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    with transaction.atomic():
+        earlier = record_event(ClockEvent.MODIFIED, tc)
+        # seq plus grand, transaction plus courte: sans verrou elle serait visible la première
+        writer = in_thread(lambda: later.append(record_event(ClockEvent.MODIFIED, tc)))
+        writer.join(0.5)
+        assert writer.is_alive()
+        in_thread(lambda: consume("cdc", lambda events: seen.extend(e.seq for e in events))).join()
+        assert seen == []
+
+    writer.join()
+    assert consume("cdc", lambda events: seen.extend(e.seq for e in events)) == 2
+    assert seen == [earlier.seq, later[0].seq]
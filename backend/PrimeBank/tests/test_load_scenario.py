@@ -0,0 +1,107 @@
+"""Tests unitaires pour `load_scenario.py` (scénario de charge)."""
+import threading
+from datetime import date
+
+import pytest
+
+from PrimeBankApp import load_scenario
+from PrimeBankApp.load_scenario import LoadScenario, ScenarioError, Stats, percentile
+
+
+class FakeClient:
+    """Simule le serveur: enregistre les appels, échoue sur demande."""
+
+    def __init__(self, fail_clock_in_for=()):
+        self.calls = []
+        self.fail_clock_in_for = set(fail_clock_in_for)
+
+    def graphql(self, query, variables=None, token=None):
+        self.calls.append((query, variables, token))
+        if query == load_scenario.TOKEN_AUTH:
+            return {"tokenAuth": {"token": f"tok-{variables['email']}"}}
+        if query == load_scenario.CLOCK_IN:
+            if variables["userId"] in self.fail_clock_in_for:
+                raise ScenarioError("This user already clocked in today.")
+            return {"clockIn": {"timeClock": {"id": 1}}}
+        if query in load_scenario.EXPORT_QUERIES.values():
+            field = "exportTimeClockCsv" if "Csv" in query else "exportTimeClockPdf"
+            return {field: {"downloadUrl": f"/api/export/timeclock/x/{variables['userId']}/"}}
+        return {}
+
+    def download(self, path, token=None):
+        self.calls.append(("GET", path, token))
+        return b"data"
+
+
+USERS = [
+    {"id": 1, "email": "m@x", "is_manager": True, "team_member_ids": [2, 3]},
+    {"id": 2, "email": "a@x", "is_manager": False, "team_member_ids": []},
+    {"id": 3, "email": "b@x", "is_manager": False, "team_member_ids": []},
+]
+
+
+def test_percentile():
+    values = sorted([0.1, 0.2, 0.3, 0.4, 1.0])
+    assert percentile(values, 0.5) == 0.3
+    assert percentile(values, 0.99) == 1.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_stats_summary_counts_errors():
+    stats = Stats()
+    stats.record("clockIn", 0.01, started=10.0)
+    stats.record("clockIn", 0.03, ok=False, started=10.47)
+    ((operation, count, errors, p50, _, _, worst, rate),) = stats.summary()
+    assert (operation, count, errors) == ("clockIn", 2, 1)
+    assert worst == 30.0
+    assert rate == pytest.approx(2 / 0.5)
+    assert stats.count() == 2
+
+
+def test_clock_in_storm_logs_in_and_records_errors():
+    client = FakeClient(fail_clock_in_for={3})
+    scenario = LoadScenario(client, USERS, "pwd", concurrency=3)
+
+    scenario.clock_in_storm(window=0)
+
+    summary = {row[0]: row for row in scenario.stats.summary()}
+    assert summary["tokenAuth"][1:3] == (3, 0)
+    assert summary["clockIn"][1:3] == (3, 1)
+    clock_tokens = {token for query, _, token in client.calls if query == load_scenario.CLOCK_IN}
+    assert clock_tokens == {"tok-m@x", "tok-a@x", "tok-b@x"}
+
+
+def test_storm_and_polling_run_every_user_at_once():
+    """Plus d'utilisateurs que de clients: tous arrivent dans la fenêtre, aucun n'attend un autre."""
+    users = [{"id": i, "email": f"u{i}@x", "is_manager": False, "team_member_ids": []} for i in range(12)]
+    arrived = set()
+    barrier = threading.Barrier(len(users), timeout=5)
+
+    class WaitingClient(FakeClient):
+        def graphql(self, query, variables=None, token=None):
+            if query == load_scenario.CLOCK_IN:
+                # ne passe que si les 12 utilisateurs sont en vol en même temps
+                barrier.wait()
+                arrived.add(variables["userId"])
+            return super().graphql(query, variables, token)
+
+    scenario = LoadScenario(WaitingClient(), users, "pwd", concurrency=2)
+    scenario.clock_in_storm(window=0)
+    assert arrived == set(range(12))
+
+    scenario.dashboard_polling(duration=0.05, interval=0.01)
+    summary = {row[0]: row for row in scenario.stats.summary()}
+    assert summary["kpiClock"][1] >= len(users)
+
+
+def test_month_end_exports_downloads_each_member_and_format():
+    client = FakeClient()
+    scenario = LoadScenario(client, USERS, "pwd", concurrency=2)
+
+    scenario.month_end_exports(date(2025, 1, 1), date(2025, 1, 31), formats=("csv", "pdf"))
+
+    downloads = sorted(path for method, path, _ in client.calls if method == "GET")
+    assert downloads == sorted(["/api/export/timeclock/x/2/", "/api/export/timeclock/x/3/"] * 2)
+    summary = {row[0]: row[1] for row in scenario.stats.summary()}
+    assert summary["csv download"] == 2
+    assert summary["exportTimeClockPdf (token)"] == 2
@@ -0,0 +1,102 @@
+"""Tests unitaires pour `metrics.py` et la vue `/metrics`."""
+from types import SimpleNamespace
+
+import pytest
+
+from django.test import RequestFactory, override_settings
+
+import PrimeBankApp.metrics as metrics
+from PrimeBankApp.views_metrics import metrics as metrics_view
+
+
+def make_info(field_name, prev=None):
+    # Fabrique un objet info minimal: path.prev None => champ racine
+    return SimpleNamespace(
+        field_name=field_name,
+        parent_type=SimpleNamespace(name="Query"),
+        path=SimpleNamespace(prev=prev),
+    )
+
+
+def test_histogram_render_is_cumulative():
+    h = metrics.Histogram("t_seconds", "Test.", ["field"], buckets=(0.1, 1.0))
+    h.observe(0.05, field="a")
+    h.observe(0.5, field="a")
+    h.observe(5, field="a")
+    text = "\n".join(h.render())
+
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{field="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{field="a",le="1.0"} 2' in text
+    assert 't_seconds_bucket{field="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{field="a"} 3' in text
+    assert 't_seconds_sum{field="a"} 5.55' in text
+
+
+def test_counter_escapes_labels():
+    c = metrics.Counter("t_total", "Test.", ["field"])
+    c.inc(field='a"b')
+    c.inc(2, field='a"b')
+    assert 't_total{field="a\\"b"} 3' in c.render()
+
+
+def test_middleware_records_root_fields_only(monkeypatch):
+    observed = []
+    monkeypatch.setattr(metrics.GRAPHQL_FIELD_SECONDS, "observe", lambda value, **labels: observed.append(labels["field"]))
+    middleware = metrics.MetricsMiddleware()
+
+    assert middleware.resolve(lambda root, info: "ok", None, make_info("kpiClock")) == "ok"
+    assert middleware.resolve(lambda root, info: "nested", None, make_info("id", prev=object())) == "nested"
+
+    assert observed == ["Query.kpiClock"]
+
+
+def test_middleware_counts_errors(monkeypatch):
+    errors = []
+    monkeypatch.setattr(metrics.GRAPHQL_FIELD_ERRORS, "inc", lambda amount=1, **labels: errors.append(labels["field"]))
+
+    def boom(root, info):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        metrics.MetricsMiddleware().resolve(boom, None, make_info("users"))
+    assert errors == ["Query.users"]
+
+
+def test_query_counter_wrapper():
+    counter = metrics.QueryCounter()
+    assert counter(lambda sql, params, many, context: "rows", "SELECT 1", (), False, {}) == "rows"
+    assert counter.count == 1
+    assert counter.duration >= 0
+
+
+def test_observe_stream_records_after_exhaustion(monkeypatch):
+    observed = []
+    monkeypatch.setattr(metrics.EXPORT_RENDER_SECONDS, "observe", lambda value, **labels: observed.append(labels["format"]))
+
+    stream = metrics.observe_stream(iter(["a", "b"]), "csv")
+    assert next(stream) == "a"
+    assert observed == []
+    assert list(stream) == ["b"]
+    assert observed == ["csv"]
+
+
+@override_settings(METRICS_TOKEN="s3cret")
+def test_metrics_view_exposition_format():
+    response = metrics_view(RequestFactory().get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret"))
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert b"# TYPE primebank_graphql_field_duration_seconds histogram" in response.content
+
+
+@override_settings(METRICS_TOKEN="s3cret")
+def test_metrics_view_requires_token_when_configured():
+    factory = RequestFactory()
+    assert metrics_view(factory.get("/metrics")).status_code == 403
+    assert metrics_view(factory.get("/metrics", HTTP_AUTHORIZATION="Bearer nope")).status_code == 403
+    assert metrics_view(factory.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")).status_code == 200
+
+
+@override_settings(METRICS_TOKEN=None)
+def test_metrics_view_is_refused_without_a_configured_token():
+    assert metrics_view(RequestFactory().get("/metrics")).status_code == 403
@@ -0,0 +1,115 @@
+"""Tests unitaires pour `profiling.py` et les vues `/profiles/`."""
+import os
+import sys
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, override_settings
+
+import PrimeBankApp.profiling as profiling
+from PrimeBankApp.views_profiles import download_profile, list_profiles
+
+ADMIN = SimpleNamespace(is_authenticated=True, is_admin=True, is_superuser=False)
+EMPLOYEE = SimpleNamespace(is_authenticated=True, is_admin=False, is_superuser=False)
+
+
+def make_request(user, path="/api/graphql", **extra):
+    request = RequestFactory().post(path, **extra)
+    request.user = user
+    return request
+
+
+def slow_view(request):
+    request.resolver_match = SimpleNamespace(url_name="graphql")
+    time.sleep(0.05)
+    return HttpResponse("ok")
+
+
+def test_collapse_stack_goes_from_root_to_leaf():
+    def leaf():
+        return profiling.collapse_stack(sys._getframe())
+
+    stack = leaf().split(";")
+    assert stack[-1] == f"{__name__}.test_collapse_stack_goes_from_root_to_leaf.<locals>.leaf"
+    assert stack[-2] == f"{__name__}.test_collapse_stack_goes_from_root_to_leaf"
+
+
+def test_sampler_counts_samples_of_target_thread():
+    sampler = profiling.StackSampler(threading.get_ident())
+    sampler.sample()
+    sampler.sample()
+
+    (line,) = sampler.collapsed().splitlines()
+    stack, count = line.rsplit(" ", 1)
+    assert count == "2"
+    assert stack.endswith("StackSampler.sample")
+
+
+def test_middleware_ignores_non_admin(tmp_path):
+    middleware = profiling.ProfilingMiddleware(slow_view)
+    with override_settings(PROFILE_DIR=str(tmp_path)):
+        response = middleware(make_request(EMPLOYEE, HTTP_X_PROFILE="1"))
+
+    assert "X-Profile-Id" not in response
+    assert os.listdir(tmp_path) == []
+
+
+def test_middleware_profiles_admin_request(tmp_path):
+    middleware = profiling.ProfilingMiddleware(slow_view)
+    with override_settings(PROFILE_DIR=str(tmp_path), PROFILE_SAMPLE_INTERVAL=0.001):
+        response = middleware(make_request(ADMIN, "/api/graphql?profile=1"))
+
+    name = response["X-Profile-Id"]
+    assert profiling.PROFILE_NAME_RE.match(name)
+    assert "_graphql_" in name
+    content = (tmp_path / name).read_text()
+    # La vue dort: au moins un échantillon doit la contenir
+    assert f"{__name__}.slow_view" in content
+
+
+def test_cleanup_applies_retention_and_max_files(tmp_path):
+    now = time.time()
+    names = [f"2025010{i}T000000_graphql_0000000{i}.collapsed" for i in range(1, 5)]
+    for age_days, name in zip((0, 1, 2, 30), names):
+        path = tmp_path / name
+        path.write_text("a;b 1\n")
+        mtime = now - age_days * 86400
+        os.utime(path, (mtime, mtime))
+    (tmp_path / "unrelated.txt").write_text("x")
+
+    with override_settings(PROFILE_RETENTION=timedelta(days=7), PROFILE_MAX_FILES=2):
+        removed = profiling.cleanup_profiles(str(tmp_path), now=now)
+
+    assert removed == 2
+    assert sorted(os.listdir(tmp_path)) == sorted([names[0], names[1], "unrelated.txt"])
+
+
+def test_profile_views_require_admin():
+    assert list_profiles(make_request(EMPLOYEE)).status_code == 403
+    assert download_profile(make_request(EMPLOYEE), "x.collapsed").status_code == 403
+
+
+def test_download_rejects_unknown_names(tmp_path):
+    with override_settings(PROFILE_DIR=str(tmp_path)):
+        with pytest.raises(Http404):
+            download_profile(make_request(ADMIN), "..%2Fsettings.py")
+        with pytest.raises(Http404):
+            download_profile(make_request(ADMIN), "20250101T000000_graphql_deadbeef.collapsed")
+
+
+def test_list_and_download_profile(tmp_path):
+    name = "20250101T000000_graphql_deadbeef.collapsed"
+    (tmp_path / name).write_text("a;b 3\n")
+
+    with override_settings(PROFILE_DIR=str(tmp_path)):
+        listing = list_profiles(make_request(ADMIN))
+        response = download_profile(make_request(ADMIN), name)
+
+    assert b'"name": "20250101T000000_graphql_deadbeef.collapsed"' in listing.content
+    assert b"".join(response.streaming_content) == b"a;b 3\n"
+    assert name in response["Content-Disposition"]
@@ -0,0 +1,308 @@
+"""
+Tests de régression du nombre de requêtes SQL.
+
+Chaque champ racine (query et mutation) de `PrimeBank/schema.py` est exécuté
+via /graphql sur deux jeux de données synthétiques de tailles différentes:
+le nombre de requêtes doit rester identique (pas de N+1).
+"""
+from collections import namedtuple
+from datetime import time, timedelta
+
+import pytest
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql_jwt.refresh_token.shortcuts import create_refresh_token
+from graphql_jwt.shortcuts import get_token
+
+from PrimeBank.schema import schema
+
+try:
+    # /graphql passe par l'URLconf, qui importe les vues PDF (WeasyPrint)
+    import PrimeBank.urls  # noqa: F401
+except OSError:
+    pytest.skip("WeasyPrint system libraries unavailable", allow_module_level=True)
+
+from PrimeBankApp.models import CustomUser, RequestModifyTimeClock, TimeClock
+from PrimeBankApp.synthetic_data import seed_dataset
+
+# setup(data) -> (utilisateur connecté ou None, variables)
+Case = namedtuple("Case", ["document", "setup"])
+
+
+def _today():
+    return timezone.localdate()
+
+
+def _member(data):
+    return data.members[0]
+
+
+def _manager(data):
+    return data.managers[0]
+
+
+def _team_members(data):
+    return [m for m in data.members if m.team_id == data.teams[0].id]
+
+
+def _ensure_clock(user, day, clock_out=time(17, 0)):
+    TimeClock.objects.filter(user=user, day=day).delete()
+    return TimeClock.objects.create(user=user, day=day, clock_in=time(8, 0), clock_out=clock_out)
+
+
+def _setup_clock_in(data):
+    TimeClock.objects.filter(user=_member(data), day=_today()).delete()
+    return _member(data), {"userId": _member(data).id}
+
+
+def _setup_clock_out(data):
+    _ensure_clock(_member(data), _today(), clock_out=None)
+    return _member(data), {"userId": _member(data).id}
+
+
+def _setup_modify_clock(data):
+    day = _today() - timedelta(days=1)
+    _ensure_clock(_member(data), day)
+    return _manager(data), {"userId": _member(data).id, "day": day.isoformat()}
+
+
+def _setup_create_request(data):
+    day = _today() - timedelta(days=1)
+    _ensure_clock(_member(data), day)
+    return _member(data), {"day": day.isoformat()}
+
+
+def _setup_accept_request(data):
+    day = _today() - timedelta(days=1)
+    _ensure_clock(_member(data), day)
+    request = RequestModifyTimeClock.objects.create(
+        user=_member(data), day=day, new_clock_in=time(9, 0), new_clock_out=time(18, 0)
+    )
+    return _manager(data), {"requestId": request.id}
+
+
+def _setup_resolve_requests(data):
+    # Toutes les demandes de l'équipe: leur nombre grandit avec le jeu de données
+    pending = RequestModifyTimeClock.objects.filter(user__team=data.teams[0]).order_by("id")
+    decisions = [{"requestId": r.id, "accepted": i % 2 == 0} for i, r in enumerate(pending)]
+    return _manager(data), {"decisions": decisions}
+
+
+def _setup_add_user_to_team(data):
+    newcomer = _team_members(data)[-1]
+    CustomUser.objects.filter(pk=newcomer.pk).update(team=None)
+    return _manager(data), {"userId": newcomer.id, "teamId": data.teams[0].id}
+
+
+def _setup_refresh_tokens(data):
+    # Autant de tokens que de membres: le résolveur ne doit pas faire une requête par token
+    for _ in data.members:
+        create_refresh_token(_member(data))
+    return data.admin, {"email": _member(data).email}
+
+
+def _setup_refresh_token(data):
+    return None, {"token": create_refresh_token(_member(data)).get_token()}
+
+
+EXPORT_FIELDS = "downloadUrl filename expiresAt"
+
+CASES = {
+    # --- queries
+    "users": Case(
+        "query { users { id email team { id description } teamManaged { id } } }",
+        lambda d: (d.admin, {}),
+    ),
+    "user": Case(
+        "query($id: ID!) { user(id: $id) { id email team { id } } }",
+        lambda d: (d.admin, {"id": _member(d).id}),
+    ),
+    "userByEmail": Case(
+        "query($email: String!) { userByEmail(email: $email) { id team { id } } }",
+        lambda d: (_manager(d), {"email": _member(d).email}),
+    ),
+    "me": Case(
+        "query { me { id email team { id } teamManaged { id } } }",
+        lambda d: (_member(d), {}),
+    ),
+    "team": Case(
+        "query($id: ID!) { team(id: $id) { id description nrMembers } }",
+        lambda d: (d.admin, {"id": d.teams[0].id}),
+    ),
+    "teams": Case(
+        "query { teams { id description nrMembers } }",
+        lambda d: (d.admin, {}),
+    ),
+    "timeClocks": Case(
+        "query { timeClocks { id day clockIn clockOut user { id email } } }",
+        lambda d: (d.admin, {}),
+    ),
+    "timeClock": Case(
+        "query($userId: ID!) { timeClock(userId: $userId) { id day user { id } } }",
+        lambda d: (_member(d), {"userId": _member(d).id}),
+    ),
+    "kpiClock": Case(
+        "query($userId: ID) { kpiClock(userId: $userId, period: 30) "
+        "{ totalHours presenceRate workedDays dailyTotals { day totalHours } } }",
+        lambda d: (_manager(d), {"userId": _member(d).id}),
+    ),
+    "userTeamPresence": Case(
+        "query { userTeamPresence(period: 30) { id firstname status presence score } }",
+        lambda d: (_manager(d), {}),
+    ),
+    "allRequests": Case(
+        "query { allRequests { id day currentDate newClockIn user { id email firstName lastName } } }",
+        lambda d: (d.admin, {}),
+    ),
+    "changeRequestInbox": Case(
+        "query { changeRequestInbox(first: 5) { requests { id currentDate user { id email } } "
+        "endCursor hasNextPage } }",
+        lambda d: (_manager(d), {}),
+    ),
+    "exportTimeClockChanges": Case(
+        "query($teamId: ID) { exportTimeClockChanges(teamId: $teamId) { downloadUrl expiresAt } }",
+        lambda d: (_manager(d), {"teamId": d.teams[0].id}),
+    ),
+    "exportTimeClockCsv": Case(
+        "query($userId: ID) { exportTimeClockCsv(userId: $userId) { %s } }" % EXPORT_FIELDS,
+        lambda d: (_manager(d), {"userId": _member(d).id}),
+    ),
+    "exportTimeClockPdf": Case(
+        "query($userId: ID) { exportTimeClockPdf(userId: $userId) { %s } }" % EXPORT_FIELDS,
+        lambda d: (_manager(d), {"userId": _member(d).id}),
+    ),
+    "exportTimeClockParquet": Case(
+        "query($userId: ID) { exportTimeClockParquet(userId: $userId) { %s } }" % EXPORT_FIELDS,
+        lambda d: (_manager(d), {"userId": _member(d).id}),
+    ),
+    "exportTimeClockZip": Case(
+        "query($userIds: [ID!]!) { exportTimeClockZip(userIds: $userIds) { %s } }" % EXPORT_FIELDS,
+        lambda d: (_manager(d), {"userIds": [m.id for m in _team_members(d)]}),
+    ),
+    "refreshTokensByEmail": Case(
+        "query($email: String!) { refreshTokensByEmail(email: $email) { id userEmail isRevoked } }",
+        _setup_refresh_tokens,
+    ),
+    # --- mutations
+    "createUser": Case(
+        "mutation { createUser(email: \"new@primebank.test\", password: \"pwd\", phoneNumber: \"+33999999999\", "
+        "firstName: \"New\", lastName: \"User\") { user { id team { id } } } }",
+        lambda d: (d.admin, {}),
+    ),
+    "updateUser": Case(
+        "mutation($id: ID!) { updateUser(id: $id, firstName: \"Renamed\") { user { id firstName team { id } } } }",
+        lambda d: (d.admin, {"id": _member(d).id}),
+    ),
+    "deleteUser": Case(
+        "mutation($id: ID!) { deleteUser(id: $id) { ok } }",
+        lambda d: (d.admin, {"id": _member(d).id}),
+    ),
+    "createTeam": Case(
+        "mutation { createTeam(description: \"New team\") { team { id nrMembers } } }",
+        lambda d: (d.admin, {}),
+    ),
+    "updateTeam": Case(
+        "mutation($id: ID!) { updateTeam(id: $id, description: \"Renamed\") { team { id nrMembers } } }",
+        lambda d: (d.admin, {"id": d.teams[0].id}),
+    ),
+    "deleteTeam": Case(
+        "mutation($id: ID!) { deleteTeam(id: $id) { ok } }",
+        lambda d: (d.admin, {"id": d.teams[0].id}),
+    ),
+    "addUserToTeam": Case(
+        "mutation($userId: ID!, $teamId: ID!) { addUserToTeam(userId: $userId, teamId: $teamId) "
+        "{ team { id nrMembers } } }",
+        _setup_add_user_to_team,
+    ),
+    "setTeamManager": Case(
+        "mutation($teamId: ID!, $userId: ID!) { setTeamManager(teamId: $teamId, managerUserId: $userId) { ok } }",
+        lambda d: (d.admin, {"teamId": d.teams[0].id, "userId": _member(d).id}),
+    ),
+    "clockIn": Case(
+        "mutation($userId: ID!) { clockIn(userId: $userId) { timeClock { id user { id } } } }",
+        _setup_clock_in,
+    ),
+    "clockOut": Case(
+        "mutation($userId: ID!) { clockOut(userId: $userId) { timeClock { id clockOut } } }",
+        _setup_clock_out,
+    ),
+    "modifyClockEntry": Case(
+        "mutation($userId: ID!, $day: Date) { modifyClockEntry(userId: $userId, day: $day, clockIn: \"08:30:00\") "
+        "{ timeClock { id clockIn } } }",
+        _setup_modify_clock,
+    ),
+    "createRequestModifyTimeClock": Case(
+        "mutation($day: Date!) { createRequestModifyTimeClock(day: $day, newClockIn: \"09:00:00\", "
+        "newClockOut: \"18:00:00\") { request { id user { id } } } }",
+        _setup_create_request,
+    ),
+    "acceptedChangeRequest": Case(
+        "mutation($requestId: ID!) { acceptedChangeRequest(requestId: $requestId, accepted: true) { message } }",
+        _setup_accept_request,
+    ),
+    "resolveChangeRequests": Case(
+        "mutation($decisions: [ChangeRequestDecisionInput!]!) { resolveChangeRequests(decisions: $decisions) "
+        "{ results { requestId ok message } } }",
+        _setup_resolve_requests,
+    ),
+    "tokenAuth": Case(
+        "mutation($email: String!, $password: String!) { tokenAuth(email: $email, password: $password) "
+        "{ token refreshToken } }",
+        lambda d: (None, {"email": _member(d).email, "password": d.password}),
+    ),
+    "verifyToken": Case(
+        "mutation($token: String!) { verifyToken(token: $token) { payload } }",
+        lambda d: (None, {"token": get_token(_member(d))}),
+    ),
+    "refreshToken": Case(
+        "mutation($token: String!) { refreshToken(refreshToken: $token) { token refreshToken } }",
+        _setup_refresh_token,
+    ),
+    "revokeToken": Case(
+        "mutation($token: String!) { revokeToken(refreshToken: $token) { revoked } }",
+        _setup_refresh_token,
+    ),
+    "deleteTokenCookie": Case(
+        "mutation { deleteTokenCookie { deleted } }",
+        lambda d: (_member(d), {}),
+    ),
+    "deleteRefreshTokenCookie": Case(
+        "mutation { deleteRefreshTokenCookie { deleted } }",
+        lambda d: (_member(d), {}),
+    ),
+}
+
+
+def execute_case(case, size):
+    """Seed `size` membres par équipe puis exécute l'opération via /graphql."""
+    data = seed_dataset(members_per_team=size, teams=2, days=size * 2)
+    actor, variables = case.setup(data)
+    client = Client()
+    if actor is not None:
+        client.cookies["JWT"] = get_token(actor)
+
+    with CaptureQueriesContext(connection) as captured:
+        response = client.post(
+            "/graphql",
+            data={"query": case.document, "variables": variables},
+            content_type="application/json",
+        )
+
+    body = response.json()
+    assert "errors" not in body, body["errors"]
+    return captured
+
+
+def test_every_root_field_has_a_case():
+    graphql_schema = schema.graphql_schema
+    root_fields = set(graphql_schema.query_type.fields) | set(graphql_schema.mutation_type.fields)
+    assert root_fields == set(CASES)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("field", sorted(CASES))
+def test_query_count_does_not_grow_with_dataset(field, assert_constant_queries):
+    assert_constant_queries(lambda size: execute_case(CASES[field], size))
@@ -0,0 +1,288 @@
+"""
+Instantanés de plans d'exécution (EXPLAIN) des requêtes TimeClock critiques.
+
+Chaque opération (résolveurs de `schema_kpi.py` / `schema_time_clock.py`, vues
+d'export CSV/PDF/ZIP/Parquet) est exécutée sur PostgreSQL avec le jeu de données
+synthétique; le SQL capturé qui lit `PrimeBankApp_timeclock` passe par
+`EXPLAIN (FORMAT JSON)`. Le test échoue si:
+  - un Seq Scan apparaît sur une grande table;
+  - les accès (index utilisés) diffèrent de `plan_snapshots.json`.
+
+La base est construite par les migrations (TimeClock partitionnée par mois, 0015):
+partitions et index de partition sont ramenés à la table et à l'index parents,
+l'instantané ne dépend donc ni de la date ni du nombre de mois.
+
+PostgreSQL requis (ignoré sur SQLite):
+    pytest PrimeBank/tests/test_query_plans.py --ds=PrimeBank.settings --migrations --create-db --no-cov
+Mise à jour des instantanés après un changement voulu: UPDATE_PLAN_SNAPSHOTS=1.
+"""
+import json
+import os
+import re
+from datetime import time, timedelta
+from pathlib import Path
+
+import pytest
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql_jwt.shortcuts import get_token
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="EXPLAIN snapshots need PostgreSQL (run with --ds=PrimeBank.settings)",
+)
+
+try:
+    # Client -> URLconf -> vues PDF (WeasyPrint)
+    import PrimeBank.urls  # noqa: F401
+except OSError:
+    pytest.skip("WeasyPrint system libraries unavailable", allow_module_level=True)
+
+from PrimeBankApp.models import RequestModifyTimeClock, TimeClock
+from PrimeBankApp.partitions import ensure_partitions
+from PrimeBankApp.synthetic_data import seed_dataset
+
+SNAPSHOT_PATH = Path(__file__).with_name("plan_snapshots.json")
+TIMECLOCK_TABLE = '"PrimeBankApp_timeclock"'
+# Tables pour lesquelles un Seq Scan est une régression
+LARGE_TABLES = {"PrimeBankApp_timeclock"}
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+SERVER_CURSOR = re.compile(r"^DECLARE .*? CURSOR (?:WITH(?:OUT)? HOLD )?FOR ", re.IGNORECASE)
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def root_name(relation):
+    """Table ou index parent d'une partition (le nom lui-même hors partitionnement)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE((SELECT relname FROM pg_class WHERE oid = pg_partition_root(to_regclass(%s))), %s)",
+            [f'"{relation}"', relation],
+        )
+        return cursor.fetchone()[0]
+
+
+def access_paths(plan):
+    """Accès aux tables, sans coûts ni estimations: 'seq <table>' ou 'index <nom>'."""
+    paths = set()
+    for node in plan_nodes(plan):
+        node_type = node["Node Type"]
+        if node_type == "Seq Scan":
+            paths.add(f"seq {root_name(node['Relation Name'])}")
+        elif node_type in INDEX_SCANS:
+            paths.add(f"index {root_name(node['Index Name'])}")
+    return sorted(paths)
+
+
+@pytest.fixture(scope="module")
+def plan_data(django_db_setup, django_db_blocker):
+    # Volume suffisant pour que le planificateur préfère les index: ~150k pointages
+    with django_db_blocker.unblock():
+        data = seed_dataset(members_per_team=25, teams=20, days=365, seed=1)
+        # 0015 ne crée que les mois à venir: l'année semée aurait tout mis dans DEFAULT
+        ensure_partitions(months_ahead=13, today=timezone.localdate() - timedelta(days=365))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    yield data
+    # données validées hors transaction de test: à vider pour les modules suivants
+    with django_db_blocker.unblock():
+        call_command("flush", interactive=False, verbosity=0)
+
+
+def _graphql(actor, document, variables=None):
+    client = Client()
+    client.cookies["JWT"] = get_token(actor)
+    response = client.post(
+        "/graphql", data={"query": document, "variables": variables or {}}, content_type="application/json"
+    )
+    body = response.json()
+    assert "errors" not in body, body["errors"]
+    return body["data"]
+
+
+def _export(actor, field, variables):
+    document = (
+        "query($userId: ID, $start: Date, $end: Date) { %s(userId: $userId, startDate: $start, endDate: $end) "
+        "{ downloadUrl } }" % field
+    )
+    return _graphql(actor, document, variables)[field]["downloadUrl"]
+
+
+def _download(actor, url):
+    client = Client()
+    client.cookies["JWT"] = get_token(actor)
+    response = client.get(url.removeprefix("/api"))
+    assert response.status_code == 200
+    if response.streaming:
+        b"".join(response.streaming_content)
+
+
+def _last_month():
+    end = timezone.localdate().replace(day=1) - timedelta(days=1)
+    return {"start": end.replace(day=1).isoformat(), "end": end.isoformat()}
+
+
+def _prepare_clock(user, day, clock_out=time(17, 0)):
+    TimeClock.objects.filter(user=user, day=day).delete()
+    TimeClock.objects.create(user=user, day=day, clock_in=time(8, 0), clock_out=clock_out)
+
+
+def _team_members(data):
+    manager = data.managers[0]
+    return [member for member in data.members if member.team_id == manager.team_managed_id]
+
+
+def _export_operation(field):
+    def prepare(data):
+        return lambda: _download(data.managers[0], _export(
+            data.managers[0], field, {"userId": data.members[0].id, **_last_month()}
+        ))
+    return prepare
+
+
+def _zip_operation(data):
+    team_ids = [member.id for member in _team_members(data)]
+    document = (
+        "query($ids: [ID!]!, $start: Date, $end: Date) { exportTimeClockZip(userIds: $ids, startDate: $start, "
+        "endDate: $end) { downloadUrl } }"
+    )
+    url = _graphql(data.managers[0], document, {"ids": team_ids, **_last_month()})
+    return lambda: _download(data.managers[0], url["exportTimeClockZip"]["downloadUrl"])
+
+
+def _clock_in_operation(data):
+    member = _team_members(data)[1]
+    TimeClock.objects.filter(user=member, day=timezone.localdate()).delete()
+    return lambda: _graphql(member, "mutation($u: ID!) { clockIn(userId: $u) { timeClock { id } } }", {"u": member.id})
+
+
+def _clock_out_operation(data):
+    member = _team_members(data)[2]
+    _prepare_clock(member, timezone.localdate(), clock_out=None)
+    return lambda: _graphql(member, "mutation($u: ID!) { clockOut(userId: $u) { timeClock { id } } }", {"u": member.id})
+
+
+def _modify_clock_operation(data):
+    member, day = _team_members(data)[3], timezone.localdate() - timedelta(days=1)
+    _prepare_clock(member, day)
+    return lambda: _graphql(
+        data.managers[0],
+        "mutation($u: ID!, $d: Date) { modifyClockEntry(userId: $u, day: $d, clockIn: \"08:30:00\") "
+        "{ timeClock { id } } }",
+        {"u": member.id, "d": day.isoformat()},
+    )
+
+
+def _create_request_operation(data):
+    member, day = _team_members(data)[4], timezone.localdate() - timedelta(days=2)
+    _prepare_clock(member, day)
+    return lambda: _graphql(
+        member,
+        "mutation($d: Date!) { createRequestModifyTimeClock(day: $d, newClockIn: \"09:00:00\", "
+        "newClockOut: \"18:00:00\") { request { id } } }",
+        {"d": day.isoformat()},
+    )
+
+
+def _accept_request_operation(data):
+    member, day = _team_members(data)[5], timezone.localdate() - timedelta(days=3)
+    _prepare_clock(member, day)
+    request = RequestModifyTimeClock.objects.create(
+        user=member, day=day, new_clock_in=time(9, 0), new_clock_out=time(18, 0)
+    )
+    return lambda: _graphql(
+        data.managers[0],
+        "mutation($r: ID!) { acceptedChangeRequest(requestId: $r, accepted: true) { message } }",
+        {"r": request.id},
+    )
+
+
+# nom -> prepare(data) -> opération à mesurer
+OPERATIONS = {
+    "kpiClock": lambda d: lambda: _graphql(
+        d.managers[0],
+        "query($u: ID) { kpiClock(userId: $u, period: 30) { totalHours } }",
+        {"u": d.members[0].id},
+    ),
+    "kpiClock.year": lambda d: lambda: _graphql(
+        d.managers[0],
+        "query($u: ID) { kpiClock(userId: $u, period: 365) { totalHours } }",
+        {"u": d.members[0].id},
+    ),
+    "userTeamPresence": lambda d: lambda: _graphql(
+        d.managers[0], "query { userTeamPresence(period: 30) { id presence score } }"
+    ),
+    "timeClock": lambda d: lambda: _graphql(
+        d.members[0], "query($u: ID!) { timeClock(userId: $u) { id } }", {"u": d.members[0].id}
+    ),
+    "clockIn": _clock_in_operation,
+    "clockOut": _clock_out_operation,
+    "modifyClockEntry": _modify_clock_operation,
+    "createRequestModifyTimeClock": _create_request_operation,
+    "acceptedChangeRequest": _accept_request_operation,
+    "export.csv": _export_operation("exportTimeClockCsv"),
+    "export.pdf": _export_operation("exportTimeClockPdf"),
+    "export.parquet": _export_operation("exportTimeClockParquet"),
+    "export.zip": _zip_operation,
+}
+
+
+def _timeclock_selects(captured):
+    # QuerySet.iterator() sur PostgreSQL: curseur serveur, le SELECT suit 'DECLARE ... CURSOR FOR'
+    sqls = (SERVER_CURSOR.sub("", query["sql"].lstrip()) for query in captured.captured_queries)
+    return [sql for sql in sqls if sql.upper().startswith("SELECT") and TIMECLOCK_TABLE in sql]
+
+
+def _load_snapshots():
+    return json.loads(SNAPSHOT_PATH.read_text()) if SNAPSHOT_PATH.exists() else {}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", sorted(OPERATIONS))
+def test_timeclock_query_plans(name, plan_data):
+    operation = OPERATIONS[name](plan_data)
+    with CaptureQueriesContext(connection) as captured:
+        operation()
+
+    selects = _timeclock_selects(captured)
+    assert selects, f"{name}: no TimeClock query captured"
+    plans = [explain(sql) for sql in selects]
+    current = [access_paths(plan) for plan in plans]
+
+    seq_scans = [
+        (sql, plan)
+        for sql, plan, paths in zip(selects, plans, current)
+        if any(path.split(" ", 1)[1] in LARGE_TABLES for path in paths if path.startswith("seq "))
+    ]
+    assert not seq_scans, "Sequential scan on a large table:\n" + "\n\n".join(
+        f"{sql}\n{json.dumps(plan, indent=2)}" for sql, plan in seq_scans
+    )
+
+    snapshots = _load_snapshots()
+    if os.getenv("UPDATE_PLAN_SNAPSHOTS"):
+        snapshots[name] = current
+        SNAPSHOT_PATH.write_text(json.dumps(dict(sorted(snapshots.items())), indent=2) + "\n")
+        return
+
+    assert name in snapshots, f"No snapshot for {name}; run with UPDATE_PLAN_SNAPSHOTS=1"
+    assert current == snapshots[name], (
+        f"{name}: access paths changed\nexpected: {snapshots[name]}\ncurrent:  {current}\n\n"
+        + "\n\n".join(selects)
+    )
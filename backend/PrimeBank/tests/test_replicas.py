@@ -0,0 +1,173 @@
+"""
+Tests pour `replicas.py` (lectures analytiques et exports sur le réplica).
+
+Deux bases SQLite distinctes (`default` et `replica`, settings_test.py): la
+réplication est simulée en copiant les lignes avec `_replicate`, une ligne absente
+du réplica joue le rôle d'une écriture pas encore répliquée. Avec les settings de
+production, le réplica éventuel est un miroir du primaire: tests ignorés.
+"""
+import base64
+import json
+from datetime import time, timedelta
+
+import pytest
+from django.conf import settings as django_settings
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import PrimeBankApp.replicas as replicas
+import PrimeBankApp.views_timeclock_export as views_export
+from PrimeBankApp.models import CustomUser, Team, TimeClock
+from PrimeBankApp.replicas import PIN_COOKIE, ReplicaPinMiddleware, read_alias_for
+
+_replica_db = django_settings.DATABASES.get("replica")
+pytestmark = pytest.mark.skipif(
+    _replica_db is None or _replica_db.get("TEST", {}).get("MIRROR") is not None,
+    reason="needs a separate replica test database (settings_test)",
+)
+both_databases = pytest.mark.django_db(databases=["default", "replica"])
+
+KPI_QUERY = "{ kpiClock(period: 7) { totalSeconds workedDays } }"
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICA = "replica"
+    return "replica"
+
+
+def _replicate(*models):
+    for model in models:
+        model.objects.using("replica").bulk_create(list(model.objects.using("default").order_by("pk")))
+
+
+@pytest.fixture
+def people(db):
+    today = timezone.localdate()
+    team = Team.objects.create(description="R")
+    admin = CustomUser.objects.create(email="adm@x.com", phone_number="0600000060", is_admin=True)
+    user = CustomUser.objects.create(email="r@x.com", phone_number="0600000061", first_name="R", last_name="P", team=team)
+    TimeClock.objects.create(user=user, day=today - timedelta(days=1), clock_in=time(9), clock_out=time(17))
+    _replicate(Team, CustomUser, TimeClock)
+    # écrite après la "réplication": seulement sur le primaire
+    TimeClock.objects.create(user=user, day=today - timedelta(days=2), clock_in=time(9), clock_out=time(10))
+    return admin, user, today
+
+
+def _execute(user, document, cookies=None):
+    from PrimeBank.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.COOKIES.update(cookies or {})
+    request.user = user
+    result = schema.execute(document, context_value=request)
+    assert result.errors is None, result.errors
+    return result.data
+
+
+@both_databases
+def test_analytics_resolvers_read_the_replica(people, replica):
+    admin, user, _ = people
+
+    with CaptureQueriesContext(connections["replica"]) as on_replica:
+        kpi = _execute(user, KPI_QUERY)["kpiClock"]
+    assert kpi == {"totalSeconds": 8 * 3600, "workedDays": 1}
+    assert len(on_replica) > 0
+
+    CustomUser.objects.using("replica").create(email="only@x.com", phone_number="0600000062")
+    emails = {row["email"] for row in _execute(admin, "{ users { email } }")["users"]}
+    assert "only@x.com" in emails
+    Team.objects.using("replica").create(description="only")
+    teams = _execute(admin, "{ teams { description nrMembers } }")["teams"]
+    assert teams == [{"description": "R", "nrMembers": 1}, {"description": "only", "nrMembers": 0}]
+
+
+@both_databases
+def test_without_replica_everything_reads_the_primary(people):
+    _, user, _ = people
+
+    with CaptureQueriesContext(connections["replica"]) as on_replica:
+        kpi = _execute(user, KPI_QUERY)["kpiClock"]
+    assert kpi == {"totalSeconds": 9 * 3600, "workedDays": 2}
+    assert len(on_replica) == 0
+
+
+@both_databases
+def test_writes_pin_the_writer_to_the_primary(people, replica, settings):
+    admin, user, today = people
+
+    def view(request):
+        # même requête: lecture après écriture sur le primaire
+        TimeClock.objects.create(user=request.user, day=today, clock_in=time(8))
+        assert read_alias_for(request) is None
+        return HttpResponse()
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    response = ReplicaPinMiddleware(view)(request)
+
+    assert not TimeClock.objects.using("replica").filter(day=today).exists()
+    # cookie signé: toute réplique du backend qui reçoit la requête suivante lit le primaire
+    pin = {PIN_COOKIE: response.cookies[PIN_COOKIE].value}
+    assert response.cookies[PIN_COOKIE]["httponly"]
+    assert _execute(user, KPI_QUERY, cookies=pin)["kpiClock"]["workedDays"] == 2
+
+    assert _execute(user, KPI_QUERY)["kpiClock"]["workedDays"] == 1
+    assert _execute(user, KPI_QUERY, cookies={PIN_COOKIE: "forged"})["kpiClock"]["workedDays"] == 1
+    # cookie d'un autre utilisateur, ou plus vieux que DATABASE_REPLICA_PIN_SECONDS
+    CustomUser.objects.create(email="primary@x.com", phone_number="0600000063")
+    assert "primary@x.com" not in {row["email"] for row in _execute(admin, "{ users { email } }", cookies=pin)["users"]}
+    settings.DATABASE_REPLICA_PIN_SECONDS = -1  # horodatage à la seconde: échéance déjà dépassée
+    assert _execute(user, KPI_QUERY, cookies=pin)["kpiClock"]["workedDays"] == 1
+
+
+@both_databases
+def test_lagging_or_unreachable_replica_falls_back_to_the_primary(people, replica, monkeypatch, settings):
+    _, user, _ = people
+    lag = {"seconds": 60.0}
+    checks = []
+
+    def fake_lag(alias):
+        checks.append(alias)
+        return lag["seconds"]
+
+    monkeypatch.setattr(replicas, "replica_lag_seconds", fake_lag)
+    settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL = 0
+
+    assert _execute(user, KPI_QUERY)["kpiClock"]["workedDays"] == 2
+    lag["seconds"] = None  # injoignable
+    assert _execute(user, KPI_QUERY)["kpiClock"]["workedDays"] == 2
+    lag["seconds"] = 0.5
+    assert _execute(user, KPI_QUERY)["kpiClock"]["workedDays"] == 1
+
+    # résultat réutilisé pendant l'intervalle, même si le retard a augmenté entre-temps
+    settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL = 60
+    lag["seconds"] = 60.0
+    count = len(checks)
+    assert _execute(user, KPI_QUERY)["kpiClock"]["workedDays"] == 1
+    assert len(checks) == count
+
+
+@both_databases
+def test_csv_export_streams_from_the_replica(people, replica):
+    admin, user, today = people
+    payload = {
+        "requester_id": admin.id,
+        "target_user_id": user.id,
+        "start_date": (today - timedelta(days=7)).isoformat(),
+        "end_date": today.isoformat(),
+    }
+    token = views_export.TimestampSigner().sign(base64.urlsafe_b64encode(json.dumps(payload).encode()).decode())
+    request = RequestFactory().get("/")
+    request.user = admin
+
+    response = views_export.export_timeclock_csv(request, token)
+    with CaptureQueriesContext(connections["replica"]) as on_replica:
+        body = b"".join(response.streaming_content).decode()
+
+    assert len(on_replica) > 0
+    assert "17:00:00" in body
+    assert "10:00:00" not in body
@@ -0,0 +1,128 @@
+"""Tests pour `request_cache.py` (mémoïsation par requête sur info.context)."""
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from PrimeBankApp.request_cache import request_cache
+
+
+def make_info(user=None):
+    return SimpleNamespace(context=SimpleNamespace(user=user))
+
+
+def test_cache_is_attached_to_the_context():
+    info = make_info()
+    assert request_cache(info) is request_cache(SimpleNamespace(context=info.context))
+    assert request_cache(make_info()) is not request_cache(info)
+
+
+def test_user_is_loaded_once_and_requester_is_reused():
+    requester = SimpleNamespace(id=1, is_authenticated=True)
+    cache = request_cache(make_info(requester))
+    loads = []
+
+    def load(pk):
+        loads.append(pk)
+        return SimpleNamespace(id=int(pk))
+
+    assert cache.user("1", load) is requester
+    assert cache.user("2", load) is cache.user(2, load)
+    assert loads == ["2"]
+    assert cache.hits == 1
+
+
+def test_errors_are_not_cached():
+    cache = request_cache(make_info())
+    calls = []
+
+    def load(pk):
+        calls.append(pk)
+        raise LookupError(pk)
+
+    for _ in range(2):
+        with pytest.raises(LookupError):
+            cache.user(5, load)
+    assert calls == [5, 5]
+
+
+def test_users_loads_only_missing_ids_in_one_call():
+    requester = SimpleNamespace(id=1, is_authenticated=True)
+    cache = request_cache(make_info(requester))
+    cache.user(2, lambda pk: SimpleNamespace(id=2))
+    batches = []
+
+    def load_many(ids):
+        batches.append(sorted(ids))
+        return [SimpleNamespace(id=int(pk)) for pk in ids if pk != "9"]
+
+    users = cache.users(["1", "2", "3", "4", "9"], load_many)
+
+    assert batches == [["3", "4", "9"]]
+    assert [u.id for u in users] == [1, 2, 3, 4]
+    assert users[0] is requester
+
+
+def test_permission_decisions_are_memoized_per_target():
+    cache = request_cache(make_info(SimpleNamespace(id=1, is_authenticated=True)))
+    decisions = []
+
+    def decide(team_id):
+        decisions.append(team_id)
+        return team_id == 10
+
+    assert [cache.allowed("manage", t, lambda t=t: decide(t)) for t in (10, 11, 10, 11)] == [True, False, True, False]
+    assert decisions == [10, 11]
+
+
+DASHBOARD = """
+query ManagerDashboard($member: ID!) {
+  week: kpiClock(userId: $member, period: 7) { totalHours }
+  month: kpiClock(userId: $member, period: 30) { totalHours }
+  today: userTeamPresence(period: 7) { id }
+  trend: userTeamPresence(period: 30) { id }
+  csv: exportTimeClockCsv(userId: $member) { downloadUrl }
+  pdf: exportTimeClockPdf(userId: $member) { downloadUrl }
+  user(id: $member) { id }
+}
+"""
+
+
+def _execute(document, user, variables):
+    from PrimeBank.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    with CaptureQueriesContext(connection) as captured:
+        result = schema.execute(document, variables=variables, context_value=request)
+    assert result.errors is None, result.errors
+    return captured
+
+
+def _user_queries(captured):
+    return [q["sql"] for q in captured.captured_queries if 'FROM "PrimeBankApp_customuser"' in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_composite_dashboard_loads_each_user_and_roster_once():
+    from PrimeBankApp.synthetic_data import seed_dataset
+
+    data = seed_dataset(members_per_team=4, teams=1, days=35)
+    manager, member = data.managers[0], data.members[0]
+    variables = {"member": member.id}
+
+    composite = _execute(DASHBOARD, manager, variables)
+    # Membre ciblé: 1 requête; roster de l'équipe: 1 requête
+    assert len(_user_queries(composite)) == 2
+
+    # Mêmes champs en opérations séparées (un contexte chacune): rien n'est partagé
+    fields = [line.strip() for line in DASHBOARD.strip().splitlines()[1:-1]]
+    separate = [
+        _execute("query($member: ID!) { %s }" % field, manager, variables) if "$member" in field
+        else _execute("query { %s }" % field, manager, {})
+        for field in fields
+    ]
+    assert len(composite) < sum(len(captured) for captured in separate)
+    assert sum(len(_user_queries(captured)) for captured in separate) == 7
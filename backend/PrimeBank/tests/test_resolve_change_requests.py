@@ -0,0 +1,97 @@
+"""Tests pour la mutation `resolveChangeRequests` de `schema_time_clock.py`."""
+from datetime import time, timedelta
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from PrimeBankApp.models import CustomUser, RequestModifyTimeClock, TimeClock
+from PrimeBankApp.schema_time_clock import MAX_BULK_DECISIONS
+from PrimeBankApp.synthetic_data import seed_dataset
+
+RESOLVE = """
+mutation($decisions: [ChangeRequestDecisionInput!]!) {
+  resolveChangeRequests(decisions: $decisions) { results { requestId ok message } }
+}
+"""
+
+
+@pytest.fixture
+def data(db):
+    return seed_dataset(members_per_team=4, teams=2, days=10, requests_per_member=2)
+
+
+def _resolve(user, decisions):
+    from PrimeBank.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    return schema.execute(RESOLVE, variables={"decisions": decisions}, context_value=request)
+
+
+def _results(user, decisions):
+    result = _resolve(user, decisions)
+    assert result.errors is None, result.errors
+    return {int(r["requestId"]): (r["ok"], r["message"]) for r in result.data["resolveChangeRequests"]["results"]}
+
+
+def _team_requests(team):
+    return list(RequestModifyTimeClock.objects.filter(user__team=team).order_by("id"))
+
+
+@pytest.mark.django_db
+def test_manager_resolves_a_batch_in_constant_queries(data):
+    requests = _team_requests(data.teams[0])
+    decisions = [{"requestId": r.id, "accepted": i % 2 == 0} for i, r in enumerate(requests)]
+
+    with CaptureQueriesContext(connection) as captured:
+        results = _results(data.managers[0], decisions)
+
+    # savepoint, demandes+utilisateurs, pointages, bulk_update, ClockEvent, delete, release
+    assert len(captured) == 7
+    assert all(ok for ok, _ in results.values())
+    assert not RequestModifyTimeClock.objects.filter(pk__in=[r.id for r in requests]).exists()
+    for rmtc in requests[::2]:
+        tc = TimeClock.objects.get(user_id=rmtc.user_id, day=rmtc.day)
+        assert (tc.clock_in, tc.clock_out) == (rmtc.new_clock_in, rmtc.new_clock_out)
+    for rmtc in requests[1::2]:
+        tc = TimeClock.objects.get(user_id=rmtc.user_id, day=rmtc.day)
+        assert (tc.clock_in, tc.clock_out) == (rmtc.old_clock_in, rmtc.old_clock_out)
+
+
+@pytest.mark.django_db
+def test_per_item_failures_do_not_block_the_others(data):
+    mine, other = _team_requests(data.teams[0]), _team_requests(data.teams[1])
+    member = CustomUser.objects.filter(team=data.teams[0], team_managed__isnull=True).first()
+    day = timezone.localdate() - timedelta(days=400)
+    orphan = RequestModifyTimeClock.objects.create(user=member, day=day, new_clock_in=time(9), new_clock_out=time(17))
+
+    results = _results(data.managers[0], [
+        {"requestId": mine[0].id, "accepted": True},
+        {"requestId": other[0].id, "accepted": False},
+        {"requestId": orphan.id, "accepted": True},
+        {"requestId": 999999, "accepted": True},
+        {"requestId": mine[0].id, "accepted": False},
+    ])
+
+    assert results == {
+        mine[0].id: (True, "Change request accepted and applied."),
+        other[0].id: (False, "Not authorized to accept this request."),
+        orphan.id: (False, f"No TimeClock entry for user {member.id} on {day}."),
+        999999: (False, "RequestModifyTimeClock not found."),
+    }
+    remaining = set(RequestModifyTimeClock.objects.values_list("id", flat=True))
+    assert mine[0].id not in remaining
+    assert {other[0].id, orphan.id} <= remaining
+
+
+@pytest.mark.django_db
+def test_admin_resolves_any_team_and_batch_size_is_bounded(data):
+    requests = _team_requests(data.teams[1])
+    results = _results(data.admin, [{"requestId": r.id, "accepted": False} for r in requests])
+    assert all(ok for ok, _ in results.values())
+
+    too_many = [{"requestId": i, "accepted": False} for i in range(MAX_BULK_DECISIONS + 1)]
+    assert "At most" in str(_resolve(data.admin, too_many).errors[0])
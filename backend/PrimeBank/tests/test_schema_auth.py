@@ -18,7 +18,7 @@ class FakeUser:
 def test_jwt_payload_with_default_payload(monkeypatch):
     # Cas où le payload par défaut est présent
     monkeypatch.setattr(schema_auth, "_default_payload", lambda user, ctx: {"sub": "ok"})
-    user = FakeUser(id=1, email="a@x.com", first_name="A", last_name="B", is_admin=True, team=type("T", (), {"id": 5})(), team_managed=None, hour_contract=35, phone_number="123")
+    user = FakeUser(id=1, email="a@x.com", first_name="A", last_name="B", is_admin=True, team_id=5, team_managed_id=None, hour_contract=35, phone_number="123")
     payload = schema_auth.jwt_payload(user)
     assert payload.get("user_id") == 1
     assert payload.get("email") == "a@x.com"
@@ -34,8 +34,53 @@ def test_jwt_payload_fallback_on_error(monkeypatch):
     monkeypatch.setattr(schema_auth, "_default_payload", raise_exc)
     # S'assure que le handler jwt_settings retourne le nom de la clé username
     monkeypatch.setattr(schema_auth.jwt_settings, "JWT_PAYLOAD_GET_USERNAME_HANDLER", lambda x: (lambda obj: "email"))
-    user = FakeUser(id=2, email="b@x.com", first_name="C", last_name="D", is_admin=False, team=None, team_managed=None, hour_contract=None, phone_number=None)
+    user = FakeUser(id=2, email="b@x.com", first_name="C", last_name="D", is_admin=False, team_id=None, team_managed_id=None, hour_contract=None, phone_number=None)
     payload = schema_auth.jwt_payload(user)
     # Le fallback doit inclure username/email et user_id
     assert payload.get("email") == "b@x.com"
-    assert payload.get("user_id") == 2
\ No newline at end of file
+    assert payload.get("user_id") == 2
+
+def test_jwt_payload_uses_team_ids_without_loading_teams():
+    # team / team_managed ne sont jamais déréférencés: seules les colonnes *_id sont lues
+    class NoRelations(FakeUser):
+        @property
+        def team(self):
+            raise AssertionError("team loaded")
+
+        team_managed = team
+
+    user = NoRelations(id=3, email="c@x.com", first_name="E", last_name="F", is_admin=False, team_id=7, team_managed_id=7, hour_contract=35, phone_number="1")
+    payload = schema_auth.jwt_payload(user)
+    assert (payload["team_id"], payload["team_managed_id"], payload["is_manager"]) == (7, 7, True)
+
+
+@pytest.mark.django_db
+def test_token_auth_and_refresh_read_the_user_once(django_assert_num_queries):
+    from django.test import RequestFactory
+
+    from PrimeBank.schema import schema
+    from PrimeBankApp.models import CustomUser, Team
+
+    team = Team.objects.create(description="Ops")
+    user = CustomUser(email="auth@x.com", phone_number="0600000009", first_name="A", last_name="B", team=team, team_managed=team)
+    user.set_password("pw")
+    user.save()
+
+    def execute(document, variables):
+        result = schema.execute(document, variables=variables, context_value=RequestFactory().post("/graphql"))
+        assert result.errors is None, result.errors
+        return result.data
+
+    # SELECT utilisateur + INSERT du refresh token
+    with django_assert_num_queries(2):
+        data = execute(
+            "mutation($e: String!, $p: String!) { tokenAuth(email: $e, password: $p) { token refreshToken } }",
+            {"e": "auth@x.com", "p": "pw"},
+        )
+
+    # SELECT refresh token JOIN utilisateur + INSERT du nouveau refresh token
+    with django_assert_num_queries(2):
+        execute(
+            "mutation($t: String!) { refreshToken(refreshToken: $t) { token refreshToken payload } }",
+            {"t": data["tokenAuth"]["refreshToken"]},
+        )
@@ -1,5 +1,7 @@
 """Tests unitaires pour les mutations de `schema_time_clock.py` (déplacé dans le dossier central des tests)."""
+from contextlib import nullcontext
 from datetime import date, time
+from types import SimpleNamespace
 
 import pytest
 
@@ -53,6 +55,15 @@ class FakeManager:
         return FakeTC(**kwargs)
 
 
+@pytest.fixture(autouse=True)
+def recorded_events(monkeypatch):
+    # Journal ClockEvent et transaction sans base de données: on garde (kind, pointage)
+    events = []
+    monkeypatch.setattr(schema_time_clock, "transaction", SimpleNamespace(atomic=nullcontext))
+    monkeypatch.setattr(schema_time_clock, "record_event", lambda kind, tc, actor=None: events.append((kind, tc)))
+    return events
+
+
 def make_info(user):
     # Fabrique un objet info simulant le contexte GraphQL avec un user donné
     class Ctx:
@@ -106,7 +117,7 @@ def test_clockin_already_clocked(monkeypatch):
         schema_time_clock.ClockIn.mutate(None, info, user_id=1)
 
 
-def test_clockin_success(monkeypatch):
+def test_clockin_success(monkeypatch, recorded_events):
     class U:
         id = 1
         is_authenticated = True
@@ -122,9 +133,10 @@ def test_clockin_success(monkeypatch):
 
     res = schema_time_clock.ClockIn.mutate(None, info, user_id=1)
     assert hasattr(res, 'time_clock')
+    assert recorded_events == [("clock_in", res.time_clock)]
 
 
-def test_clockout_errors_and_success(monkeypatch):
+def test_clockout_errors_and_success(monkeypatch, recorded_events):
     class U:
         id = 2
         is_authenticated = True
@@ -158,9 +170,10 @@ def test_clockout_errors_and_success(monkeypatch):
     monkeypatch.setattr(schema_time_clock, 'TimeClock', type('T', (), {'objects': M2(tc2)}))
     res = schema_time_clock.ClockOut.mutate(None, info, user_id=2)
     assert hasattr(res, 'time_clock')
+    assert recorded_events == [("clock_out", tc2)]
 
 
-def test_modify_clock_entry_various_errors_and_success(monkeypatch):
+def test_modify_clock_entry_various_errors_and_success(monkeypatch, recorded_events):
     # prepare requester
     class Req:
         id = 10
@@ -229,6 +242,7 @@ def test_modify_clock_entry_various_errors_and_success(monkeypatch):
     # ensure require_auth doesn't block: pass a requester with is_authenticated True
     res = schema_time_clock.ModifyClockEntry.mutate(None, info2, user_id=1, day=date(2025,1,1), clock_in=time(7,0))
     assert hasattr(res, 'time_clock')
+    assert recorded_events == [("modified", tc)]
 
 
 def test_create_request_modify_timeclock_errors_and_success(monkeypatch):
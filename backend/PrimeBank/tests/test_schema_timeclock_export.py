@@ -106,4 +106,20 @@ def test_resolve_export_time_clock_csv_success_self_request():
     res = q.resolve_export_time_clock_csv(info)
     assert res.download_url.startswith("/api/export/timeclock/csv/")
     assert res.filename.startswith("timeclocks_")
-    assert res.expires_at is not None
\ No newline at end of file
+    assert res.expires_at is not None
+
+def test_resolve_export_time_clock_parquet_self_request(monkeypatch):
+    q = schema_timeclock_export.TimeClockExportQuery()
+
+    class U:
+        id = 1
+        is_authenticated = True
+        is_admin = False
+        is_superuser = False
+
+    info = make_info(U)
+
+    res = q.resolve_export_time_clock_parquet(info, start_date=date(2025, 1, 1), end_date=date(2025, 1, 31))
+    assert isinstance(res, schema_timeclock_export.TimeClockParquetExport)
+    assert res.download_url.startswith("/api/export/timeclock/parquet/")
+    assert res.filename == "timeclocks_1_20250101_20250131.parquet"
@@ -0,0 +1,119 @@
+"""Tests pour `scopes.py` (teams/utilisateurs visibles par le demandeur)."""
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from PrimeBankApp.models import CustomUser, RequestModifyTimeClock
+from PrimeBankApp.scopes import VisibilityScope, scope_cache, visibility_scope
+from PrimeBankApp.synthetic_data import seed_dataset
+from PrimeBankApp.user_cache import invalidate_user
+
+
+@pytest.fixture
+def data(db):
+    return seed_dataset(members_per_team=3, teams=2, days=7)
+
+
+@pytest.fixture
+def unassigned(data):
+    return CustomUser.objects.create(email="free@x.com", phone_number="0600000020", first_name="F", last_name="R")
+
+
+def _team(data, index):
+    team = data.teams[index]
+    return {u.id for u in CustomUser.objects.filter(team=team)}
+
+
+def _execute(document, user):
+    from PrimeBank.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    result = schema.execute(document, context_value=request)
+    assert result.errors is None, result.errors
+    return result.data
+
+
+@pytest.mark.django_db
+def test_manager_scope_is_resolved_in_one_query(data, unassigned):
+    manager = data.managers[0]
+
+    with CaptureQueriesContext(connection) as captured:
+        scope = VisibilityScope.for_user(manager)
+
+    assert len(captured) == 1
+    assert scope.team_ids == {data.teams[0].id}
+    assert scope.member_ids == _team(data, 0)
+    # ni l'admin sans équipe ni l'autre équipe
+    assert scope.user_ids == _team(data, 0) | {unassigned.id}
+
+
+@pytest.mark.django_db
+def test_admin_member_and_anonymous_scopes_need_no_query(data):
+    member = data.members[0]
+    with CaptureQueriesContext(connection) as captured:
+        admin_scope = VisibilityScope.for_user(data.admin)
+        member_scope = VisibilityScope.for_user(member)
+        anonymous_scope = VisibilityScope.for_user(AnonymousUser())
+    assert len(captured) == 0
+
+    users = CustomUser.objects.order_by("id")
+    assert admin_scope.users(users).count() == users.count()
+    assert list(member_scope.users(users)) == [member]
+    assert not anonymous_scope.users(users).exists()
+
+
+@pytest.mark.django_db
+def test_users_and_all_requests_are_filtered_in_the_query(data, unassigned):
+    manager, member = data.managers[0], data.members[0]
+
+    ids = {int(u["id"]) for u in _execute("query { users { id } }", manager)["users"]}
+    assert ids == _team(data, 0) | {unassigned.id}
+    assert [u["id"] for u in _execute("query { users { id } }", member)["users"]] == [str(member.id)]
+    assert len(_execute("query { users { id } }", data.admin)["users"]) == CustomUser.objects.count()
+
+    requests = _execute("query { allRequests { id user { id } } }", manager)["allRequests"]
+    assert {int(r["user"]["id"]) for r in requests} <= _team(data, 0)
+    assert len(requests) == RequestModifyTimeClock.objects.filter(user__team=data.teams[0]).count() > 0
+
+    own = _execute("query { allRequests { id user { id } } }", member)["allRequests"]
+    assert {r["user"]["id"] for r in own} == {str(member.id)}
+    assert len(_execute("query { allRequests { id } }", data.admin)["allRequests"]) == RequestModifyTimeClock.objects.count()
+
+
+@pytest.mark.django_db
+def test_scope_is_cached_until_a_team_change(data, unassigned):
+    manager = data.managers[0]
+    first = scope_cache.get(manager)
+
+    with CaptureQueriesContext(connection) as captured:
+        assert scope_cache.get(manager) is first
+    assert len(captured) == 0
+
+    moved = unassigned
+    moved.team = data.teams[0]
+    moved.save()
+    invalidate_user(moved.id)
+
+    refreshed = scope_cache.get(manager)
+    assert refreshed is not first
+    assert moved.id in refreshed.member_ids
+
+
+@pytest.mark.django_db
+def test_scope_is_resolved_once_per_request(data):
+    info = SimpleNamespace(context=SimpleNamespace(user=data.managers[0]))
+    scope_cache.clear()
+
+    assert visibility_scope(info) is visibility_scope(info)
+    assert scope_cache.misses == 1 and scope_cache.hits == 0
+
+
+def test_cache_key_follows_role_claims():
+    member = SimpleNamespace(id=7, is_authenticated=True, is_admin=False, is_superuser=False, team_managed_id=None)
+    promoted = SimpleNamespace(**{**vars(member), "team_managed_id": 3})
+    assert scope_cache.key(member) != scope_cache.key(promoted)
@@ -0,0 +1,143 @@
+"""Tests unitaires pour `server_timing.py` (en-têtes Server-Timing et budget SQL)."""
+import base64
+import json
+import logging
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.core.signing import TimestampSigner
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+import PrimeBankApp.server_timing as server_timing
+from PrimeBankApp.metrics import observe_export
+from PrimeBankApp.synthetic_data import seed_dataset
+from PrimeBankApp.views_timeclock_export import export_timeclock_csv
+
+
+def make_view(url_name, queries=0, phases=()):
+    # Fausse vue: fixe resolver_match comme le ferait le routeur et simule
+    # des requêtes SQL / phases sans toucher à la base
+    def get_response(request):
+        request.resolver_match = SimpleNamespace(url_name=url_name)
+        timings = server_timing.current_timings()
+        timings.queries.count += queries
+        timings.queries.duration += 0.002 * queries
+        for name in phases:
+            server_timing.record_phase(name, 0.001)
+        return HttpResponse("ok")
+
+    return get_response
+
+
+def test_headers_on_graphql_response():
+    middleware = server_timing.ServerTimingMiddleware(make_view("graphql", queries=3, phases=("jwt",)))
+    request = RequestFactory().post(
+        "/api/graphql", data=json.dumps({"operationName": "KpiClock"}), content_type="application/json"
+    )
+
+    response = middleware(request)
+
+    header = response["Server-Timing"]
+    assert header.startswith("jwt;dur=1.0, db;dur=6.0;desc=\"3 queries\", app;dur=")
+    assert "total;dur=" in header
+    assert response["X-DB-Query-Count"] == "3"
+    assert response["X-DB-Time-Ms"] == "6.0"
+
+
+def test_no_headers_outside_timed_views():
+    middleware = server_timing.ServerTimingMiddleware(make_view("metrics", queries=1))
+    response = middleware(RequestFactory().get("/api/metrics"))
+    assert "Server-Timing" not in response
+    assert "X-DB-Query-Count" not in response
+
+
+def test_export_render_is_reported_as_phase():
+    def get_response(request):
+        request.resolver_match = SimpleNamespace(url_name="export_timeclock_pdf")
+        with observe_export("pdf"):
+            pass
+        return HttpResponse(b"%PDF")
+
+    response = server_timing.ServerTimingMiddleware(get_response)(RequestFactory().get("/x"))
+    assert response["Server-Timing"].startswith("render;dur=")
+
+
+def test_record_phase_outside_request_is_ignored():
+    # Pas de collecteur actif (commande de gestion, shell): aucun effet
+    server_timing.record_phase("jwt", 1.0)
+    with server_timing.phase("render"):
+        pass
+    assert server_timing.current_timings() is None
+
+
+@override_settings(QUERY_BUDGETS={"default": 50, "graphql:KpiClock": 2})
+def test_budget_exceeded_logs_warning(caplog):
+    middleware = server_timing.ServerTimingMiddleware(make_view("graphql", queries=3))
+    request = RequestFactory().post(
+        "/api/graphql", data=json.dumps({"operationName": "KpiClock"}), content_type="application/json"
+    )
+
+    with caplog.at_level(logging.WARNING, logger="PrimeBankApp.server_timing"):
+        middleware(request)
+
+    assert "graphql:KpiClock: 3 queries (budget 2)" in caplog.text
+
+
+@override_settings(QUERY_BUDGETS={"default": 5, "graphql:KpiClock": 2})
+def test_budget_falls_back_to_default(caplog):
+    middleware = server_timing.ServerTimingMiddleware(make_view("graphql", queries=3))
+    request = RequestFactory().post(
+        "/api/graphql", data=json.dumps({"operationName": "Users"}), content_type="application/json"
+    )
+
+    with caplog.at_level(logging.WARNING, logger="PrimeBankApp.server_timing"):
+        middleware(request)
+
+    assert caplog.text == ""
+
+
+def test_operation_key():
+    factory = RequestFactory()
+    assert server_timing._operation_key(factory.get("/x"), "export_timeclock_csv") == "export_timeclock_csv"
+    assert server_timing._operation_key(factory.get("/x", {"operationName": "Me"}), "graphql") == "graphql:Me"
+    invalid = factory.post("/x", data="not json", content_type="application/json")
+    assert server_timing._operation_key(invalid, "graphql") == "graphql:anonymous"
+
+
+@pytest.mark.django_db
+def test_streamed_export_counts_the_queries_run_by_its_body(caplog, settings):
+    data = seed_dataset(members_per_team=2, teams=1, days=5)
+    member = data.members[0]
+    payload = {
+        "requester_id": str(member.id),
+        "target_user_id": str(member.id),
+        "start_date": (date.today() - timedelta(days=10)).isoformat(),
+        "end_date": date.today().isoformat(),
+    }
+    token = TimestampSigner().sign(base64.urlsafe_b64encode(json.dumps(payload).encode()).decode())
+
+    def get_response(request):
+        request.resolver_match = SimpleNamespace(url_name="export_timeclock_csv")
+        request.user = member
+        return export_timeclock_csv(request, token)
+
+    with CaptureQueriesContext(connection) as view_queries:
+        response = server_timing.ServerTimingMiddleware(get_response)(RequestFactory().get("/x"))
+    # En-têtes: la vue seule, le SELECT des pointages n'a pas encore tourné
+    assert response["X-DB-Query-Count"] == str(len(view_queries))
+
+    settings.QUERY_BUDGETS = {"default": 50, "export_timeclock_csv": len(view_queries)}
+    with caplog.at_level(logging.INFO, logger="PrimeBankApp.server_timing"):
+        with CaptureQueriesContext(connection) as stream_queries:
+            b"".join(response.streaming_content)
+        response.close()
+
+    assert any('"PrimeBankApp_timeclock"' in query["sql"] for query in stream_queries)
+    total = len(view_queries) + len(stream_queries)
+    assert f'desc="{total} queries"' in caplog.text
+    assert "render;dur=" in caplog.text
+    assert f"export_timeclock_csv: {total} queries (budget {len(view_queries)})" in caplog.text
@@ -0,0 +1,66 @@
+"""Tests pour `synthetic_data.py` et la commande `seed_synthetic_data`."""
+from datetime import date
+
+import pytest
+
+from django.core.management import call_command
+from django.db.models import F
+
+from PrimeBankApp.models import CustomUser, RequestModifyTimeClock, Team, TimeClock
+from PrimeBankApp.synthetic_data import seed_dataset
+
+TODAY = date(2025, 3, 14)
+
+
+@pytest.mark.django_db
+def test_seed_dataset_shape():
+    data = seed_dataset(members_per_team=4, teams=3, days=30, requests_per_member=1, today=TODAY)
+
+    assert Team.objects.count() == 3
+    assert CustomUser.objects.count() == 1 + 3 * 5
+    assert len(data.managers) == 3
+    assert len(data.members) == 12
+    assert all(m.team_managed_id == m.team_id for m in data.managers)
+    assert data.admin.is_admin and data.admin.team_id is None
+
+    clocks = TimeClock.objects.all()
+    assert clocks.filter(day__gt=TODAY).count() == 0
+    # Pointages du jour encore ouverts, ceux des jours passés fermés
+    assert not clocks.filter(day=TODAY, clock_out__isnull=False).exists()
+    assert not clocks.filter(day__lt=TODAY, clock_out__isnull=True).exists()
+    assert RequestModifyTimeClock.objects.count() <= len(data.members)
+    assert not RequestModifyTimeClock.objects.filter(user__team_managed__isnull=False).exists()
+
+
+@pytest.mark.django_db
+def test_seed_dataset_is_deterministic_and_repeatable():
+    seed_dataset(members_per_team=3, teams=2, days=20, today=TODAY, seed=7)
+    first = list(TimeClock.objects.order_by("user_id", "day").values_list("day", "clock_in", "clock_out"))
+
+    # Un second appel ajoute de nouveaux utilisateurs sans collision d'email/téléphone
+    seed_dataset(members_per_team=3, teams=2, days=20, today=TODAY, seed=7)
+    assert CustomUser.objects.count() == 2 * (1 + 2 * 4)
+
+    second_users = CustomUser.objects.order_by("id")[9:]
+    second = list(
+        TimeClock.objects.filter(user__in=second_users)
+        .order_by("user_id", "day")
+        .values_list("day", "clock_in", "clock_out")
+    )
+    assert first == second
+
+
+@pytest.mark.django_db
+def test_seed_dataset_has_overnight_shifts():
+    seed_dataset(members_per_team=40, teams=2, days=30, today=TODAY)
+    overnight = TimeClock.objects.filter(clock_out__lt=F("clock_in"))
+    assert overnight.exists()
+
+
+@pytest.mark.django_db
+def test_seed_command(capsys):
+    call_command("seed_synthetic_data", "--teams=2", "--members-per-team=3", "--days=10", "--end=2025-03-14")
+
+    assert CustomUser.objects.count() == 1 + 2 * 4
+    assert TimeClock.objects.latest("day").day <= TODAY
+    assert "row(s) in" in capsys.readouterr().out
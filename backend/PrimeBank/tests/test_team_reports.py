@@ -0,0 +1,85 @@
+"""Tests unitaires pour `team_reports.py` (rapport PDF d'équipe en ZIP)."""
+import io
+import zipfile
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+
+try:
+    import PrimeBankApp.team_reports as team_reports
+except OSError:  # WeasyPrint présent mais bibliothèques système (Pango) absentes
+    pytest.skip("WeasyPrint system libraries unavailable", allow_module_level=True)
+
+
+def _member(uid, first):
+    return SimpleNamespace(id=uid, first_name=first, last_name="X", email=f"{uid}@x.com", hour_contract=35)
+
+
+def test_build_member_jobs_groups_rows_from_one_query(monkeypatch):
+    members = [_member(1, "Ana"), _member(2, "Bob")]
+    rows = [
+        SimpleNamespace(user_id=1, day=date(2025, 1, 1), clock_in=time(9, 0), clock_out=time(17, 0),
+                        duration_seconds=8 * 3600.0),
+        SimpleNamespace(user_id=1, day=date(2025, 1, 2), clock_in=time(9, 0), clock_out=time(13, 0),
+                        duration_seconds=4 * 3600.0),
+    ]
+    calls = []
+
+    class Q:
+        def order_by(self, *args):
+            return self
+
+        def only(self, *fields):
+            return self
+
+        def iterator(self):
+            return iter(rows)
+
+    def fake_filter(**kwargs):
+        calls.append(kwargs)
+        return Q()
+
+    monkeypatch.setattr(team_reports, "_collect_team_members", lambda team: members)
+    monkeypatch.setattr(team_reports, "TimeClock", SimpleNamespace(objects=SimpleNamespace(filter=fake_filter)))
+
+    jobs = team_reports.build_member_jobs(object(), date(2025, 1, 1), date(2025, 1, 31))
+
+    assert len(calls) == 1
+    assert calls[0]["user_id__in"] == [1, 2]
+    assert [job["filename"] for job in jobs] == ["report_1_20250101.pdf", "report_2_20250101.pdf"]
+    assert jobs[0]["context"]["total_hours"] == "12.00"
+    assert jobs[0]["context"]["days_worked"] == 2
+    assert jobs[1]["context"]["entries"] == []
+    assert jobs[1]["context"]["user"]["first_name"] == "Bob"
+
+
+def test_write_team_report_zip_reports_progress(monkeypatch):
+    monkeypatch.setattr(team_reports, "render_member_report", lambda job: (job["filename"], b"%PDF-" + job["filename"].encode()))
+    jobs = [{"filename": f"report_{i}.pdf", "context": {}} for i in range(3)]
+    progress = []
+
+    buf = io.BytesIO()
+    count = team_reports.write_team_report_zip(
+        jobs, buf, workers=1, progress=lambda done, total, name: progress.append((done, total))
+    )
+
+    assert count == 3
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    with zipfile.ZipFile(buf) as zf:
+        assert sorted(zf.namelist()) == ["report_0.pdf", "report_1.pdf", "report_2.pdf"]
+        assert zf.read("report_1.pdf") == b"%PDF-report_1.pdf"
+
+
+def _fake_render(job):
+    # Fonction de module (picklable) pour le pool de processus
+    return job["filename"], b"pdf"
+
+
+def test_render_jobs_in_process_pool(monkeypatch):
+    monkeypatch.setattr(team_reports, "render_member_report", _fake_render)
+    jobs = [{"filename": f"report_{i}.pdf", "context": {}} for i in range(4)]
+
+    results = dict(team_reports.render_jobs(jobs, workers=2))
+
+    assert sorted(results) == [f"report_{i}.pdf" for i in range(4)]
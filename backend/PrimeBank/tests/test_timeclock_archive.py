@@ -0,0 +1,322 @@
+"""Tests pour `timeclock_archive.py` (archive froide des pointages et lecture transparente)."""
+import base64
+import importlib
+import io
+import json
+from datetime import time, timedelta
+from io import StringIO
+from types import SimpleNamespace
+
+import pyarrow.parquet as pq
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import PrimeBankApp.views_timeclock_export as views_export
+from PrimeBankApp.models import ClockEvent, CustomUser, RequestModifyTimeClock, Team, TimeClock, TimeClockArchive
+from PrimeBankApp.timeclock_archive import archive_cache, archive_cutoff, archive_timeclocks, archived_entries
+
+
+@pytest.fixture
+def history(db):
+    """Deux utilisateurs, un pointage par semaine sur trois ans."""
+    today = timezone.localdate()
+    users = [
+        CustomUser.objects.create(email=f"a{i}@x.com", phone_number=f"060000004{i}", first_name="A", last_name="R")
+        for i in range(2)
+    ]
+    TimeClock.objects.bulk_create(
+        TimeClock(user=user, day=today - timedelta(days=offset), clock_in=time(9), clock_out=time(17, 30))
+        for user in users
+        for offset in range(0, 3 * 365, 7)
+    )
+    # pointage sans sortie dans la partie archivée
+    TimeClock.objects.create(user=users[0], day=today - timedelta(days=900), clock_in=time(8))
+    return users, today
+
+
+def _export(view, user, target, start, end):
+    payload = {
+        "requester_id": user.id,
+        "target_user_id": target.id,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+    }
+    token = views_export.TimestampSigner().sign(base64.urlsafe_b64encode(json.dumps(payload).encode()).decode())
+    request = RequestFactory().get("/")
+    request.user = user
+    return view(request, token)
+
+
+def _csv(user, target, start, end):
+    return b"".join(_export(views_export.export_timeclock_csv, user, target, start, end).streaming_content).decode()
+
+
+def _import_pdf_module(name):
+    try:
+        return importlib.import_module(name)
+    except OSError:  # WeasyPrint présent mais bibliothèques système (Pango) absentes
+        pytest.skip("WeasyPrint system libraries unavailable")
+
+
+def _entries(context):
+    return context["entries"], context["total_hours"], context["days_worked"]
+
+
+@pytest.fixture
+def admin(db):
+    return CustomUser.objects.create(email="adm@x.com", phone_number="0600000049", is_admin=True)
+
+
+@pytest.mark.django_db
+def test_archive_moves_old_months_without_change_events(history):
+    users, today = history
+    cutoff = archive_cutoff()
+    old_ids = set(TimeClock.objects.filter(day__lt=cutoff).values_list("id", flat=True))
+    total = TimeClock.objects.count()
+    start = ClockEvent.objects.order_by("-seq").values_list("seq", flat=True).first() or 0
+
+    moved = archive_timeclocks()
+
+    assert sum(moved.values()) == len(old_ids)
+    assert all(month.day == 1 and month < cutoff for month in moved)
+    assert not TimeClock.objects.filter(day__lt=cutoff).exists()
+    assert TimeClock.objects.count() == total - len(old_ids)
+    assert sum(TimeClockArchive.objects.values_list("row_count", flat=True)) == len(old_ids)
+    # déplacées, pas supprimées: rien dans le flux de changements
+    assert not ClockEvent.objects.filter(seq__gt=start).exists()
+
+    archived = archived_entries([u.id for u in users], today - timedelta(days=5 * 365), today)
+    assert {entry.id for entry in archived} == old_ids
+    assert archive_timeclocks() == {}
+
+
+@pytest.mark.django_db
+def test_rearchiving_a_month_merges_late_rows(history):
+    users, today = history
+    archive_timeclocks()
+    day = archive_cutoff() - timedelta(days=40)
+    late = TimeClock.objects.create(user=users[1], day=day, clock_in=time(10), clock_out=time(12))
+    month = TimeClockArchive.objects.get(month=day.replace(day=1))
+
+    assert archive_timeclocks() == {day.replace(day=1): 1}
+
+    again = TimeClockArchive.objects.get(pk=month.pk)
+    assert again.row_count == month.row_count + 1
+    assert late.id in {entry.id for entry in archived_entries([users[1].id], day, day)}
+
+
+def _execute(document, user, **variables):
+    from PrimeBank.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    return schema.execute(document, variables=variables, context_value=request)
+
+
+def _change_request(user, day):
+    return RequestModifyTimeClock.objects.create(user=user, day=day, new_clock_in=time(7), new_clock_out=time(15))
+
+
+@pytest.mark.django_db
+def test_months_with_pending_requests_stay_until_resolved(history, admin):
+    users, today = history
+    day = TimeClock.objects.filter(user=users[0], day__lt=archive_cutoff()).order_by("-day").first().day
+    request = _change_request(users[0], day)
+
+    moved = archive_timeclocks()
+
+    assert day.replace(day=1) not in moved
+    assert TimeClock.objects.filter(user=users[0], day=day).exists()
+    result = _execute(
+        "mutation($r: ID!) { acceptedChangeRequest(requestId: $r, accepted: true) { message } }", admin, r=request.id
+    )
+    assert result.errors is None, result.errors
+    assert set(archive_timeclocks()) == {day.replace(day=1)}
+
+
+@pytest.mark.django_db
+def test_mutations_on_an_archived_day_say_it_is_archived(history, admin):
+    users, today = history
+    day = TimeClock.objects.filter(user=users[0], day__lt=archive_cutoff()).first().day
+    archive_timeclocks()
+
+    result = _execute(
+        "mutation($u: ID!, $d: Date) { modifyClockEntry(userId: $u, day: $d, clockIn: \"08:00:00\") "
+        "{ timeClock { id } } }",
+        admin, u=users[0].id, d=day.isoformat(),
+    )
+    assert result.errors[0].message == (
+        f"{day} is archived: clock entries before {archive_cutoff()} can no longer be changed."
+    )
+
+    # demande créée après l'archivage, hors mutation (admin Django)
+    request = _change_request(users[0], day)
+    result = _execute(
+        "mutation($d: [ChangeRequestDecisionInput!]!) { resolveChangeRequests(decisions: $d) "
+        "{ results { ok message } } }",
+        admin, d=[{"requestId": request.id, "accepted": True}],
+    )
+    assert result.errors is None, result.errors
+    (outcome,) = result.data["resolveChangeRequests"]["results"]
+    assert outcome["ok"] is False and "is archived" in outcome["message"]
+
+    # hors archive: message inchangé
+    recent = today + timedelta(days=1)
+    result = _execute(
+        "mutation($u: ID!, $d: Date) { modifyClockEntry(userId: $u, day: $d, clockIn: \"08:00:00\") "
+        "{ timeClock { id } } }",
+        admin, u=users[0].id, d=recent.isoformat(),
+    )
+    assert result.errors[0].message == f"No TimeClock entry for user {users[0].id} on {recent}."
+
+
+@pytest.mark.django_db
+def test_csv_export_reads_through_the_archive(history, admin):
+    users, today = history
+    start, end = today - timedelta(days=1000), today
+    before = _csv(admin, users[0], start, end)
+
+    archive_timeclocks()
+
+    assert _csv(admin, users[0], start, end) == before
+    assert "8:00:00;;0;0.00" in before
+
+
+@pytest.mark.django_db
+def test_parquet_export_reads_through_the_archive(history, admin):
+    import PrimeBankApp.views_timeclock_parquet_export as views_parquet
+
+    users, today = history
+    start, end = today - timedelta(days=1000), today
+
+    def table():
+        response = _export(views_parquet.export_timeclock_parquet, admin, users[0], start, end)
+        return pq.read_table(io.BytesIO(b"".join(response.streaming_content))).to_pylist()
+
+    before = table()
+    archive_timeclocks()
+    assert TimeClockArchive.objects.exists()
+    assert table() == before
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("max_rows", [None, 50], ids=["single", "per-month"])
+def test_pdf_export_reads_through_the_archive(history, admin, monkeypatch, max_rows):
+    from pypdf import PdfWriter
+
+    views_pdf = _import_pdf_module("PrimeBankApp.views_timeclock_pdf_export")
+    users, today = history
+    start, end = today - timedelta(days=1000), today
+    contexts = []
+
+    def render(context, template_name="pdf_report.html"):
+        contexts.append(_entries(context))
+        return ""
+
+    def blank_pdf(target=None):
+        # comme WeasyPrint: écrit dans `target` (chemin ou fichier) s'il est donné
+        writer, buffer = PdfWriter(), io.BytesIO()
+        writer.add_blank_page(width=10, height=10)
+        writer.write(target if target is not None else buffer)
+        return None if target is not None else buffer.getvalue()
+
+    monkeypatch.setattr(views_pdf, "_render_report_html", render)
+    monkeypatch.setattr(views_pdf, "weasyprint", SimpleNamespace(HTML=lambda string: SimpleNamespace(write_pdf=blank_pdf)))
+    if max_rows:
+        monkeypatch.setattr(views_pdf, "MAX_SINGLE_DOCUMENT_ROWS", max_rows)
+
+    assert _export(views_pdf.export_timeclock_pdf, admin, users[0], start, end).status_code == 200
+    before, contexts[:] = list(contexts), []
+    archive_timeclocks()
+    assert _export(views_pdf.export_timeclock_pdf, admin, users[0], start, end).status_code == 200
+
+    assert contexts == before
+    assert len(before) > 2 if max_rows else len(before) == 1
+
+
+@pytest.mark.django_db
+def test_team_and_annual_reports_read_through_the_archive(history):
+    team_reports = _import_pdf_module("PrimeBankApp.team_reports")
+    annual_reports = _import_pdf_module("PrimeBankApp.annual_reports")
+
+    users, today = history
+    team = Team.objects.create(description="Archive")
+    CustomUser.objects.filter(pk__in=[u.id for u in users]).update(team=team)
+    start, end = today - timedelta(days=1000), today
+
+    def reports():
+        team_jobs = [_entries(job["context"]) for job in team_reports.build_member_jobs(team, start, end)]
+        annual_jobs = [
+            (job["user"]["id"], [tuple(row) for row in job["rows"]])
+            for job in annual_reports.iter_user_jobs(start, end, ("csv",))
+        ]
+        return team_jobs, annual_jobs
+
+    before = reports()
+    archive_timeclocks()
+    assert TimeClockArchive.objects.exists()
+    assert reports() == before
+    user_ids = {u.id for u in users}
+    assert all(rows for user_id, rows in before[1] if user_id in user_ids)
+
+
+@pytest.mark.django_db
+def test_kpi_clock_is_unchanged_by_archiving(history, settings):
+    from PrimeBank.schema import schema
+
+    users, _ = history
+    settings.TIMECLOCK_ARCHIVE_AFTER_DAYS = 60
+    request = RequestFactory().post("/graphql")
+    request.user = users[0]
+    query = "{ kpiClock(period: 90) { totalSeconds workedDays previousTotalSeconds dailyTotals { totalSeconds } } }"
+    before = schema.execute(query, context_value=request)
+    assert before.errors is None, before.errors
+
+    archive_timeclocks()
+    assert TimeClockArchive.objects.exists()
+    after = schema.execute(query, context_value=request)
+
+    assert after.data == before.data
+
+
+@pytest.mark.django_db
+def test_months_are_cached_and_bounded(history, settings):
+    users, today = history
+    archive_timeclocks()
+    start = today - timedelta(days=3 * 365)
+    ids = [users[0].id]
+
+    archived_entries(ids, start, today)
+    with CaptureQueriesContext(connection) as captured:
+        archived_entries(ids, start, today)
+    assert len(captured) == 1  # mois archivés de la plage, contenu depuis le cache
+    assert archive_cache.hits > 0
+
+    settings.TIMECLOCK_ARCHIVE_CACHE_MONTHS = 2
+    archive_cache.clear()
+    archived_entries(ids, start, today)
+    assert len(archive_cache) == 2
+
+
+@pytest.mark.django_db
+def test_recent_ranges_do_not_query_the_archive(history):
+    users, today = history
+    with CaptureQueriesContext(connection) as captured:
+        assert archived_entries([users[0].id], today - timedelta(days=30), today) == []
+    assert len(captured) == 0
+
+
+@pytest.mark.django_db
+def test_command_archives_once(history):
+    out = StringIO()
+    call_command("archive_timeclocks", stdout=out)
+    assert "Archived" in out.getvalue()
+    assert f"before {archive_cutoff():%Y-%m-%d}" in out.getvalue()
+    assert "pending change requests" not in out.getvalue()
+
+    with pytest.raises(CommandError):
+        call_command("archive_timeclocks", "--every", "0")
@@ -0,0 +1,82 @@
+"""Tests pour `TimeClock.duration_seconds`, calculée à l'écriture, et son backfill (migration 0017)."""
+import importlib
+from datetime import date, time
+
+import pytest
+from django.apps import apps
+from django.test import RequestFactory
+
+from PrimeBankApp.models import CustomUser, RequestModifyTimeClock, TimeClock
+
+backfill = importlib.import_module("PrimeBankApp.migrations.0017_timeclock_duration_seconds")
+
+DAY = date(2025, 3, 4)
+
+
+@pytest.fixture
+def user(db):
+    return CustomUser.objects.create(email="d@x.com", phone_number="0600000050", first_name="D", last_name="U")
+
+
+def _execute(user, document, variables=None):
+    from PrimeBank.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    result = schema.execute(document, variables=variables, context_value=request)
+    assert result.errors is None, result.errors
+    return result.data
+
+
+@pytest.mark.django_db
+def test_save_and_bulk_writes_keep_the_duration(user):
+    tc = TimeClock.objects.create(user=user, day=DAY, clock_in=time(9))
+    assert tc.duration_seconds == 0
+
+    tc.clock_out = time(17, 30)
+    tc.save(update_fields=["clock_out"])
+    assert TimeClock.objects.get(pk=tc.pk).duration_seconds == 8.5 * 3600
+
+    night, open_entry = TimeClock.objects.bulk_create([
+        TimeClock(user=user, day=date(2025, 3, 5), clock_in=time(22), clock_out=time(6)),
+        TimeClock(user=user, day=date(2025, 3, 6), clock_in=time(8)),
+    ])
+    assert TimeClock.objects.get(pk=night.pk).duration_seconds == 8 * 3600
+    assert TimeClock.objects.get(pk=open_entry.pk).duration_seconds == 0
+
+    open_entry.clock_out = time(9, 15)
+    TimeClock.objects.bulk_update([open_entry], ["clock_out"])
+    assert TimeClock.objects.get(pk=open_entry.pk).duration_seconds == 1.25 * 3600
+
+
+@pytest.mark.django_db
+def test_mutations_store_the_duration(user):
+    admin = CustomUser.objects.create(email="adm@x.com", phone_number="0600000051", is_admin=True)
+    tc = TimeClock.objects.create(user=user, day=DAY, clock_in=time(9), clock_out=time(12))
+
+    _execute(admin, "mutation($u: ID!, $d: Date!, $o: Time) { modifyClockEntry(userId: $u, day: $d, clockOut: $o) "
+             "{ timeClock { id } } }", {"u": user.id, "d": DAY.isoformat(), "o": "18:00:00"})
+    assert TimeClock.objects.get(pk=tc.pk).duration_seconds == 9 * 3600
+
+    request = RequestModifyTimeClock.objects.create(
+        user=user, day=DAY, new_clock_in=time(10), new_clock_out=time(11)
+    )
+    _execute(admin, "mutation($d: [ChangeRequestDecisionInput!]!) { resolveChangeRequests(decisions: $d) "
+             "{ results { ok } } }", {"d": [{"requestId": request.id, "accepted": True}]})
+    assert TimeClock.objects.get(pk=tc.pk).duration_seconds == 3600
+
+
+@pytest.mark.django_db
+def test_backfill_computes_existing_rows(user, monkeypatch):
+    monkeypatch.setattr(backfill, "BACKFILL_BATCH_SIZE", 2)
+    TimeClock.objects.bulk_create(
+        TimeClock(user=user, day=date(2025, 3, d), clock_in=time(9), clock_out=time(10 + d)) for d in range(1, 6)
+    )
+    TimeClock.objects.create(user=user, day=date(2025, 3, 6), clock_in=time(9))
+    # lignes antérieures à la colonne
+    TimeClock.objects.update(duration_seconds=0)
+
+    backfill.backfill_durations(apps, None)
+
+    durations = dict(TimeClock.objects.values_list("day", "duration_seconds"))
+    assert durations == {date(2025, 3, d): (1 + d) * 3600 for d in range(1, 6)} | {date(2025, 3, 6): 0}
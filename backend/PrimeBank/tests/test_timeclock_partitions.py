@@ -0,0 +1,125 @@
+"""
+Tests pour `partitions.py` et la migration 0015 (partitionnement mensuel de TimeClock).
+
+Les helpers et le mode no-op tournent sur SQLite; la conversion, la création des
+partitions à venir et l'élagage (partition pruning) demandent PostgreSQL:
+    pytest PrimeBank/tests/test_timeclock_partitions.py --ds=PrimeBank.settings --migrations --no-cov
+"""
+import importlib
+import json
+from datetime import date, time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from PrimeBankApp.models import CustomUser, TimeClock
+from PrimeBankApp.partitions import (
+    DEFAULT_PARTITION,
+    TABLE,
+    add_months,
+    ensure_partitions,
+    existing_partitions,
+    is_partitioned,
+    months_between,
+    partition_name,
+)
+
+# Conversion gelée dans la migration (elle n'importe pas le code de l'application)
+migration_0015 = importlib.import_module("PrimeBankApp.migrations.0015_partition_timeclock")
+partition_timeclock = migration_0015.partition_timeclock
+
+postgresql_only = pytest.mark.skipif(connection.vendor != "postgresql", reason="partitioning needs PostgreSQL")
+
+
+def test_month_helpers():
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert list(months_between(date(2025, 11, 20), date(2026, 1, 5))) == [
+        date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1),
+    ]
+    assert partition_name(date(2026, 3, 1)) == f"{TABLE}_y2026m03"
+
+
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="no-op path only")
+@pytest.mark.django_db
+def test_noop_outside_postgresql():
+    partition_timeclock(connection)
+    assert not is_partitioned(connection)
+    assert ensure_partitions() == []
+
+    out = StringIO()
+    call_command("ensure_timeclock_partitions", stdout=out)
+    assert "not partitioned" in out.getvalue()
+
+
+def _scanned_tables(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    def walk(node):
+        if "Relation Name" in node:
+            yield node["Relation Name"]
+        for child in node.get("Plans", []):
+            yield from walk(child)
+
+    return set(walk(plan[0]["Plan"]))
+
+
+@pytest.fixture
+def clocks(db):
+    # Base migrée (--migrations): retour à la table d'avant 0015, annulé avec la transaction du test
+    migration_0015.unpartition_timeclock(connection)
+    user = CustomUser.objects.create(email="p@x.com", phone_number="0600000030", first_name="P", last_name="T")
+    days = [date(2026, 1, 15), date(2026, 2, 10), date(2026, 3, 2), date(2026, 3, 30)]
+    TimeClock.objects.bulk_create(TimeClock(user=user, day=d, clock_in=time(9), clock_out=time(17)) for d in days)
+    return user, days
+
+
+@postgresql_only
+def test_partitioned_table_keeps_rows_and_ids(clocks):
+    user, days = clocks
+    ids = set(TimeClock.objects.values_list("id", flat=True))
+
+    partition_timeclock(connection, months_ahead=2, today=date(2026, 3, 5))
+
+    assert is_partitioned(connection)
+    assert {partition_name(date(2026, m, 1)) for m in (1, 2, 3, 4, 5)} | {DEFAULT_PARTITION} == existing_partitions(
+        connection
+    )
+    assert set(TimeClock.objects.values_list("id", flat=True)) == ids
+    created = TimeClock.objects.create(user=user, day=date(2026, 4, 1))
+    assert created.id > max(ids)
+
+
+@postgresql_only
+def test_range_queries_only_scan_their_months(clocks):
+    partition_timeclock(connection, months_ahead=2, today=date(2026, 3, 5))
+
+    march = TimeClock.objects.filter(day__range=(date(2026, 3, 1), date(2026, 3, 31)))
+    assert _scanned_tables(march) == {partition_name(date(2026, 3, 1))}
+    assert march.count() == 2
+
+    quarter = TimeClock.objects.filter(day__gte=date(2026, 2, 1), day__lt=date(2026, 4, 1))
+    assert _scanned_tables(quarter) == {partition_name(date(2026, 2, 1)), partition_name(date(2026, 3, 1))}
+
+
+@postgresql_only
+def test_ensure_partitions_moves_rows_out_of_default(clocks):
+    user, _ = clocks
+    partition_timeclock(connection, months_ahead=0, today=date(2026, 3, 5))
+    # au-delà des partitions créées: la ligne tombe dans DEFAULT
+    late = TimeClock.objects.create(user=user, day=date(2026, 5, 12))
+    assert _scanned_tables(TimeClock.objects.filter(day=late.day)) == {DEFAULT_PARTITION}
+
+    created = ensure_partitions(months_ahead=2, today=date(2026, 3, 5))
+
+    assert created == [partition_name(date(2026, 4, 1)), partition_name(date(2026, 5, 1))]
+    assert _scanned_tables(TimeClock.objects.filter(day=late.day)) == {partition_name(date(2026, 5, 1))}
+    assert TimeClock.objects.get(pk=late.pk).day == late.day
+    assert ensure_partitions(months_ahead=2, today=date(2026, 3, 5)) == []
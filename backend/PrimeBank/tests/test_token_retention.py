@@ -0,0 +1,58 @@
+"""Tests pour `token_retention.py` et la commande `purge_refresh_tokens`."""
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from graphql_jwt.refresh_token.models import RefreshToken
+from graphql_jwt.settings import jwt_settings
+
+from PrimeBankApp.models import CustomUser
+from PrimeBankApp.token_retention import purge_refresh_tokens
+
+
+@pytest.fixture
+def tokens(db):
+    user = CustomUser.objects.create(email="tokens@x.com", phone_number="0600000010", first_name="T", last_name="K")
+    expired_at = timezone.now() - jwt_settings.JWT_REFRESH_EXPIRATION_DELTA - timedelta(hours=1)
+
+    active = [RefreshToken.objects.create(user=user) for _ in range(2)]
+    expired = [RefreshToken.objects.create(user=user) for _ in range(5)]
+    RefreshToken.objects.filter(pk__in=[t.pk for t in expired]).update(created=expired_at)
+    revoked = [RefreshToken.objects.create(user=user) for _ in range(3)]
+    for token in revoked:
+        token.revoke()
+    return active, expired, revoked
+
+
+@pytest.mark.django_db
+def test_purge_deletes_expired_and_revoked_in_batches(tokens):
+    active, _, _ = tokens
+    batches = []
+
+    totals = purge_refresh_tokens(batch_size=2, progress=lambda label, n: batches.append((label, n)))
+
+    assert totals == {"expired": 5, "revoked": 3}
+    assert batches == [("expired", 2), ("expired", 2), ("expired", 1), ("revoked", 2), ("revoked", 1)]
+    assert set(RefreshToken.objects.values_list("pk", flat=True)) == {t.pk for t in active}
+
+
+@pytest.mark.django_db
+def test_purge_with_nothing_to_delete(db):
+    assert purge_refresh_tokens() == {"expired": 0, "revoked": 0}
+
+
+@pytest.mark.django_db
+def test_command_purges_once(tokens):
+    out = StringIO()
+    call_command("purge_refresh_tokens", "--batch-size", "4", "--pause", "0", stdout=out)
+    assert "Deleted 5 expired and 3 revoked refresh token(s)" in out.getvalue()
+    assert RefreshToken.objects.count() == 2
+
+
+def test_command_rejects_bad_options():
+    with pytest.raises(CommandError):
+        call_command("purge_refresh_tokens", "--batch-size", "0")
+    with pytest.raises(CommandError):
+        call_command("purge_refresh_tokens", "--every", "0")
@@ -0,0 +1,149 @@
+"""Tests pour le flux CDC `views_timeclock_changes.py` (NDJSON des changements de TimeClock)."""
+import gzip
+import json
+from datetime import time
+
+import pytest
+from django.test import RequestFactory
+
+from PrimeBankApp.clock_events import record_event
+from PrimeBankApp.models import ClockEvent, CustomUser, TimeClock
+from PrimeBankApp.synthetic_data import seed_dataset
+from PrimeBankApp.views_timeclock_changes import export_timeclock_changes
+
+
+@pytest.fixture
+def data(db):
+    return seed_dataset(members_per_team=2, teams=2, days=3)
+
+
+def _token(user, team_id=None):
+    from PrimeBank.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    result = schema.execute(
+        "query($t: ID) { exportTimeClockChanges(teamId: $t) { downloadUrl } }",
+        variables={"t": team_id},
+        context_value=request,
+    )
+    assert result.errors is None, result.errors
+    return result.data["exportTimeClockChanges"]["downloadUrl"].rstrip("/").rsplit("/", 1)[1]
+
+
+def _get(user, token, **params):
+    request = RequestFactory().get("/export/timeclock/changes/x/", params)
+    request.user = user
+    return export_timeclock_changes(request, token)
+
+
+def _lines(response):
+    body = b"".join(response.streaming_content)
+    if response.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+def _team_clock(data, team_index=0):
+    return TimeClock.objects.filter(user__team=data.teams[team_index], user__team_managed__isnull=True).first()
+
+
+@pytest.mark.django_db
+def test_feed_returns_inserts_updates_and_deletes_after_the_cursor(data):
+    start = ClockEvent.objects.order_by("-seq").values_list("seq", flat=True).first() or 0
+    tc = _team_clock(data)
+    record_event(ClockEvent.CLOCK_IN, tc)
+    tc.clock_out = time(18, 0)
+    tc.save()
+    record_event(ClockEvent.MODIFIED, tc)
+    tc_id = tc.id
+    tc.delete()
+
+    response = _get(data.admin, _token(data.admin), after=start)
+    lines = _lines(response)
+
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert [(line["op"], line["id"]) for line in lines] == [("insert", tc_id), ("update", tc_id), ("delete", tc_id)]
+    assert lines[1]["clock_out"] == "18:00:00"
+    assert response["X-Next-Cursor"] == str(lines[-1]["seq"])
+    assert response["X-Has-More"] == "false"
+
+    # rien de nouveau: même curseur, corps vide
+    again = _get(data.admin, _token(data.admin), after=response["X-Next-Cursor"])
+    assert _lines(again) == []
+    assert again["X-Next-Cursor"] == response["X-Next-Cursor"]
+
+
+@pytest.mark.django_db
+def test_pages_follow_the_cursor_and_gzip(data):
+    for tc in TimeClock.objects.order_by("pk")[:5]:
+        record_event(ClockEvent.MODIFIED, tc)
+    token = _token(data.admin)
+
+    seen, after = [], 0
+    while True:
+        request = RequestFactory().get("/x/", {"after": after, "limit": 2}, HTTP_ACCEPT_ENCODING="gzip")
+        request.user = data.admin
+        response = export_timeclock_changes(request, token)
+        seen.extend(line["seq"] for line in _lines(response))
+        after = response["X-Next-Cursor"]
+        if response["X-Has-More"] == "false":
+            break
+
+    assert seen == list(ClockEvent.objects.order_by("seq").values_list("seq", flat=True))
+
+
+@pytest.mark.django_db
+def test_manager_feed_is_limited_to_their_team(data):
+    manager = data.managers[0]
+    mine, other = _team_clock(data, 0), _team_clock(data, 1)
+    record_event(ClockEvent.MODIFIED, mine)
+    record_event(ClockEvent.MODIFIED, other)
+
+    lines = _lines(_get(manager, _token(manager, data.teams[0].id)))
+    team_ids = set(CustomUser.objects.filter(team=data.teams[0]).values_list("id", flat=True))
+    assert lines and {line["user_id"] for line in lines} <= team_ids
+
+
+@pytest.mark.django_db
+def test_team_feed_keeps_the_events_of_members_who_left(data):
+    manager = data.managers[0]
+    start = ClockEvent.objects.order_by("-seq").values_list("seq", flat=True).first() or 0
+    moved, newcomer = _team_clock(data, 0), _team_clock(data, 1)
+    record_event(ClockEvent.MODIFIED, moved)
+    record_event(ClockEvent.MODIFIED, newcomer)
+    CustomUser.objects.filter(pk=moved.user_id).update(team=data.teams[1])
+    CustomUser.objects.filter(pk=newcomer.user_id).update(team=data.teams[0])
+    deleted = CustomUser.objects.filter(team=data.teams[0], team_managed__isnull=True).exclude(pk=newcomer.user_id).first()
+    deleted_clocks = set(TimeClock.objects.filter(user=deleted).values_list("id", flat=True))
+    assert deleted_clocks
+    deleted.delete()
+
+    lines = _lines(_get(manager, _token(manager, data.teams[0].id), after=start))
+
+    assert lines[0]["user_id"] == moved.user_id  # parti après l'événement
+    assert {line["id"] for line in lines if line["op"] == "delete"} == deleted_clocks
+    assert newcomer.user_id not in {line["user_id"] for line in lines}  # arrivé après l'événement
+
+
+@pytest.mark.django_db
+def test_access_rules(data):
+    from PrimeBank.schema import schema
+
+    manager, member = data.managers[0], data.members[0]
+    request = RequestFactory().post("/graphql")
+    request.user = manager
+    result = schema.execute("{ exportTimeClockChanges { downloadUrl } }", context_value=request)
+    assert "whole company" in str(result.errors[0])
+    result = schema.execute(
+        "query($t: ID) { exportTimeClockChanges(teamId: $t) { downloadUrl } }",
+        variables={"t": data.teams[1].id},
+        context_value=request,
+    )
+    assert "this team" in str(result.errors[0])
+
+    # token d'un autre utilisateur, et paramètres invalides
+    token = _token(manager, data.teams[0].id)
+    assert _get(member, token).status_code == 403
+    assert _get(manager, token, limit=0).status_code == 400
+    assert _get(manager, token, after="x").status_code == 400
@@ -9,21 +9,28 @@ import pytest
 from django.http import HttpResponseBadRequest, HttpResponseForbidden
 
 import PrimeBankApp.views_timeclock_export as views_export
+from PrimeBankApp.models import timeclock_duration_seconds
+
+
+@pytest.fixture(autouse=True)
+def _no_archive(settings):
+    # Dates fixes (2025) et pas de base: la lecture de l'archive ne doit jamais se déclencher
+    settings.TIMECLOCK_ARCHIVE_AFTER_DAYS = 100 * 365
 
 
 def test_duration_seconds_normal_and_overnight():
     d = date(2025, 1, 1)
     t1 = time(9, 0)
     t2 = time(17, 0)
-    assert views_export._duration_seconds(d, t1, t2) == 8 * 3600
+    assert timeclock_duration_seconds(d, t1, t2) == 8 * 3600
 
     # Nuit : clock_out plus tôt -> on ajoute un jour
     t_in = time(22, 0)
     t_out = time(6, 0)
-    assert views_export._duration_seconds(d, t_in, t_out) == 8 * 3600
+    assert timeclock_duration_seconds(d, t_in, t_out) == 8 * 3600
 
     # Heures manquantes
-    assert views_export._duration_seconds(d, None, t_out) == 0.0
+    assert timeclock_duration_seconds(d, None, t_out) == 0.0
 
 
 def test_authenticate_request_with_jwt_monkeypatched(monkeypatch):
@@ -31,10 +38,10 @@ def test_authenticate_request_with_jwt_monkeypatched(monkeypatch):
         META = {"HTTP_AUTHORIZATION": "JWT sometoken"}
         COOKIES = {}
 
-    # monkeypatch get_payload & get_user_by_payload pour retourner un faux user
+    # monkeypatch get_payload & get_user_by_claims pour retourner un faux user
     fake_user = type("U", (), {"id": 1, "is_authenticated": True})()
     monkeypatch.setattr(views_export, "get_payload", lambda token, context=None: {"user_id": 1})
-    monkeypatch.setattr(views_export, "get_user_by_payload", lambda payload: fake_user)
+    monkeypatch.setattr(views_export, "get_user_by_claims", lambda payload: fake_user)
 
     res = views_export._authenticate_request_with_jwt(Req)
     assert res is fake_user
@@ -132,4 +139,193 @@ def test_export_timeclock_csv_success_empty_qs(monkeypatch):
     resp = views_export.export_timeclock_csv(req, token)
     # must be a streaming response and have Content-Disposition
     assert hasattr(resp, "streaming_content")
-    assert "Content-Disposition" in resp
\ No newline at end of file
+    assert "Content-Disposition" in resp
+
+def test_accepts_gzip_negotiation():
+    def req(header):
+        return type("R", (), {"META": {"HTTP_ACCEPT_ENCODING": header}})()
+
+    assert views_export._accepts_gzip(req("gzip, deflate, br"))
+    assert views_export._accepts_gzip(req("br;q=1.0, gzip;q=0.5"))
+    assert not views_export._accepts_gzip(req("gzip;q=0"))
+    assert not views_export._accepts_gzip(req("identity"))
+    assert views_export._accepts_gzip(req("*;q=0, gzip"))
+    assert views_export._accepts_gzip(req("*"))
+    assert not views_export._accepts_gzip(req("gzip;q=0, *"))
+    assert not views_export._accepts_gzip(type("R", (), {"META": {}})())
+
+
+def test_gzip_stream_roundtrip():
+    import gzip
+
+    chunks = [f"{i};ligne\r\n" for i in range(1000)]
+    compressed = b"".join(views_export._gzip_stream(iter(chunks)))
+    assert gzip.decompress(compressed).decode() == "".join(chunks)
+    # Le flux compressé doit être bien plus petit que le texte répétitif
+    assert len(compressed) < len("".join(chunks)) / 4
+
+
+def test_zip_stream_contains_one_member_per_file():
+    import io
+    import zipfile
+
+    members = [
+        ("a.csv", iter(["x;y\r\n", "1;2\r\n"])),
+        ("b.csv", iter([])),
+    ]
+    payload = b"".join(views_export._zip_stream(iter(members)))
+    with zipfile.ZipFile(io.BytesIO(payload)) as zf:
+        assert zf.namelist() == ["a.csv", "b.csv"]
+        assert zf.read("a.csv") == b"x;y\r\n1;2\r\n"
+        assert zf.read("b.csv") == b""
+
+
+def _signed(payload):
+    import base64
+
+    b64_payload = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    return views_export.TimestampSigner().sign(b64_payload)
+
+
+def test_export_timeclock_csv_gzip_when_accepted(monkeypatch):
+    import gzip
+
+    class U:
+        id = 1
+        is_authenticated = True
+        is_admin = False
+        is_superuser = False
+
+    req = type("R", (), {"user": U(), "COOKIES": {}, "META": {"HTTP_ACCEPT_ENCODING": "gzip"}})()
+    token = _signed({
+        "requester_id": "1",
+        "target_user_id": "1",
+        "start_date": "2025-01-01",
+        "end_date": "2025-01-02",
+        "sep": ";",
+    })
+
+    class Target:
+        id = 1
+        team_id = None
+
+    class M:
+        def get(self, pk):
+            return Target()
+
+    class Entry:
+        id = 7
+        user_id = 1
+        day = date(2025, 1, 1)
+        clock_in = time(9, 0)
+        clock_out = time(17, 0)
+        duration_seconds = 8 * 3600.0
+
+    class Q:
+        def order_by(self, *args, **kwargs):
+            return self
+
+        def iterator(self):
+            return iter([Entry()])
+
+    monkeypatch.setattr(views_export, "CustomUser", type("C", (), {"objects": M(), "DoesNotExist": Exception}))
+    monkeypatch.setattr(views_export, "TimeClock", type("T", (), {"objects": type("O", (), {"filter": lambda *a, **k: Q()})}))
+
+    resp = views_export.export_timeclock_csv(req, token)
+    assert resp["Content-Encoding"] == "gzip"
+    text = gzip.decompress(b"".join(resp.streaming_content)).decode()
+    rows = list(csv.reader(text.splitlines(), delimiter=";"))
+    assert rows[1][:3] == ["7", "1", "2025-01-01"]
+    assert rows[-1][0] == "TOTAL" and rows[-1][5] == str(8 * 3600)
+
+
+def test_export_timeclock_zip_forbidden_for_other_team(monkeypatch):
+    class U:
+        id = 1
+        is_authenticated = True
+        is_admin = False
+        is_superuser = False
+        team_managed_id = 3
+
+    req = type("R", (), {"user": U(), "COOKIES": {}, "META": {}})()
+    token = _signed({
+        "requester_id": "1",
+        "target_user_ids": ["2", "3"],
+        "start_date": "2025-01-01",
+        "end_date": "2025-01-31",
+        "sep": ";",
+    })
+
+    targets = [
+        type("T", (), {"id": 2, "team_id": 3})(),
+        type("T", (), {"id": 3, "team_id": 4})(),
+    ]
+
+    class Q:
+        def order_by(self, *args):
+            return targets
+
+    class M:
+        def filter(self, **kwargs):
+            return Q()
+
+    monkeypatch.setattr(views_export, "CustomUser", type("C", (), {"objects": M(), "DoesNotExist": Exception}))
+
+    resp = views_export.export_timeclock_zip(req, token)
+    assert isinstance(resp, HttpResponseForbidden)
+
+
+def test_export_timeclock_zip_streams_one_csv_per_user(monkeypatch):
+    import io
+    import zipfile
+
+    class U:
+        id = 1
+        is_authenticated = True
+        is_admin = True
+        is_superuser = False
+
+    req = type("R", (), {"user": U(), "COOKIES": {}, "META": {}})()
+    token = _signed({
+        "requester_id": "1",
+        "target_user_ids": ["2", "3", "4"],
+        "start_date": "2025-01-01",
+        "end_date": "2025-01-31",
+        "sep": ";",
+    })
+
+    targets = [type("T", (), {"id": uid, "team_id": 3})() for uid in (2, 3, 4)]
+
+    def entry(uid, d):
+        return type("E", (), {"id": uid * 10 + d, "user_id": uid, "day": date(2025, 1, d),
+                              "clock_in": time(9, 0), "clock_out": time(12, 0),
+                              "duration_seconds": 3 * 3600.0})()
+
+    # L'utilisateur 3 n'a aucun pointage
+    entries = [entry(2, 1), entry(2, 2), entry(4, 1)]
+
+    class UserQ:
+        def order_by(self, *args):
+            return targets
+
+    class TCQ:
+        def order_by(self, *args):
+            return self
+
+        def iterator(self):
+            return iter(entries)
+
+    monkeypatch.setattr(views_export, "CustomUser", type("C", (), {"objects": type("M", (), {"filter": lambda *a, **k: UserQ()})(), "DoesNotExist": Exception}))
+    monkeypatch.setattr(views_export, "TimeClock", type("T", (), {"objects": type("O", (), {"filter": lambda *a, **k: TCQ()})}))
+
+    resp = views_export.export_timeclock_zip(req, token)
+    assert resp["Content-Type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content))) as zf:
+        names = zf.namelist()
+        assert names == [f"timeclocks_{uid}_20250101_20250131.csv" for uid in (2, 3, 4)]
+        rows_2 = zf.read(names[0]).decode().splitlines()
+        rows_3 = zf.read(names[1]).decode().splitlines()
+        rows_4 = zf.read(names[2]).decode().splitlines()
+    assert len(rows_2) == 5  # en-tête + 2 lignes + ligne vide + total
+    assert len(rows_3) == 3
+    assert rows_4[1].startswith("41;4;2025-01-01")
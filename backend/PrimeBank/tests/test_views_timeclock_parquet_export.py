@@ -0,0 +1,122 @@
+"""Tests unitaires pour l'export Parquet de `views_timeclock_parquet_export.py`."""
+import base64
+import io
+import json
+from datetime import date, time
+from types import SimpleNamespace
+
+import pyarrow.parquet as pq
+
+from django.http import HttpResponseForbidden
+
+import PrimeBankApp.views_timeclock_export as views_export
+import PrimeBankApp.views_timeclock_parquet_export as views_parquet
+
+
+def _signed(payload):
+    b64_payload = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    return views_export.TimestampSigner().sign(b64_payload)
+
+
+def test_parquet_stream_writes_one_row_group_per_chunk():
+    rows = [
+        (date(2025, 1, d), 1, time(9, 0), time(17, 0), 8 * 3600.0)
+        for d in range(1, 6)
+    ]
+    # Pointage de nuit et pointage sans sortie
+    rows.append((date(2025, 1, 6), 1, time(22, 0), time(6, 0), 8 * 3600.0))
+    rows.append((date(2025, 1, 7), 1, time(9, 0), None, 0.0))
+
+    payload = b"".join(views_parquet._parquet_stream(iter(rows), row_group_size=3))
+    parquet_file = pq.ParquetFile(io.BytesIO(payload))
+    assert parquet_file.num_row_groups == 3
+
+    table = parquet_file.read()
+    assert table.column_names == ["day", "user_id", "clock_in", "clock_out", "duration_seconds"]
+    durations = table.column("duration_seconds").to_pylist()
+    assert durations[:5] == [8 * 3600] * 5
+    assert durations[5] == 8 * 3600
+    assert durations[6] is None
+    assert table.column("day").to_pylist()[0] == date(2025, 1, 1)
+    assert table.column("clock_in").to_pylist()[0] == time(9, 0)
+
+
+def test_parquet_stream_empty_produces_valid_file():
+    payload = b"".join(views_parquet._parquet_stream(iter(())))
+    assert pq.read_table(io.BytesIO(payload)).num_rows == 0
+
+
+def test_export_timeclock_parquet_forbidden(monkeypatch):
+    class U:
+        id = 1
+        is_authenticated = True
+        is_admin = False
+        is_superuser = False
+        team_managed_id = None
+
+    req = type("R", (), {"user": U(), "COOKIES": {}, "META": {}})()
+    token = _signed({
+        "requester_id": "1",
+        "target_user_id": "2",
+        "start_date": "2025-01-01",
+        "end_date": "2025-01-31",
+    })
+
+    class Target:
+        id = 2
+        team_id = 5
+
+    class M:
+        def get(self, pk):
+            return Target()
+
+    monkeypatch.setattr(views_export, "CustomUser", type("C", (), {"objects": M(), "DoesNotExist": Exception}))
+
+    resp = views_parquet.export_timeclock_parquet(req, token)
+    assert isinstance(resp, HttpResponseForbidden)
+
+
+def test_export_timeclock_parquet_success(monkeypatch):
+    class U:
+        id = 1
+        is_authenticated = True
+        is_admin = False
+        is_superuser = False
+
+    req = type("R", (), {"user": U(), "COOKIES": {}, "META": {}})()
+    token = _signed({
+        "requester_id": "1",
+        "target_user_id": "1",
+        "start_date": "2025-01-01",
+        "end_date": "2025-01-31",
+    })
+
+    class Target:
+        id = 1
+        team_id = None
+
+    class M:
+        def get(self, pk):
+            return Target()
+
+    class Q:
+        def order_by(self, *args):
+            return self
+
+        def values_list(self, *fields, named=False):
+            return self
+
+        def iterator(self, chunk_size=None):
+            row = SimpleNamespace(
+                user_id=1, day=date(2025, 1, 2), clock_in=time(8, 30), clock_out=time(12, 0), duration_seconds=3.5 * 3600
+            )
+            return iter([row])
+
+    monkeypatch.setattr(views_export, "CustomUser", type("C", (), {"objects": M(), "DoesNotExist": Exception}))
+    monkeypatch.setattr(views_parquet, "TimeClock", type("T", (), {"objects": type("O", (), {"filter": lambda *a, **k: Q()})}))
+
+    resp = views_parquet.export_timeclock_parquet(req, token)
+    assert resp["Content-Disposition"].endswith('.parquet"')
+    table = pq.read_table(io.BytesIO(b"".join(resp.streaming_content)))
+    assert table.num_rows == 1
+    assert table.column("duration_seconds").to_pylist() == [int(3.5 * 3600)]
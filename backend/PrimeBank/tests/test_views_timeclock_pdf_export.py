@@ -0,0 +1,122 @@
+"""Tests unitaires pour les helpers de rendu de `views_timeclock_pdf_export.py`."""
+import io
+import tempfile
+import tracemalloc
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, NameObject
+
+from PrimeBankApp.models import timeclock_duration_seconds
+
+try:
+    import PrimeBankApp.views_timeclock_pdf_export as views_pdf
+except OSError:  # WeasyPrint présent mais bibliothèques système (Pango) absentes
+    pytest.skip("WeasyPrint system libraries unavailable", allow_module_level=True)
+
+
+USER = {"id": 1, "first_name": "Ana", "last_name": "X", "email": "a@x.com", "hour_contract": 35}
+
+
+def _entry(d, cin=time(9, 0), cout=time(17, 0)):
+    return SimpleNamespace(day=d, clock_in=cin, clock_out=cout, duration_seconds=timeclock_duration_seconds(d, cin, cout))
+
+
+def test_build_entries_and_context():
+    entries, total_seconds, num_days = views_pdf._build_entries([
+        _entry(date(2025, 1, 1)),
+        _entry(date(2025, 1, 2), time(22, 0), time(2, 0)),
+    ])
+    assert [e["duration_fmt"] for e in entries] == ["8.00", "4.00"]
+    assert total_seconds == 12 * 3600
+    assert num_days == 2
+
+    context = views_pdf._build_report_context(USER, date(2025, 1, 1), date(2025, 1, 31), entries, total_seconds, num_days)
+    assert context["total_hours"] == "12.00"
+    assert context["avg_daily_hours"] == "6.00"
+    assert context["contract_hours"] == 35
+    assert context["show_summary"] and context["show_entries"]
+
+
+def test_resolve_primary_color():
+    assert views_pdf._resolve_primary_color("#123456") == "#123456"
+    assert views_pdf._resolve_primary_color("red") == views_pdf.FALLBACK_PRIMARY_COLOR
+    assert views_pdf._resolve_primary_color(None) == views_pdf.FALLBACK_PRIMARY_COLOR
+
+
+def _blank_pdf(width, content=b""):
+    writer = PdfWriter()
+    page = writer.add_blank_page(width=width, height=100)
+    if content:
+        stream = DecodedStreamObject()
+        stream.set_data(content)
+        page[NameObject("/Contents")] = writer._add_object(stream)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def _write_file(path, data):
+    with open(path, "wb") as fileobj:
+        fileobj.write(data)
+
+
+def _fake_weasyprint(monkeypatch):
+    rendered = []
+
+    class FakeHTML:
+        def __init__(self, string):
+            self.string = string
+
+        def write_pdf(self, target):
+            # un PDF d'une page par rendu, reconnaissable à sa largeur (ordre de rendu)
+            rendered.append(self.string)
+            _write_file(target, _blank_pdf(len(rendered)))
+
+    monkeypatch.setattr(views_pdf, "weasyprint", SimpleNamespace(HTML=FakeHTML))
+    return rendered
+
+
+def test_write_chunked_pdf_renders_one_document_per_month(monkeypatch):
+    rendered = _fake_weasyprint(monkeypatch)
+    rows = [_entry(date(2025, 1, d)) for d in (2, 3)] + [_entry(date(2025, 3, 3))]
+
+    target = io.BytesIO()
+    views_pdf._write_chunked_pdf(USER, date(2025, 1, 1), date(2025, 3, 31), iter(rows), target)
+
+    # Janvier, mars (février vide ignoré) puis la synthèse
+    assert len(rendered) == 3
+    assert "Activity Logs - January 2025" in rendered[0]
+    assert "Activity Logs - March 2025" in rendered[1]
+    assert "Total Hours" not in rendered[0]
+    assert "24.00" in rendered[2] and "Activity Logs" not in rendered[2]
+    # Synthèse en première page, puis les mois dans l'ordre
+    target.seek(0)
+    assert [float(page.mediabox.width) for page in PdfReader(target).pages] == [3, 1, 2]
+
+
+def _peak_memory(monkeypatch, months):
+    # ~250 ko de contenu par mois rendu, PDF construit hors de la mesure
+    pdf = _blank_pdf(100, content=b"0 0 m\n" * 40_000)
+    monkeypatch.setattr(
+        views_pdf, "weasyprint", SimpleNamespace(HTML=lambda string: SimpleNamespace(write_pdf=lambda target: _write_file(target, pdf)))
+    )
+    rows = [_entry(date(2020 + m // 12, m % 12 + 1, 2)) for m in range(months)]
+    with tempfile.TemporaryFile() as target:
+        tracemalloc.start()
+        try:
+            views_pdf._write_chunked_pdf(USER, rows[0].day, rows[-1].day, iter(rows), target)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        target.seek(0)
+        assert len(PdfReader(target).pages) == months + 1
+    return peak
+
+
+def test_write_chunked_pdf_peak_memory_does_not_grow_with_the_range(monkeypatch):
+    short = _peak_memory(monkeypatch, 3)
+    # 48 mois: un PdfWriter unique garderait ~12 Mo de pages
+    assert _peak_memory(monkeypatch, 48) < short * 1.5